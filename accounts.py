@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Multi-account fan-out for Railway CSV automation
+Runs one isolated RailwayCSVDownloader per configured account in a process
+pool and reports a single aggregated result
+
+Config (ACCOUNTS_FILE, a path or inline JSON):
+  {"max_concurrency": 2,
+   "accounts": [{"name": "studio-a", "username": "alt_a", "password_env": "STUDIO_A_PASSWORD",
+                 "experiences": ["1234567"], "env": {"PIPELINE": "true"}}]}
+
+Not available in this mode: the warm session pool (SESSION_POOL), the /history
+endpoint and the outbox drain at startup. Account processes are spawned per
+run, so none of them outlives its run; each run still drains its own outbox
+and writes its own history under STATE_DIR/accounts/<name>.
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import multiprocessing
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import requests
+
+from metrics import Counter, record_run, snapshot, merge_snapshot
+
+logger = logging.getLogger(__name__)
+
+ACCOUNT_RUNS = Counter('railway_account_runs_total', 'Per-account runs by result', ['account', 'result'])
+
+
+def load_accounts(config):
+    """Parse the accounts config from inline JSON or a file path"""
+    text = config.strip()
+    if not text.startswith('{'):
+        text = Path(config).read_text()
+    data = json.loads(text)
+
+    accounts = data.get('accounts', [])
+    names = set()
+    for account in accounts:
+        if not account.get('name') or not account.get('username'):
+            raise ValueError("Every account needs a 'name' and a 'username'")
+        if account['name'] in names:
+            raise ValueError(f"Duplicate account name '{account['name']}'")
+        if not account.get('password') and not os.getenv(account.get('password_env', '')):
+            raise ValueError(f"No password for account '{account['name']}' (set password_env)")
+        names.add(account['name'])
+    if not accounts:
+        raise ValueError("Accounts config lists no accounts")
+    return accounts, int(data.get('max_concurrency', 2))
+
+
+def account_env(account, state_dir, download_dir):
+    """Environment for one account's downloader: own credentials, state, downloads and session cache"""
+    slug = re.sub(r'[^\w.-]', '_', account['name'])
+    env = {
+        'ALT_ROBLOX_USERNAME': account['username'],
+        'ALT_ROBLOX_PASSWORD': account.get('password') or os.environ[account['password_env']],
+        'STATE_DIR': str(Path(state_dir) / 'accounts' / slug),
+        'DOWNLOAD_FOLDER': str(Path(download_dir) / 'accounts' / slug),
+        'SEND_NOTIFICATIONS': 'false',
+    }
+    if account.get('experiences'):
+        env['MULTI_EXPERIENCE'] = 'true'
+        env['TARGET_EXPERIENCES'] = ','.join(str(e) for e in account['experiences'])
+    env.update({key: str(value) for key, value in account.get('env', {}).items()})
+    return env
+
+
+def run_account(name, env):
+    """Process entry point: run one account's automation and return its summary"""
+    os.environ.update(env)
+    from main import RailwayCSVDownloader
+
+    # Interleaved worker logs stay attributable
+    for handler in logging.getLogger().handlers:
+        handler.setFormatter(logging.Formatter(f'%(asctime)s - [{name}] %(levelname)s - %(message)s'))
+
+    downloader = RailwayCSVDownloader()
+    downloader.run_automation()
+    # The child's registry dies with it; ship its samples home (runs are counted per account by the parent)
+    return dict(downloader.last_run_summary, account=name, metrics=snapshot(exclude=('railway_runs_total',)))
+
+
+class AccountFanOut:
+    """Run every account's automation with at most `max_concurrency` at once"""
+
+    def __init__(self, accounts, max_concurrency=2, state_dir='/tmp/state', download_dir='/tmp/downloads',
+                 api_url=None):
+        self.accounts = accounts
+        self.max_concurrency = max(1, max_concurrency)
+        self.state_dir = state_dir
+        self.download_dir = download_dir
+        self.api_url = api_url
+        self.last_results = []
+
+    @classmethod
+    def from_env(cls, config):
+        accounts, max_concurrency = load_accounts(config)
+        return cls(
+            accounts,
+            max_concurrency=int(os.getenv('ACCOUNT_CONCURRENCY', str(max_concurrency))),
+            state_dir=os.getenv('STATE_DIR', '/tmp/state'),
+            download_dir=os.getenv('DOWNLOAD_FOLDER', '/tmp/downloads'),
+            api_url=os.getenv('SPARKEDHOSTING_API_URL', 'http://208.87.101.142:5000/api'),
+        )
+
+    def run(self):
+        """Fan out over all accounts; True only if every account succeeded"""
+        logger.info(f"👥 Running {len(self.accounts)} accounts, {self.max_concurrency} at a time")
+        started = time.monotonic()
+        results = []
+
+        # Spawned single-use workers: no inherited threads or locks, no state leaking between accounts
+        with ProcessPoolExecutor(max_workers=min(self.max_concurrency, len(self.accounts)),
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 max_tasks_per_child=1) as pool:
+            futures = {
+                pool.submit(run_account, account['name'],
+                            account_env(account, self.state_dir, self.download_dir)): account['name']
+                for account in self.accounts
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    result = future.result()
+                    merge_snapshot(result.pop('metrics', {}))
+                except Exception as e:
+                    result = {'account': name, 'success': False, 'failed_stage': 'process', 'error': str(e),
+                              'downloaded': 0, 'processed': 0, 'duration_seconds': None}
+                ACCOUNT_RUNS.inc(account=name, result='success' if result['success'] else 'failure')
+                icon = "✅" if result['success'] else "❌"
+                logger.info(f"{icon} Account {name}: {result['processed']}/{result['downloaded']} files processed"
+                            + (f" (failed at {result['failed_stage']})" if result.get('failed_stage') else ""))
+                results.append(result)
+
+        duration = time.monotonic() - started
+        results.sort(key=lambda r: r['account'])
+        self.last_results = results
+        success = all(r['success'] for r in results)
+        failed = [r['account'] for r in results if not r['success']]
+
+        self.write_report(results, duration)
+        record_run(success, duration, None if success else 'accounts')
+        if any(r['success'] for r in results):
+            self.send_notification(results, duration)
+
+        logger.info(f"👥 {len(results) - len(failed)}/{len(results)} accounts succeeded in {duration:.1f}s"
+                    + (f", failed: {', '.join(failed)}" if failed else ""))
+        return success
+
+    def write_report(self, results, duration):
+        path = Path(self.state_dir) / 'accounts_report.json'
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps({
+                'finished_at': datetime.now().isoformat(timespec='seconds'),
+                'duration_seconds': round(duration, 3),
+                'accounts': results,
+            }, indent=2))
+        except Exception as e:
+            logger.warning(f"⚠️ Could not write accounts report: {e}")
+
+    def send_notification(self, results, duration):
+        """One notification for the whole fan-out"""
+        succeeded = sum(1 for r in results if r['success'])
+        processed = sum(r['processed'] for r in results)
+        downloaded = sum(r['downloaded'] for r in results)
+        lines = []
+        for r in results:
+            flagged = sum(1 for report in r.get('reports', []) if report['problems'])
+            lines.append(f"{'✅' if r['success'] else '❌'} {r['account']}: {r['processed']}/{r['downloaded']} files"
+                         + (f", {flagged} flagged" if flagged else ""))
+        try:
+            requests.post(
+                f"{self.api_url}/automation-notification",
+                json={
+                    'message': (f"🎉 Railway CSV automation: {succeeded}/{len(results)} accounts succeeded\n"
+                                f"📊 Processed {processed}/{downloaded} files\n⏱️ Duration: {duration:.0f}s\n"
+                                + "\n".join(lines)),
+                    'timestamp': datetime.now().isoformat(),
+                    'success': succeeded == len(results),
+                    'accounts': results,
+                },
+                timeout=10
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Aggregated notification failed: {e}")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Fake Roblox login, creations dashboard and analytics site for offline benchmarks
+Pages mimic the structure RailwayCSVDownloader navigates; export buttons
+serve generated CSVs of configurable size
+"""
+
+import re
+import time
+import random
+import logging
+import threading
+from datetime import date, timedelta
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+SESSION_COOKIE = '.ROBLOSECURITY'
+EXPERIENCE_PATH = re.compile(r'^/dashboard/creations/experiences/(\d+)/(overview|analytics)$')
+EXPORT_PATH = re.compile(r'^/export/(\d+)/([\w-]+)\.csv$')
+
+PAGE = "<!DOCTYPE html><html><head><title>{title}</title></head><body>{body}</body></html>"
+
+
+def generate_csv(experience_id, report, rows):
+    """Yield a deterministic analytics CSV in chunks"""
+    rng = random.Random(f"{experience_id}:{report}")
+    start = date.today() - timedelta(days=rows)
+    yield "Date,Visits,Playtime Minutes,Revenue\n".encode()
+    batch = []
+    for i in range(rows):
+        day = start + timedelta(days=i)
+        batch.append(f"{day.isoformat()},{rng.randint(0, 5000)},{rng.randint(0, 90000)},{rng.randint(0, 900)}\n")
+        if len(batch) == 1000:
+            yield ''.join(batch).encode()
+            batch = []
+    if batch:
+        yield ''.join(batch).encode()
+
+
+class FakeRobloxHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    experiences = 1
+    reports = ('overview', 'retention', 'monetization')
+    rows = 1000
+    latency = 0.0
+    export_latency = 0.0
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _logged_in(self):
+        return f"{SESSION_COOKIE}=" in self.headers.get('Cookie', '')
+
+    def _send(self, status, body=b'', content_type='text/html', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _page(self, title, body):
+        self._send(200, PAGE.format(title=title, body=body).encode())
+
+    def _redirect(self, location, headers=None):
+        self._send(302, headers={'Location': location, **(headers or {})})
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        path = self.path.split('?')[0]
+
+        if path == '/health':
+            return self._send(200, b'ok', 'text/plain')
+
+        if path == '/v1/users/authenticated':
+            # Stands in for the users API the session cache validates against (ROBLOX_USERS_URL)
+            if self._logged_in():
+                return self._send(200, b'{"id": 1, "name": "benchmark"}', 'application/json')
+            return self._send(401, b'{"errors": []}', 'application/json')
+
+        if path == '/login':
+            return self._page("Login", (
+                '<form method="post" action="/login">'
+                '<input id="login-username" name="username">'
+                '<input id="login-password" name="password" type="password">'
+                '<button id="login-button" type="submit">Log In</button>'
+                '</form>'
+            ))
+
+        if not self._logged_in():
+            return self._redirect('/login')
+
+        if path == '/dashboard/creations':
+            links = ''.join(
+                f'<a href="/dashboard/creations/experiences/{1000 + i}/overview">Tattoo Studio {i}</a>'
+                for i in range(self.experiences)
+            )
+            return self._page("Creations", links)
+
+        match = EXPERIENCE_PATH.match(path)
+        if match and match.group(2) == 'overview':
+            return self._page("Experience", (
+                f'<a href="/dashboard/creations/experiences/{match.group(1)}/analytics">Analytics</a>'
+            ))
+
+        if match:
+            # Anchors with a download attribute download without leaving the page
+            buttons = ''.join(
+                f'<button onclick="var a=document.createElement(\'a\');'
+                f'a.href=\'/export/{match.group(1)}/{report}.csv\';a.download=\'\';'
+                f'document.body.appendChild(a);a.click();">Export</button>'
+                for report in self.reports
+            )
+            return self._page("Analytics", f'<div class="chart">{buttons}</div>')
+
+        match = EXPORT_PATH.match(path)
+        if match:
+            if self.export_latency:
+                time.sleep(self.export_latency)
+            body = b''.join(generate_csv(match.group(1), match.group(2), self.rows))
+            return self._send(200, body, 'text/csv', {
+                # Experience first, like the dashboard's own exports, so describe_csv sees a clean report type
+                'Content-Disposition': f'attachment; filename="{match.group(1)}__{match.group(2)}.csv"'
+            })
+
+        self._send(404, b'not found', 'text/plain')
+
+    def do_POST(self):
+        if self.latency:
+            time.sleep(self.latency)
+        form = parse_qs(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode())
+        if self.path == '/login' and form.get('username') and form.get('password'):
+            return self._redirect('/dashboard/creations',
+                                  {'Set-Cookie': f'{SESSION_COOKIE}=fake-session; Path=/; HttpOnly'})
+        self._send(404, b'not found', 'text/plain')
+
+
+def start_fake_roblox(host='0.0.0.0', port=0, **settings):
+    """Start the fake site on a daemon thread; settings override handler attributes"""
+    handler = type('ConfiguredFakeRobloxHandler', (FakeRobloxHandler,), settings)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='fake-roblox', daemon=True).start()
+    return server
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end benchmark for RailwayCSVDownloader
+Runs run_automation against a fake Roblox site, the reference upload API and
+a local Selenium Grid/standalone browser, then reports per-stage timings
+
+Usage:
+  docker run -d -p 4444:4444 --shm-size=2g selenium/standalone-chrome
+  python benchmarks/run_benchmark.py --site-host host.docker.internal --managed-downloads \\
+      --output bench.json --baseline benchmarks/baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import logging
+import argparse
+import tempfile
+import threading
+import statistics
+from pathlib import Path
+from datetime import datetime
+from http.server import ThreadingHTTPServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import metrics  # noqa: E402
+from main import RailwayCSVDownloader  # noqa: E402
+from reference_upload_server import UploadHandler, UploadStore  # noqa: E402
+from benchmarks.fake_roblox import start_fake_roblox  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+def start_fake_api(host, storage, latency):
+    """Start the reference upload API on a daemon thread"""
+    handler = type('BenchmarkUploadHandler', (UploadHandler,), {
+        'store': UploadStore(storage), 'latency': latency, 'log_message': lambda *args: None,
+    })
+    server = ThreadingHTTPServer((host, 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='fake-api', daemon=True).start()
+    return server
+
+
+def stage_timings():
+    """Return {stage: {"seconds": total, "count": n}} from the metrics registry"""
+    with metrics.STAGE_SECONDS.lock:
+        return {key[0]: {'seconds': round(total, 3), 'count': count}
+                for key, (_, total, count) in metrics.STAGE_SECONDS.values.items()}
+
+
+def run_once(env, session_dir):
+    """Run one automation with a fresh state dir and download folder; return its measurements
+
+    Only the encrypted login cache is carried between runs (via `session_dir`),
+    so later runs measure the warm-login path and everything else starts cold.
+    """
+    with metrics.STAGE_SECONDS.lock:
+        metrics.STAGE_SECONDS.values.clear()
+    uploaded_before = metrics.BYTES_UPLOADED.values[()]
+    downloaded_before = metrics.BYTES_DOWNLOADED.values[()]
+
+    # Own download folder per run (under DOWNLOAD_FOLDER if it exists, e.g. a mount the browser shares)
+    download_base = env.get('DOWNLOAD_FOLDER') or os.getenv('DOWNLOAD_FOLDER')
+    download_base = download_base if download_base and os.path.isdir(download_base) else None
+    with tempfile.TemporaryDirectory() as state_dir, \
+            tempfile.TemporaryDirectory(prefix='bench_downloads_', dir=download_base) as download_dir:
+        os.environ.update(env, STATE_DIR=state_dir, DOWNLOAD_FOLDER=download_dir)
+        cached = [shutil.copy2(path, state_dir) for path in Path(session_dir).glob('session_*.bin')]
+        downloader = RailwayCSVDownloader()
+        started = time.monotonic()
+        success = downloader.run_automation()
+        total = time.monotonic() - started
+        for path in Path(state_dir).glob('session_*.bin'):
+            shutil.copy2(path, session_dir)
+
+    return {
+        'success': success,
+        'session_cached': bool(cached),
+        'total_seconds': round(total, 3),
+        'stages': stage_timings(),
+        'bytes_downloaded': metrics.BYTES_DOWNLOADED.values[()] - downloaded_before,
+        'bytes_uploaded': metrics.BYTES_UPLOADED.values[()] - uploaded_before,
+    }
+
+
+def summarize(runs):
+    """Median of total and per-stage seconds across runs"""
+    stages = sorted({stage for run in runs for stage in run['stages']})
+    return {
+        'total_seconds': round(statistics.median(r['total_seconds'] for r in runs), 3),
+        'stages': {
+            stage: round(statistics.median(r['stages'].get(stage, {}).get('seconds', 0.0) for r in runs), 3)
+            for stage in stages
+        },
+        'success_rate': sum(1 for r in runs if r['success']) / len(runs),
+    }
+
+
+def compare(summary, baseline, tolerance, min_seconds):
+    """Return regressions: entries slower than baseline by more than tolerance and min_seconds"""
+    pairs = [('total', summary['total_seconds'], baseline['total_seconds'])]
+    pairs += [(stage, seconds, baseline['stages'].get(stage)) for stage, seconds in summary['stages'].items()]
+
+    regressions = []
+    for name, current, previous in pairs:
+        if previous is None:
+            continue
+        if current > previous * (1 + tolerance) and current - previous > min_seconds:
+            regressions.append({'stage': name, 'baseline': previous, 'current': current,
+                                'change_pct': round((current / previous - 1) * 100, 1) if previous else None})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline RailwayCSVDownloader benchmark")
+    parser.add_argument('--selenium-url', default=os.getenv('SELENIUM_REMOTE_URL', 'http://localhost:4444/wd/hub'))
+    parser.add_argument('--site-host', default=socket.gethostbyname(socket.gethostname()),
+                        help="host name the browser uses to reach the fake servers")
+    parser.add_argument('--managed-downloads', action='store_true',
+                        help="fetch files via Grid managed downloads (browser in a container)")
+    parser.add_argument('--experiences', type=int, default=1)
+    parser.add_argument('--reports', type=int, default=3)
+    parser.add_argument('--rows', type=int, default=1000, help="rows per generated CSV")
+    parser.add_argument('--latency-ms', type=float, default=50, help="fake site page latency")
+    parser.add_argument('--export-latency-ms', type=float, default=500, help="fake site export latency")
+    parser.add_argument('--api-latency-ms', type=float, default=50, help="fake upload API latency")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help="extra environment for the downloader, e.g. PIPELINE=true")
+    parser.add_argument('--output', help="write the JSON report here")
+    parser.add_argument('--baseline', help="compare against this stored report")
+    parser.add_argument('--save-baseline', help="store this run's report as a baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed slowdown fraction")
+    parser.add_argument('--min-seconds', type=float, default=0.5, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    reports = ('overview', 'retention', 'monetization', 'engagement', 'acquisition', 'performance')
+    site = start_fake_roblox(
+        experiences=args.experiences, reports=reports[:args.reports], rows=args.rows,
+        latency=args.latency_ms / 1000, export_latency=args.export_latency_ms / 1000,
+    )
+    storage = tempfile.mkdtemp(prefix='bench_uploads_')
+    api = start_fake_api('0.0.0.0', storage, args.api_latency_ms / 1000)
+
+    site_url = f"http://{args.site_host}:{site.server_port}"
+    env = {
+        'ALT_ROBLOX_USERNAME': 'benchmark',
+        'ALT_ROBLOX_PASSWORD': 'benchmark',
+        'SELENIUM_REMOTE_URL': args.selenium_url,
+        'SELENIUM_MANAGED_DOWNLOADS': 'true' if args.managed_downloads else 'false',
+        'SPARKEDHOSTING_API_URL': f"http://127.0.0.1:{api.server_port}/api",
+        'ROBLOX_BASE_URL': site_url,
+        'ROBLOX_CREATE_URL': site_url,
+        # Validated from this process, which reaches the fake site locally even when the browser can't
+        'ROBLOX_USERS_URL': f"http://127.0.0.1:{site.server_port}",
+        'MULTI_EXPERIENCE': 'true' if args.experiences > 1 else 'false',
+        'MAX_EXPORTS_PER_EXPERIENCE': str(args.reports),
+    }
+    env.update(item.split('=', 1) for item in args.env)
+
+    runs = []
+    session_dir = tempfile.mkdtemp(prefix='bench_session_')
+    for i in range(args.runs):
+        logger.info(f"🏁 Benchmark run {i + 1}/{args.runs}")
+        runs.append(run_once(env, session_dir))
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'config': {k: v for k, v in vars(args).items() if k not in ('output', 'baseline', 'save_baseline')},
+        'env': {k: v for k, v in env.items() if 'PASSWORD' not in k},
+        'runs': runs,
+        **summarize(runs),
+    }
+
+    exit_code = 0
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        report['regressions'] = compare(report, baseline, args.tolerance, args.min_seconds)
+        for regression in report['regressions']:
+            logger.error(f"📉 Regression in {regression['stage']}: "
+                         f"{regression['baseline']}s -> {regression['current']}s")
+        if report['regressions']:
+            exit_code = 1
+        else:
+            logger.info("✅ No regressions against baseline")
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(output)
+    print(output)
+
+    logger.info(f"⏱️ Median total: {report['total_seconds']}s over {args.runs} runs")
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
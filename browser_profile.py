@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Lean Chrome profile for Railway CSV automation
+Blocks images, fonts, media and tracking scripts with CDP network blocking
+(content settings where the Grid doesn't relay CDP), loads pages eagerly in a
+smaller viewport and measures what was saved from Chrome's network log
+"""
+
+import re
+import json
+import logging
+import threading
+from pathlib import Path
+
+from metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+LEAN_REQUESTS_SAVED = Counter('railway_lean_requests_saved_total',
+                              'Requests blocked by the lean browser profile', ['type'])
+LEAN_BYTES_SAVED = Counter('railway_lean_bytes_saved_total',
+                           'Bytes the lean profile avoided (blocked requests x learned typical size)')
+LEAN_FALLBACKS = Counter('railway_lean_fallbacks_total', 'Exports retried with the full browser profile')
+
+LEAN_WINDOW_SIZE = "1280,800"
+
+# Network.setBlockedURLs patterns ('*' wildcards)
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.m4a", "*.ogg",
+    "*tr.rbxcdn.com*",  # experience and avatar thumbnails
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*hotjar.com*", "*sentry.io*",
+]
+
+LEAN_PREFS = {
+    "profile.default_content_setting_values.notifications": 2,
+    "profile.default_content_setting_values.media_stream": 2,
+    "profile.default_content_setting_values.geolocation": 2,
+}
+
+LEAN_ARGUMENTS = [
+    "--autoplay-policy=user-gesture-required",
+    "--mute-audio",
+]
+
+# Without CDP these stop images and fonts before any request exists, so they can't be counted
+CONTENT_BLOCKING_PREFS = {"profile.managed_default_content_settings.images": 2}
+CONTENT_BLOCKING_ARGUMENTS = ["--blink-settings=imagesEnabled=false", "--disable-remote-fonts"]
+
+# Typical transfer sizes per CDP resource type until full-profile sessions have measured real ones
+DEFAULT_BYTES = {'image': 30_000, 'font': 40_000, 'media': 400_000, 'script': 60_000, 'other': 20_000}
+
+
+def apply_lean_options(chrome_options, prefs, content_blocking=False):
+    """Add lean flags, prefs, the eager page-load strategy and Chrome's network log to Chrome options"""
+    for argument in LEAN_ARGUMENTS:
+        chrome_options.add_argument(argument)
+    chrome_options.add_argument(f"--window-size={LEAN_WINDOW_SIZE}")
+    prefs.update(LEAN_PREFS)
+    if content_blocking:
+        for argument in CONTENT_BLOCKING_ARGUMENTS:
+            chrome_options.add_argument(argument)
+        prefs.update(CONTENT_BLOCKING_PREFS)
+    # Return from get() at DOMContentLoaded; the wait engine polls for what each step needs
+    chrome_options.page_load_strategy = 'eager'
+    enable_network_log(chrome_options)
+
+
+def enable_network_log(chrome_options):
+    """Have Chrome keep Network.* events for driver.get_log('performance')"""
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+
+def enable_network_blocking(driver, patterns):
+    """Block URL patterns via CDP on the remote session; False where the Grid doesn't relay CDP"""
+    try:
+        driver.execute("executeCdpCommand", {'cmd': 'Network.enable', 'params': {}})
+        driver.execute("executeCdpCommand", {'cmd': 'Network.setBlockedURLs', 'params': {'urls': list(patterns)}})
+        logger.info(f"🪶 Blocking {len(patterns)} URL patterns via CDP")
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ CDP network blocking unavailable, using content settings instead: {e}")
+        return False
+
+
+def pattern_regex(patterns):
+    """One regex matching any Network.setBlockedURLs-style '*' pattern"""
+    return re.compile('|'.join('^' + '.*'.join(re.escape(part) for part in p.split('*')) + '$' for p in patterns))
+
+
+def resource_kind(cdp_type):
+    kind = (cdp_type or 'other').lower()
+    return kind if kind in DEFAULT_BYTES else 'other'
+
+
+class LeanSavings:
+    """Per-run tally of requests the lean profile blocked, read from Chrome's network log
+
+    Blocked requests never transfer anything, so their bytes are priced at the
+    typical size of the same resource type as measured in full-profile
+    sessions (after a fallback, or with LEAN_PROFILE off but the log on),
+    persisted in `sizes_path`.
+    """
+
+    def __init__(self, patterns, sizes_path=None):
+        self.blocked = pattern_regex(patterns)
+        self.sizes_path = Path(sizes_path) if sizes_path else None
+        self.lock = threading.Lock()
+        self.sizes = {}
+        if self.sizes_path and self.sizes_path.exists():
+            try:
+                self.sizes = json.loads(self.sizes_path.read_text())
+            except Exception as e:
+                logger.warning(f"⚠️ Lean size table unreadable, using defaults: {e}")
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counts = {}
+            self.bytes_saved = 0
+            self.bytes_transferred = 0
+            self.reads = 0
+
+    def typical_bytes(self, kind):
+        count, total = self.sizes.get(kind, (0, 0))
+        return total / count if count else DEFAULT_BYTES[kind]
+
+    def measure(self, driver, page):
+        """Drain the session's network log and tally blocked, transferred and learned bytes"""
+        try:
+            entries = driver.get_log('performance')
+        except Exception as e:
+            logger.debug(f"Network log unavailable on {page}: {e}")
+            return
+
+        requests = {}
+        blocked, transferred, learned = {}, 0, {}
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, TypeError, ValueError):
+                continue
+            params = message.get('params', {})
+            method = message.get('method')
+            if method == 'Network.requestWillBeSent':
+                requests[params.get('requestId')] = (params.get('request', {}).get('url', ''), params.get('type'))
+            elif method == 'Network.loadingFailed' and params.get('blockedReason') == 'inspector':
+                kind = resource_kind(params.get('type'))
+                blocked[kind] = blocked.get(kind, 0) + 1
+            elif method == 'Network.loadingFinished':
+                size = params.get('encodedDataLength', 0)
+                transferred += size
+                url, cdp_type = requests.get(params.get('requestId'), ('', None))
+                # A full-profile session loading something lean would block: learn its real size
+                if size and url and self.blocked.match(url):
+                    kind = resource_kind(cdp_type)
+                    count, total = learned.get(kind, (0, 0))
+                    learned[kind] = (count + 1, total + size)
+
+        with self.lock:
+            self.reads += 1
+            for kind, (count, total) in learned.items():
+                old_count, old_total = self.sizes.get(kind, (0, 0))
+                self.sizes[kind] = (old_count + count, old_total + total)
+            saved = round(sum(self.typical_bytes(kind) * count for kind, count in blocked.items()))
+            for kind, count in blocked.items():
+                self.counts[kind] = self.counts.get(kind, 0) + count
+                LEAN_REQUESTS_SAVED.inc(count, type=kind)
+            self.bytes_saved += saved
+            self.bytes_transferred += transferred
+        LEAN_BYTES_SAVED.inc(saved)
+
+    def save(self):
+        if not self.sizes_path:
+            return
+        with self.lock:
+            self.sizes_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.sizes_path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(self.sizes, indent=1))
+            tmp_path.replace(self.sizes_path)
+
+    def summary(self):
+        with self.lock:
+            return {'requests': sum(self.counts.values()), 'bytes': self.bytes_saved,
+                    'bytes_transferred': self.bytes_transferred, 'by_type': dict(self.counts),
+                    'log_reads': self.reads}
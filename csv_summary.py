@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Streaming validation and summary aggregates for downloaded analytics CSVs
+One pass per file: schema check, truncation/empty detection, date range and
+per-column count/sum/min/max over compact typed arrays
+"""
+
+import csv
+import json
+import math
+import logging
+from array import array
+from pathlib import Path
+
+from deltas import find_date_column, parse_date
+from manifest import describe_csv
+from metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+CSV_ROWS = Counter('railway_csv_rows_total', 'Data rows parsed from downloaded CSVs')
+CSV_FLAGGED = Counter('railway_csv_flagged_total', 'Downloaded CSVs flagged by validation', ['problem'])
+
+# Report type prefix -> column name hints an export of that type must contain (CSV_SCHEMAS overrides)
+REPORT_SCHEMAS = {
+    'retention': ('date', 'retention'),
+    'engagement': ('date',),
+    'monetization': ('date',),
+    'acquisition': ('date',),
+}
+
+VALIDATION_MODES = ('warn', 'strict')
+
+# Problems that mean the file can't be trusted; CSV_VALIDATION=strict holds these back from upload
+BLOCKING_PROBLEMS = ('empty', 'truncated', 'malformed', 'schema')
+
+
+def load_schemas(config):
+    """REPORT_SCHEMAS, extended/overridden by inline JSON {"report": ["hint", ...]}"""
+    schemas = dict(REPORT_SCHEMAS)
+    if config:
+        for report, hints in json.loads(config).items():
+            schemas[report.lower()] = tuple(hint.lower() for hint in hints)
+    return schemas
+
+
+def parse_number(value):
+    """Parse a metric cell ("1,234", "12.5%", "$3") to float, or None"""
+    text = value.strip().replace(',', '').rstrip('%').lstrip('$')
+    if not text:
+        return None
+    try:
+        number = float(text)
+    except ValueError:
+        return None
+    return number if math.isfinite(number) else None
+
+
+def missing_columns(header, hints):
+    """Schema hints that no header column contains"""
+    names = [name.strip().lower() for name in header]
+    return [hint for hint in hints if not any(hint in name for name in names)]
+
+
+class ColumnStats:
+    """Numeric values of one column in a float64 array, aggregated at the end"""
+
+    def __init__(self):
+        self.values = array('d')
+        self.missing = 0
+
+    def add(self, cell):
+        number = parse_number(cell)
+        if number is None:
+            self.missing += 1
+        else:
+            self.values.append(number)
+
+    def summary(self):
+        if not self.values:
+            return None
+        total = math.fsum(self.values)
+        return {
+            'count': len(self.values),
+            'sum': round(total, 4),
+            'min': min(self.values),
+            'max': max(self.values),
+            'mean': round(total / len(self.values), 4),
+            'missing': self.missing,
+        }
+
+
+def summarize_csv(path, schemas=REPORT_SCHEMAS):
+    """Validate one CSV and return its summary dict (problems listed under 'problems')"""
+    experience_id, report_type = describe_csv(path)
+    summary = {
+        'file': Path(path).name, 'experience': experience_id, 'report': report_type,
+        'rows': 0, 'columns': 0, 'date_from': None, 'date_to': None, 'metrics': {}, 'problems': [],
+    }
+    problems = summary['problems']
+
+    if Path(path).stat().st_size == 0:
+        problems.append('empty')
+        return summary
+
+    try:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            rows = (row for row in csv.reader(f, strict=True) if row)
+            header = next(rows, None)
+            if header is None:
+                problems.append('empty')
+                return summary
+            width = len(header)
+            summary['columns'] = width
+
+            hints = next((h for report, h in schemas.items() if report_type.startswith(report)), ())
+            missing = missing_columns(header, hints)
+            if missing:
+                problems.append('schema')
+                summary['missing_columns'] = missing
+
+            # The first well-formed row decides the date column and which columns are numeric
+            ragged = 0
+            first = next(rows, None)
+            while first is not None and len(first) != width:
+                ragged += 1
+                first = next(rows, None)
+            if first is None:
+                problems.append('truncated' if ragged else 'empty')
+                return summary
+            date_index = find_date_column(header, first)
+            columns = {index: ColumnStats() for index, cell in enumerate(first[:width])
+                       if index != date_index and parse_number(cell) is not None}
+            date_range = []
+
+            def take(row):
+                summary['rows'] += 1
+                for index, stats in columns.items():
+                    stats.add(row[index])
+                if date_index is not None:
+                    row_date = parse_date(row[date_index])
+                    if row_date:
+                        date_range[:] = ([min(date_range[0], row_date), max(date_range[1], row_date)]
+                                         if date_range else [row_date, row_date])
+
+            # One row of lookahead so a cut-off final row can be told apart from a ragged middle one
+            previous = first
+            for row in rows:
+                if len(previous) == width:
+                    take(previous)
+                else:
+                    ragged += 1
+                previous = row
+            if len(previous) < width:
+                problems.append('truncated')
+            elif len(previous) > width:
+                ragged += 1
+            else:
+                take(previous)
+    except csv.Error as e:
+        # An unterminated quote at the end means the download stopped mid-field
+        problems.append('truncated' if 'end of data' in str(e) else 'malformed')
+        summary['error'] = str(e)
+        return summary
+
+    if ragged:
+        problems.append('ragged')
+        summary['ragged_rows'] = ragged
+    if summary['rows'] == 0 and 'empty' not in problems:
+        problems.append('empty')
+
+    if date_range:
+        summary['date_from'], summary['date_to'] = (d.isoformat() for d in date_range)
+    for index, stats in columns.items():
+        column_summary = stats.summary()
+        if column_summary:
+            summary['metrics'][header[index].strip()] = column_summary
+    return summary
+
+
+class ExportValidator:
+    """Summarize every downloaded CSV before upload and decide which ones may go out"""
+
+    def __init__(self, mode='warn', schemas=REPORT_SCHEMAS):
+        if mode not in VALIDATION_MODES:
+            raise ValueError(f"Unknown CSV_VALIDATION mode '{mode}' (expected off, {' or '.join(VALIDATION_MODES)})")
+        self.mode = mode
+        self.schemas = schemas
+        self.summaries = []
+
+    def reset(self):
+        self.summaries = []
+
+    def validate(self, csv_files):
+        """Summarize files; return the ones to upload (all of them unless mode is strict)"""
+        accepted = []
+        for csv_file in csv_files:
+            try:
+                summary = summarize_csv(csv_file, self.schemas)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not summarize {Path(csv_file).name}: {e}")
+                accepted.append(csv_file)
+                continue
+            self.summaries.append(summary)
+            CSV_ROWS.inc(summary['rows'])
+
+            if summary['problems']:
+                for problem in summary['problems']:
+                    CSV_FLAGGED.inc(problem=problem)
+                logger.warning(f"🚩 {summary['file']}: {', '.join(summary['problems'])} "
+                               f"({summary['rows']} rows)")
+            else:
+                logger.info(f"🧾 {summary['file']}: {summary['rows']} rows, "
+                            f"{summary['date_from']} → {summary['date_to']}, {len(summary['metrics'])} metrics")
+
+            if self.mode == 'strict' and any(p in BLOCKING_PROBLEMS for p in summary['problems']):
+                logger.warning(f"⛔ Holding back {summary['file']} from upload")
+                continue
+            accepted.append(csv_file)
+        return accepted
+
+    def flagged(self):
+        return [s for s in self.summaries if s['problems']]
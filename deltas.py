@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Incremental row-level delta extraction for analytics CSVs
+Keeps a per-report date high-water mark and only passes on newer rows
+"""
+
+import csv
+import json
+import logging
+import threading
+from pathlib import Path
+from datetime import date, datetime, timedelta
+
+from manifest import describe_csv
+
+logger = logging.getLogger(__name__)
+
+DATE_COLUMN_HINTS = ('date', 'day', 'time', 'period')
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d', '%b %d, %Y')
+
+
+def parse_date(value):
+    """Parse the date part of a CSV cell, or return None"""
+    value = value.strip()
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def find_date_column(header, first_row=None):
+    """Return the index of the report's date column, or None"""
+    for index, name in enumerate(header):
+        if any(hint in name.lower() for hint in DATE_COLUMN_HINTS):
+            if first_row is None or index >= len(first_row) or parse_date(first_row[index]):
+                return index
+    return None
+
+
+def read_rows(path):
+    """Yield CSV rows one at a time"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        yield from csv.reader(f)
+
+
+def rows_since(rows, date_index, since, stats):
+    """Yield rows dated on or after `since`, tracking the newest date seen"""
+    for row in rows:
+        row_date = parse_date(row[date_index]) if date_index < len(row) else None
+        if row_date is None:
+            # Keep undated rows (totals, notes) rather than silently dropping data
+            stats['kept'] += 1
+            yield row
+            continue
+        if stats['max_date'] is None or row_date > stats['max_date']:
+            stats['max_date'] = row_date
+        if since is None or row_date >= since:
+            stats['kept'] += 1
+            yield row
+        else:
+            stats['dropped'] += 1
+
+
+class WatermarkStore:
+    """Persistent per-report date high-water marks"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        try:
+            self.marks = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            self.marks = {}
+        except Exception as e:
+            logger.warning(f"⚠️ Watermark file unreadable, starting fresh: {e}")
+            self.marks = {}
+
+    def get(self, report_key):
+        value = self.marks.get(report_key)
+        return date.fromisoformat(value) if value else None
+
+    def advance(self, report_key, new_mark):
+        """Move a watermark forward (never backwards) and persist it"""
+        with self.lock:
+            current = self.get(report_key)
+            if current is not None and new_mark <= current:
+                return
+            self.marks[report_key] = new_mark.isoformat()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(self.marks, indent=1))
+            tmp_path.replace(self.path)
+
+
+class DeltaExtractor:
+    """Streaming CSV stage that drops rows already covered by a report's watermark"""
+
+    def __init__(self, store, output_folder, overlap_days=3):
+        self.store = store
+        self.output_folder = Path(output_folder)
+        self.overlap = timedelta(days=overlap_days)
+        self.pending = {}  # delta file -> (report key, new watermark)
+
+    def extract(self, csv_file):
+        """Write the new rows of one CSV; return the file to upload, or None if nothing is new"""
+        experience_id, report_type = describe_csv(csv_file)
+        report_key = f"{experience_id}:{report_type}"
+
+        rows = read_rows(csv_file)
+        header = next(rows, None)
+        first_row = next(rows, None)
+        if header is None or first_row is None:
+            return csv_file
+
+        date_index = find_date_column(header, first_row)
+        if date_index is None:
+            logger.info(f"📄 No date column in {Path(csv_file).name}, sending whole file")
+            return csv_file
+
+        watermark = self.store.get(report_key)
+        since = watermark - self.overlap if watermark else None
+        stats = {'kept': 0, 'dropped': 0, 'max_date': None}
+
+        self.output_folder.mkdir(parents=True, exist_ok=True)
+        target = self.output_folder / Path(csv_file).name
+        with open(target, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows_since(self._chain(first_row, rows), date_index, since, stats))
+
+        logger.info(f"✂️ {Path(csv_file).name}: kept {stats['kept']} rows, dropped {stats['dropped']} "
+                    f"(watermark {watermark or 'none'}, overlap {self.overlap.days}d)")
+
+        if stats['max_date'] is not None:
+            self.pending[str(target)] = (report_key, stats['max_date'])
+
+        if stats['kept'] == 0:
+            target.unlink()
+            self.commit(str(target))
+            return None
+        return str(target)
+
+    @staticmethod
+    def _chain(first_row, rows):
+        yield first_row
+        yield from rows
+
+    def commit(self, delta_file):
+        """Advance the watermark once a delta file has reached the server"""
+        pending = self.pending.pop(str(delta_file), None)
+        if pending:
+            self.store.advance(*pending)
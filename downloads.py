@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Download tracking for Railway CSV automation
+Detects finished browser downloads locally or on a remote Grid node
+instead of sleeping for a fixed time
+"""
+
+import re
+import time
+import base64
+import shutil
+import logging
+import zipfile
+import tempfile
+from pathlib import Path
+
+import requests
+
+from metrics import timed_sleep
+
+logger = logging.getLogger(__name__)
+
+# Suffixes Chrome/Firefox use while a download is still being written
+PARTIAL_SUFFIXES = ('.crdownload', '.part', '.tmp')
+
+# Marker preceding the base64 payload in a Grid "download file" JSON response
+CONTENTS_MARKER = re.compile(rb'"contents"\s*:\s*"')
+
+
+class DownloadWatcher:
+    """Track a download folder and yield each file once its size stops changing"""
+
+    def __init__(self, folder, pattern="*.csv", stable_seconds=1.0, poll_interval=0.25, idle_timeout=10):
+        self.folder = Path(folder)
+        self.pattern = pattern
+        self.stable_seconds = stable_seconds
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.seen = set()
+        self.snapshot()
+
+    def snapshot(self):
+        """Remember files already present so only new downloads are reported"""
+        self.seen = {p.name for p in self.folder.glob(self.pattern)}
+
+    def _partial_files(self):
+        """Return in-progress download files in the folder"""
+        return [p for p in self.folder.iterdir() if p.suffix in PARTIAL_SUFFIXES]
+
+    def wait_for_files(self, expected=None, timeout=120):
+        """Yield finished downloads as soon as each one completes
+
+        Stops once `expected` files have finished or after `timeout`. Without an
+        expected count it also stops when nothing is in progress and no new file
+        appeared for `idle_timeout` seconds; a slow export that was asked for is
+        waited for until the timeout.
+        """
+        deadline = time.monotonic() + timeout
+        last_activity = time.monotonic()
+        pending = {}  # name -> (size, time size was first seen)
+        completed = 0
+
+        while time.monotonic() < deadline:
+            now = time.monotonic()
+            partials = self._partial_files()
+            if partials:
+                last_activity = now
+
+            for path in self.folder.glob(self.pattern):
+                if path.name in self.seen:
+                    continue
+
+                try:
+                    size = path.stat().st_size
+                except FileNotFoundError:
+                    continue  # Renamed between glob and stat
+
+                previous = pending.get(path.name)
+                if previous is None or previous[0] != size:
+                    pending[path.name] = (size, now)
+                    last_activity = now
+                    continue
+
+                in_progress = any(p.name.startswith(path.name) for p in partials)
+                if not in_progress and now - previous[1] >= self.stable_seconds:
+                    del pending[path.name]
+                    self.seen.add(path.name)
+                    completed += 1
+                    last_activity = now
+                    logger.info(f"📄 Download finished: {path.name} ({size} bytes)")
+                    yield path
+
+            if expected is not None and completed >= expected:
+                return
+
+            if expected is None and not partials and not pending and now - last_activity >= self.idle_timeout:
+                logger.info(f"⏹️ No download activity for {self.idle_timeout}s, stopping watcher")
+                return
+
+            timed_sleep(self.poll_interval, 'download_poll')
+
+        still_running = [p.name for p in self._partial_files()] + list(pending)
+        logger.warning(f"⏰ Download watcher timed out after {timeout}s "
+                       f"({completed} finished, still pending: {still_running or 'none'})")
+
+
+class GridDownloadFetcher:
+    """Retrieve files from a Selenium Grid node via managed downloads (se:downloadsEnabled)
+
+    Files are streamed from the node into the local download folder in chunks,
+    so a large export is never held in memory as a whole.
+    """
+
+    def __init__(self, selenium_url, session_id, download_folder, chunk_size=64 * 1024,
+                 poll_interval=0.5, idle_timeout=10):
+        self.files_url = f"{selenium_url.rstrip('/')}/session/{session_id}/se/files"
+        self.download_folder = Path(download_folder)
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.http = requests.Session()
+        self.seen = set()
+
+    def list_files(self):
+        """Return the names of all files the session has downloaded on the node"""
+        response = self.http.get(self.files_url, timeout=30)
+        response.raise_for_status()
+        return response.json()['value']['names']
+
+    def snapshot(self):
+        """Remember files already on the node so only new downloads are reported"""
+        self.seen = set(self.list_files())
+
+    def fetch(self, name):
+        """Stream one file from the node into the local download folder"""
+        target = self.download_folder / name
+        self.download_folder.mkdir(parents=True, exist_ok=True)
+
+        with self.http.post(self.files_url, json={'name': name}, stream=True, timeout=120) as response:
+            response.raise_for_status()
+            content_type = response.headers.get('Content-Type', '')
+
+            with tempfile.NamedTemporaryFile(dir=self.download_folder, suffix='.part', delete=False) as tmp:
+                tmp_path = Path(tmp.name)
+                try:
+                    if content_type.startswith('application/json'):
+                        self._decode_json_stream(response, tmp)
+                    else:
+                        # Newer Grid versions can return the raw file body
+                        for chunk in response.iter_content(self.chunk_size):
+                            tmp.write(chunk)
+                except Exception:
+                    tmp.close()
+                    tmp_path.unlink(missing_ok=True)
+                    raise
+
+        try:
+            if zipfile.is_zipfile(tmp_path):
+                # Grid wraps the file in a zip archive
+                with zipfile.ZipFile(tmp_path) as archive:
+                    member = archive.namelist()[0]
+                    with archive.open(member) as src, open(target, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, self.chunk_size)
+            else:
+                tmp_path.replace(target)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        logger.info(f"📥 Fetched from Grid node: {name} ({target.stat().st_size} bytes)")
+        return target
+
+    def _decode_json_stream(self, response, out):
+        """Incrementally base64-decode the "contents" field of a Grid JSON response"""
+        buffer = b''
+        in_contents = False
+        remainder = b''
+
+        for chunk in response.iter_content(self.chunk_size):
+            if not in_contents:
+                buffer += chunk
+                match = CONTENTS_MARKER.search(buffer)
+                if not match:
+                    continue
+                in_contents = True
+                chunk = buffer[match.end():]
+                buffer = b''
+
+            end = chunk.find(b'"')
+            data = remainder + (chunk if end == -1 else chunk[:end]).replace(b'\\', b'')
+            usable = len(data) - len(data) % 4
+            out.write(base64.b64decode(data[:usable]))
+            remainder = data[usable:]
+
+            if end != -1:
+                if remainder:
+                    out.write(base64.b64decode(remainder))
+                return
+
+        if not in_contents:
+            raise ValueError("Grid response did not contain file contents")
+        raise ValueError("Grid response ended before file contents were complete")
+
+    def wait_for_files(self, expected=None, timeout=120):
+        """Yield local copies of node downloads as soon as each one completes
+
+        Mirrors DownloadWatcher.wait_for_files: a file is done once it is listed
+        without a partial suffix on two consecutive polls.
+        """
+        deadline = time.monotonic() + timeout
+        last_activity = time.monotonic()
+        candidates = set()
+        completed = 0
+
+        while time.monotonic() < deadline:
+            now = time.monotonic()
+            try:
+                names = self.list_files()
+            except Exception as e:
+                logger.warning(f"⚠️ Could not list Grid downloads: {e}")
+                names = []
+
+            partials = [n for n in names if n.endswith(PARTIAL_SUFFIXES)]
+            if partials:
+                last_activity = now
+
+            for name in names:
+                if name in self.seen or name in partials:
+                    continue
+                in_progress = any(p.startswith(name) for p in partials)
+                if name not in candidates or in_progress:
+                    candidates.add(name)
+                    last_activity = now
+                    continue
+
+                candidates.discard(name)
+                self.seen.add(name)
+                try:
+                    path = self.fetch(name)
+                except Exception as e:
+                    logger.warning(f"⚠️ Failed to fetch {name} from Grid node: {e}")
+                    continue
+                completed += 1
+                last_activity = time.monotonic()
+                yield path
+
+            if expected is not None and completed >= expected:
+                return
+
+            if (expected is None and not partials and not candidates
+                    and now - last_activity >= self.idle_timeout):
+                logger.info(f"⏹️ No download activity on Grid node for {self.idle_timeout}s, stopping")
+                return
+
+            timed_sleep(self.poll_interval, 'download_poll')
+
+        logger.warning(f"⏰ Grid download wait timed out after {timeout}s ({completed} fetched)")
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Local columnar history of exported analytics for Railway CSV automation
+Every export is folded into one float64 file per (experience, report, metric),
+indexed by day and read through mmap, so trend queries never touch the server
+"""
+
+import re
+import json
+import math
+import mmap
+import struct
+import logging
+import threading
+from array import array
+from pathlib import Path
+from datetime import date
+from urllib.parse import urlparse, parse_qs
+
+from csv_summary import parse_number
+from deltas import read_rows, find_date_column, parse_date
+from manifest import describe_csv
+from metrics import Counter, add_route
+
+logger = logging.getLogger(__name__)
+
+HISTORY_ROWS = Counter('railway_history_rows_ingested_total', 'Dated CSV rows written to the local history store')
+
+CELL = 8  # one float64 per day
+NAN_CELL = struct.pack('d', math.nan)
+
+
+def _slug(text):
+    return re.sub(r'[^\w.-]', '_', text.strip().lower())[:80] or '_'
+
+
+class HistoryStore:
+    """Day-indexed float64 columns on disk, one file per metric of each (experience, report)
+
+    Position i of a column holds the value for day `start + i` (proleptic ordinal);
+    days without data are NaN. Re-ingesting a day overwrites it, so the store is
+    deduplicated by (experience, report, date) by construction.
+    """
+
+    def __init__(self, folder):
+        self.folder = Path(folder)
+        self.index_path = self.folder / 'index.json'
+        self.lock = threading.RLock()
+        self.maps = {}
+        self.folder.mkdir(parents=True, exist_ok=True)
+        try:
+            self.index = json.loads(self.index_path.read_text())
+        except FileNotFoundError:
+            self.index = {'series': {}}
+        except Exception as e:
+            logger.warning(f"⚠️ History index unreadable, starting fresh: {e}")
+            self.index = {'series': {}}
+
+    @staticmethod
+    def _key(experience, report):
+        return f"{experience}|{report}"
+
+    def _save_index(self):
+        tmp_path = self.index_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self.index, indent=1))
+        tmp_path.replace(self.index_path)
+
+    def _path(self, series, metric):
+        return self.folder / series['dir'] / series['metrics'][metric]
+
+    def _release(self, path):
+        cached = self.maps.pop(str(path), None)
+        if cached:
+            cached.close()
+
+    def _map(self, path):
+        """Read-only mmap of a column, cached until the column is next written"""
+        cached = self.maps.get(str(path))
+        if cached is None:
+            with open(path, 'rb') as f:
+                cached = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.maps[str(path)] = cached
+        return cached
+
+    # -- ingest --------------------------------------------------------------
+
+    def ingest(self, csv_file):
+        """Fold one export into the store; return the number of dated rows written"""
+        experience_id, report_type = describe_csv(csv_file)
+        rows = read_rows(csv_file)
+        header = next(rows, None)
+        first_row = next(rows, None)
+        if header is None or first_row is None:
+            return 0
+        date_index = find_date_column(header, first_row)
+        if date_index is None:
+            logger.debug(f"No date column in {Path(csv_file).name}, not kept in history")
+            return 0
+
+        names = [name.strip() or f"column_{i}" for i, name in enumerate(header)]
+        days = {}
+        for row in self._chain(first_row, rows):
+            row_date = parse_date(row[date_index]) if date_index < len(row) else None
+            if row_date is None:
+                continue
+            # Breakdown rows repeating a date: the last one wins, like a re-export would
+            values = days.setdefault(row_date.toordinal(), {})
+            for index, cell in enumerate(row[:len(names)]):
+                if index != date_index:
+                    number = parse_number(cell)
+                    if number is not None:
+                        values[names[index]] = number
+
+        days = {day: values for day, values in days.items() if values}
+        if not days:
+            return 0
+        with self.lock:
+            self._write(experience_id, report_type, days)
+        HISTORY_ROWS.inc(len(days))
+        return len(days)
+
+    @staticmethod
+    def _chain(first_row, rows):
+        yield first_row
+        yield from rows
+
+    def _write(self, experience, report, days):
+        key = self._key(experience, report)
+        first_day, last_day = min(days), max(days)
+        series = self.index['series'].get(key)
+        if series is None:
+            series = {'experience': experience, 'report': report, 'dir': _slug(key),
+                      'start': first_day, 'days': 0, 'metrics': {}}
+            self.index['series'][key] = series
+            (self.folder / series['dir']).mkdir(parents=True, exist_ok=True)
+
+        # Earlier days than the column starts with: shift every column right (rare, backfills only)
+        if first_day < series['start']:
+            shift = series['start'] - first_day
+            for metric in series['metrics']:
+                path = self._path(series, metric)
+                self._release(path)
+                path.write_bytes(NAN_CELL * shift + path.read_bytes())
+            series['start'] = first_day
+            series['days'] += shift
+
+        for metric in {m for values in days.values() for m in values}:
+            if metric not in series['metrics']:
+                taken = set(series['metrics'].values())
+                filename = f"{_slug(metric)}.f64"
+                while filename in taken:
+                    filename = f"_{filename}"
+                series['metrics'][metric] = filename
+                self._path(series, metric).write_bytes(NAN_CELL * series['days'])
+
+        length = max(series['days'], last_day - series['start'] + 1)
+        for metric in series['metrics']:
+            path = self._path(series, metric)
+            self._release(path)
+            with open(path, 'r+b') as f:
+                size = f.seek(0, 2)
+                if size < length * CELL:
+                    f.write(NAN_CELL * (length - size // CELL))
+                    f.flush()
+                with mmap.mmap(f.fileno(), 0) as column:
+                    for day, values in days.items():
+                        if metric in values:
+                            struct.pack_into('d', column, (day - series['start']) * CELL, values[metric])
+                    column.flush()
+        series['days'] = length
+        self._save_index()
+
+    # -- queries -------------------------------------------------------------
+
+    def _values(self, series, metric, start=None, end=None):
+        """(first day ordinal, array of values) for a column clipped to [start, end]"""
+        lo = max(0, start.toordinal() - series['start']) if start else 0
+        hi = min(series['days'], end.toordinal() - series['start'] + 1) if end else series['days']
+        values = array('d')
+        if hi > lo:
+            values.frombytes(self._map(self._path(series, metric))[lo * CELL:hi * CELL])
+        return series['start'] + lo, values
+
+    def _find_metric(self, series, metric):
+        wanted = metric.strip().lower()
+        return next((name for name in series['metrics'] if name.lower() == wanted), None)
+
+    def _matching(self, report, experiences=None):
+        for series in self.index['series'].values():
+            if series['report'] == report.lower() and (not experiences or series['experience'] in experiences):
+                yield series
+
+    def catalog(self):
+        """Stored series with their date coverage and metric names"""
+        with self.lock:
+            return [{'experience': s['experience'], 'report': s['report'],
+                     'from': date.fromordinal(s['start']).isoformat() if s['days'] else None,
+                     'to': date.fromordinal(s['start'] + s['days'] - 1).isoformat() if s['days'] else None,
+                     'metrics': sorted(s['metrics'])}
+                    for s in self.index['series'].values()]
+
+    def series(self, experience, report, metric, start=None, end=None):
+        """[(date, value)] for the days in [start, end] that have a value"""
+        with self.lock:
+            series = self.index['series'].get(self._key(experience, report.lower()))
+            name = series and self._find_metric(series, metric)
+            if not name:
+                return []
+            first_day, values = self._values(series, name, start, end)
+        return [(date.fromordinal(first_day + i), value) for i, value in enumerate(values) if value == value]
+
+    def aggregate(self, report, metric, start=None, end=None, experiences=None):
+        """{experience: count/sum/min/max/mean/first/last} of one metric over [start, end]"""
+        results = {}
+        with self.lock:
+            for series in self._matching(report, experiences):
+                name = self._find_metric(series, metric)
+                if not name:
+                    continue
+                first_day, values = self._values(series, name, start, end)
+                present = [(i, value) for i, value in enumerate(values) if value == value]
+                if not present:
+                    continue
+                numbers = [value for _, value in present]
+                total = math.fsum(numbers)
+                results[series['experience']] = {
+                    'count': len(numbers),
+                    'sum': round(total, 4),
+                    'min': min(numbers),
+                    'max': max(numbers),
+                    'mean': round(total / len(numbers), 4),
+                    'first': date.fromordinal(first_day + present[0][0]).isoformat(),
+                    'last': date.fromordinal(first_day + present[-1][0]).isoformat(),
+                }
+        return results
+
+    def close(self):
+        with self.lock:
+            for path in list(self.maps):
+                self._release(path)
+
+    # -- HTTP ----------------------------------------------------------------
+
+    def _history_route(self, handler):
+        query = {key: values[-1] for key, values in parse_qs(urlparse(handler.path).query).items()}
+        if 'report' not in query or 'metric' not in query:
+            return 200, 'application/json', json.dumps({'series': self.catalog()})
+        try:
+            start = date.fromisoformat(query['from']) if 'from' in query else None
+            end = date.fromisoformat(query['to']) if 'to' in query else None
+        except ValueError as e:
+            return 400, 'application/json', json.dumps({'error': str(e)})
+        if 'experience' in query:
+            points = self.series(query['experience'], query['report'], query['metric'], start, end)
+            body = {'points': [[day.isoformat(), value] for day, value in points]}
+        else:
+            body = {'experiences': self.aggregate(query['report'], query['metric'], start, end)}
+        return 200, 'application/json', json.dumps(body)
+
+    def register_routes(self):
+        """Expose GET /history (catalog, per-experience aggregates, or one experience's points)"""
+        add_route('GET', '/history', self._history_route)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Browserless CSV export engine for Railway CSV automation
+Calls the analytics export endpoints directly with the browser's cookies
+"""
+
+import re
+import json
+import logging
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from metrics import time_stage
+from rate_limit import RateLimitedAdapter
+
+logger = logging.getLogger(__name__)
+
+FILENAME_PATTERN = re.compile(r'filename\*?=(?:UTF-8\'\')?"?([^";]+)"?', re.IGNORECASE)
+
+
+def load_endpoints(config):
+    """Parse export endpoints from inline JSON or a path to a JSON file
+
+    Each endpoint is {"name": ..., "url": ..., "method": "GET", "params": {}, "json": {}}.
+    """
+    if not config:
+        return []
+    if not config.lstrip().startswith('['):
+        config = Path(config).read_text()
+    return json.loads(config)
+
+
+class HttpExportEngine:
+    """Fire analytics exports over a pooled requests.Session and stream results to disk"""
+
+    def __init__(self, endpoints, download_folder, max_workers=4, chunk_size=64 * 1024):
+        self.endpoints = endpoints
+        self.download_folder = Path(download_folder)
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.csrf_token = None
+        self.claimed = set()
+        self.claim_lock = threading.Lock()
+
+        self.http = requests.Session()
+        adapter = RateLimitedAdapter('export', pool_connections=max_workers, pool_maxsize=max_workers)
+        self.http.mount('https://', adapter)
+        self.http.mount('http://', adapter)
+
+    def load_cookies_from_driver(self, driver):
+        """Copy the authenticated WebDriver cookies and user agent into the session"""
+        for cookie in driver.get_cookies():
+            self.http.cookies.set(cookie['name'], cookie['value'],
+                                  domain=cookie.get('domain'), path=cookie.get('path', '/'))
+        self.http.headers['User-Agent'] = driver.execute_script("return navigator.userAgent;")
+        logger.info(f"🍪 Loaded {len(self.http.cookies)} cookies into export session")
+
+    def _request(self, endpoint):
+        """Send one export request, retrying once with Roblox's CSRF token if asked"""
+        method = endpoint.get('method', 'GET').upper()
+        kwargs = {
+            'params': endpoint.get('params'),
+            'json': endpoint.get('json'),
+            'stream': True,
+            'timeout': 120,
+        }
+
+        for _ in range(2):
+            sent_token = self.csrf_token
+            headers = {'X-CSRF-TOKEN': sent_token} if sent_token else {}
+            response = self.http.request(method, endpoint['url'], headers=headers, **kwargs)
+            token = response.headers.get('x-csrf-token')
+            if response.status_code == 403 and token and token != sent_token:
+                response.close()
+                self.csrf_token = token
+                continue
+            return response
+        return response
+
+    def export(self, endpoint):
+        """Run one export and stream the response body into the download folder"""
+        with time_stage('export'), self._request(endpoint) as response:
+            response.raise_for_status()
+
+            match = FILENAME_PATTERN.search(response.headers.get('Content-Disposition', ''))
+            filename = Path(match.group(1)).name if match else f"{endpoint['name']}.csv"
+            with self.claim_lock:
+                # Two endpoints may suggest the same name; the later one gets its endpoint name prefixed
+                if filename in self.claimed:
+                    filename = f"{endpoint['name']}_{filename}"
+                self.claimed.add(filename)
+            target = self.download_folder / filename
+            tmp_path = target.with_suffix(target.suffix + '.part')
+
+            size = 0
+            try:
+                with open(tmp_path, 'wb') as f:
+                    for chunk in response.iter_content(self.chunk_size):
+                        f.write(chunk)
+                        size += len(chunk)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
+
+        tmp_path.replace(target)
+        logger.info(f"✅ HTTP export {endpoint['name']}: {filename} ({size} bytes)")
+        return target
+
+    def export_all(self, on_file=None):
+        """Run all exports in parallel; return paths of the files that succeeded"""
+        logger.info(f"⚡ Running {len(self.endpoints)} HTTP exports ({self.max_workers} workers)...")
+        self.download_folder.mkdir(parents=True, exist_ok=True)
+        self.claimed = set()
+
+        files = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.export, endpoint): endpoint for endpoint in self.endpoints}
+            for future in as_completed(futures):
+                try:
+                    files.append(future.result())
+                except Exception as e:
+                    logger.warning(f"⚠️ HTTP export {futures[future]['name']} failed: {e}")
+                    continue
+                if on_file:
+                    try:
+                        on_file(str(files[-1]))
+                    except Exception:
+                        # The consumer stopped (e.g. the pipeline was cancelled): don't start the rest
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        raise
+        return files
@@ -6,12 +6,9 @@ Complete solution with proper error handling and debugging
 
 import os
 import time
-import random
-import schedule
+import asyncio
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, WebDriverException
 from datetime import datetime
@@ -19,7 +16,33 @@ import logging
 import requests
 import glob
 import json
+import shutil
 from pathlib import Path
+from urllib.parse import urlparse
+from downloads import DownloadWatcher, GridDownloadFetcher
+from session_cache import SessionCache, derive_key, USERS_API_URL
+from http_export import HttpExportEngine, load_endpoints
+from multi_export import MultiExperienceExporter, list_experiences
+from uploads import SparkedUploader, ChunkedUploader
+from manifest import UploadManifest
+from deltas import DeltaExtractor, WatermarkStore
+from csv_summary import ExportValidator, load_schemas
+from history_store import HistoryStore
+from pipeline import PipelinedRun, PipelineCancelled
+from outbox import UploadOutbox
+from profiler import CommandProfiler
+from browser_profile import (LEAN_BLOCKED_URLS, LEAN_FALLBACKS, LeanSavings, apply_lean_options,
+                             enable_network_blocking, enable_network_log)
+from waits import WaitEngine, WaitStats, WAIT_PROFILES
+from selector_cache import SelectorCache
+from session_pool import WarmSessionPool
+from scheduler import Scheduler, parse_run_times
+from accounts import AccountFanOut
+from rate_limit import limiter
+from preflight import run_preflight, grid_queue_signal, backoff_delay, HEALTHCHECK_PAGE, HEALTHCHECK_TITLE
+from navigation_cache import NavigationCache, deep_link_landed
+from metrics import (STAGE_SECONDS, BYTES_DOWNLOADED, BYTES_UPLOADED, RETRIES,
+                     time_stage, timed_sleep, record_run, start_metrics_server)
 
 # Configure comprehensive logging
 logging.basicConfig(
@@ -43,16 +66,135 @@ class RailwayCSVDownloader:
         # FIXED: Use HTTP for Selenium hub (not HTTPS)
         self.selenium_url = os.getenv('SELENIUM_REMOTE_URL', 'http://localhost:4444/wd/hub')
         
+        # Site URLs (overridable to point at the offline benchmark site)
+        self.roblox_url = os.getenv('ROBLOX_BASE_URL', 'https://www.roblox.com').rstrip('/')
+        self.create_url = os.getenv('ROBLOX_CREATE_URL', 'https://create.roblox.com').rstrip('/')
+        # Checked from this process (not the browser) to validate a cached login
+        self.users_url = os.getenv('ROBLOX_USERS_URL', USERS_API_URL).rstrip('/')
+        
         # FIXED: Railway-compatible paths
-        self.download_folder = '/tmp/downloads'
+        self.download_folder = os.getenv('DOWNLOAD_FOLDER', '/tmp/downloads')
+        self.download_timeout = int(os.getenv('DOWNLOAD_TIMEOUT', '120'))
+        # Files land on the remote node's disk; fetch them via Grid managed downloads
+        self.managed_downloads = os.getenv('SELENIUM_MANAGED_DOWNLOADS', 'false').lower() == 'true'
         self.driver = None
+        self.last_export_report = None
+        self.last_preflight = None
+        
+        # Optional browserless export engine (Selenium click path stays as fallback)
+        self.http_export_endpoints = load_endpoints(os.getenv('HTTP_EXPORT_ENDPOINTS'))
+        self.http_export_workers = int(os.getenv('HTTP_EXPORT_WORKERS', '4'))
+        
+        # Export every owned experience across a pool of browser sessions
+        self.multi_experience = os.getenv('MULTI_EXPERIENCE', 'false').lower() == 'true'
+        self.export_sessions = int(os.getenv('EXPORT_SESSIONS', '2'))
+        self.max_exports_per_experience = int(os.getenv('MAX_EXPORTS_PER_EXPERIENCE', '3'))
+        # Optional comma-separated experience ids limiting which experiences are exported
+        self.target_experiences = {e.strip() for e in os.getenv('TARGET_EXPERIENCES', '').split(',') if e.strip()}
+        
+        # Shared keep-alive uploader with a bounded worker pool
+        self.uploader = self._create_uploader()
+        self.last_upload_results = []
+        
+        # Overlap uploads with the remaining exports instead of running them after
+        self.pipelined = os.getenv('PIPELINE', 'false').lower() == 'true'
+        self.export_cancelled = None  # set by PipelinedRun once its upload stage fails
+        
+        # Account fan-out turns per-account notifications off and sends one aggregate instead
+        self.send_notifications = os.getenv('SEND_NOTIFICATIONS', 'true').lower() == 'true'
+        self.last_run_summary = None
+        
+        # Persistent state (mount a Railway volume here to keep it across deploys)
+        self.state_dir = os.getenv('STATE_DIR', '/tmp/state')
+        
+        # Condition-based waits; WAIT_PROFILE picks the timeouts (fast/normal/cautious)
+        self.wait_profile = os.getenv('WAIT_PROFILE', 'normal')
+        if self.wait_profile not in WAIT_PROFILES:
+            raise ValueError(f"❌ Unknown WAIT_PROFILE '{self.wait_profile}', expected one of {sorted(WAIT_PROFILES)}")
+        self.wait_stats = WaitStats(Path(self.state_dir) / 'wait_stats.json')
+        self.selector_cache = SelectorCache(Path(self.state_dir) / 'selector_cache.json')
+        self.waits = None
         
-        # Create download folder
+        # Go straight to each experience's last resolved Analytics URL when it still works
+        self.navigation_cache = None
+        if os.getenv('NAVIGATION_CACHE', 'true').lower() == 'true':
+            self.navigation_cache = NavigationCache(Path(self.state_dir) / 'navigation_cache.json')
+        
+        # Create download and state folders
         Path(self.download_folder).mkdir(parents=True, exist_ok=True)
+        Path(self.state_dir).mkdir(parents=True, exist_ok=True)
         
         # Validate environment
         self._validate_environment()
         
+        self.session_cache = self._create_session_cache()
+        
+        # Optional warm standby session opened shortly before each scheduled run
+        self.session_pool = None
+        self.session_pool_prelogin = os.getenv('SESSION_POOL_PRELOGIN', 'false').lower() == 'true'
+        self.standby_logged_in = False
+        if os.getenv('SESSION_POOL', 'false').lower() == 'true':
+            # Standby sessions are opened unprofiled; the run that takes one attaches its own profiler
+            self.session_pool = WarmSessionPool(
+                lambda: self.create_browser_session(profiled=False),
+                prepare=self.prepare_standby_session,
+                lead_minutes=float(os.getenv('SESSION_POOL_LEAD_MINUTES', '5')),
+                max_idle_minutes=float(os.getenv('SESSION_POOL_MAX_IDLE_MINUTES', '15')),
+                ping_seconds=float(os.getenv('SESSION_POOL_PING_SECONDS', '60'))
+            )
+        
+        # Skip re-uploading CSVs whose content was already sent
+        self.manifest = None
+        if os.getenv('UPLOAD_MANIFEST', 'true').lower() == 'true':
+            self.manifest = UploadManifest(
+                Path(self.state_dir) / 'upload_manifest.json',
+                retention_days=int(os.getenv('MANIFEST_RETENTION_DAYS', '30'))
+            )
+        
+        # Only send rows newer than each report's stored date watermark
+        self.delta_extractor = None
+        if os.getenv('DELTA_UPLOADS', 'false').lower() == 'true':
+            self.delta_extractor = DeltaExtractor(
+                WatermarkStore(Path(self.state_dir) / 'watermarks.json'),
+                Path(self.download_folder) / 'delta',
+                overlap_days=int(os.getenv('DELTA_OVERLAP_DAYS', '3'))
+            )
+        
+        # Check each CSV against its report schema and summarize it before upload
+        # (CSV_VALIDATION=warn flags problems, strict also holds back empty/truncated files, off skips it)
+        self.validator = None
+        validation_mode = os.getenv('CSV_VALIDATION', 'warn').strip().lower()
+        if validation_mode != 'off':
+            self.validator = ExportValidator(validation_mode, load_schemas(os.getenv('CSV_SCHEMAS')))
+        
+        # Keep every export's daily values locally for trend queries (GET /history)
+        self.history = None
+        if os.getenv('HISTORY_STORE', 'true').lower() == 'true':
+            self.history = HistoryStore(Path(self.state_dir) / 'history')
+        
+        # Opt-in per-run WebDriver command/sleep trace (STATE_DIR/profiles, open in Perfetto)
+        self.profile_commands = os.getenv('WEBDRIVER_PROFILE', 'false').lower() == 'true'
+        self.profiler = None
+        
+        # Lean browser profile: no images, fonts, media or trackers, eager loads, smaller viewport
+        # (the full profile stays the default and the fallback for pages that break without them)
+        self.lean_profile = os.getenv('LEAN_PROFILE', 'false').lower() == 'true'
+        self.lean_blocked_urls = LEAN_BLOCKED_URLS + [p.strip() for p in os.getenv('LEAN_BLOCK_URLS', '').split(',') if p.strip()]
+        self.lean_savings = None
+        if self.lean_profile:
+            self.lean_savings = LeanSavings(self.lean_blocked_urls, Path(self.state_dir) / 'lean_sizes.json')
+        self.lean_active = self.lean_profile  # cleared for the rest of a run once lean exports fail
+        self.lean_cdp = None  # whether the Grid relays CDP, learned from the first lean session
+        
+        # Failed uploads are spooled on the state volume and retried by later runs
+        self.outbox = None
+        if os.getenv('UPLOAD_OUTBOX', 'true').lower() == 'true':
+            self.outbox = UploadOutbox(
+                Path(self.state_dir) / 'outbox.sqlite3',
+                Path(self.state_dir) / 'outbox',
+                max_attempts=int(os.getenv('OUTBOX_MAX_ATTEMPTS', '10'))
+            )
+        
         logger.info("🚂 Railway CSV downloader initialized")
         logger.info(f"📁 Download folder: {self.download_folder}")
         logger.info(f"🔗 API URL: {self.api_url}")
@@ -72,93 +214,179 @@ class RailwayCSVDownloader:
         
         logger.info("✅ Environment validation passed")
     
+    def _create_session_cache(self):
+        """Create the encrypted login cache unless disabled with SESSION_CACHE=false"""
+        if os.getenv('SESSION_CACHE', 'true').lower() != 'true':
+            logger.info("🚫 Session cache disabled")
+            return None
+        
+        key = os.getenv('SESSION_CACHE_KEY')
+        if not key:
+            key = derive_key(self.alt_password, self.alt_username)
+        
+        return SessionCache(
+            Path(self.state_dir) / f"session_{self.alt_username}.bin",
+            key,
+            max_age_hours=float(os.getenv('SESSION_CACHE_TTL_HOURS', '24')),
+            users_url=self.users_url
+        )
+    
+    def _create_uploader(self):
+        """Create the single-shot or gzip chunked uploader (UPLOAD_MODE)"""
+        upload_workers = int(os.getenv('UPLOAD_WORKERS', '3'))
+        
+        if os.getenv('UPLOAD_MODE', 'multipart').lower() == 'chunked':
+            chunk_size = int(os.getenv('UPLOAD_CHUNK_SIZE', str(1024 * 1024)))
+            logger.info(f"🗜️ Using gzip chunked uploads ({chunk_size} byte chunks)")
+            return ChunkedUploader(self.api_url, chunk_size=chunk_size, max_workers=upload_workers)
+        
+        return SparkedUploader(self.api_url, max_workers=upload_workers)
+    
+    def create_browser_session(self, profiled=True):
+        """Open a remote Chrome session with download prefs set and verify it with a local page"""
+        # FIXED: Optimized Chrome options for Railway
+        chrome_options = Options()
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--headless")  # Essential for Railway
+        chrome_options.add_argument("--disable-web-security")
+        chrome_options.add_argument("--disable-features=VizDisplayCompositor")
+        
+        # FIXED: Download preferences for remote browser
+        prefs = {
+            "download.prompt_for_download": False,
+            "download.directory_upgrade": True,
+            "safebrowsing.enabled": True
+        }
+        content_blocking = False
+        if self.lean_active:
+            content_blocking = self.lean_cdp is False
+            apply_lean_options(chrome_options, prefs, content_blocking)
+        else:
+            chrome_options.add_argument("--window-size=1920,1080")
+            if self.lean_savings:
+                # Full-profile fallback sessions measure the real size of what lean blocks
+                enable_network_log(chrome_options)
+        if self.managed_downloads:
+            # Grid picks the node-side download directory itself
+            chrome_options.enable_downloads = True
+        else:
+            prefs["download.default_directory"] = self.download_folder
+        chrome_options.add_experimental_option("prefs", prefs)
+        
+        session_started = time.perf_counter()
+        driver = webdriver.Remote(
+            command_executor=self.selenium_url,
+            options=chrome_options
+        )
+        profiler = self.profiler if profiled else None
+        if profiler:
+            profiler.record_span('newSession', 'webdriver', session_started)
+            profiler.wrap_driver(driver)
+        
+        try:
+            driver.set_page_load_timeout(WAIT_PROFILES[self.wait_profile]['page'])
+            # No implicit wait: a missing selector should cost nothing, explicit waits poll instead
+            driver.implicitly_wait(0)
+            if self.lean_active and not content_blocking:
+                self.lean_cdp = enable_network_blocking(driver, self.lean_blocked_urls)
+            
+            # Verify the session with a local page round trip (no external site)
+            driver.get(HEALTHCHECK_PAGE)
+            if driver.title != HEALTHCHECK_TITLE:
+                raise RuntimeError(f"health check page not rendered (title {driver.title!r})")
+        except Exception:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            raise
+        
+        if self.lean_active and self.lean_cdp is False and not content_blocking:
+            # This Grid doesn't relay CDP: rebuild once with content-setting blocking instead
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            return self.create_browser_session(profiled)
+        
+        return driver
+    
     def setup_remote_browser(self):
         """FIXED: Connect to Railway Selenium service with proper configuration"""
+        self.standby_logged_in = False
+        
+        # A warm standby session skips session startup (and login, if it was restored)
+        standby = self.session_pool.acquire() if self.session_pool else None
+        if standby:
+            self.driver = standby.driver
+            self.standby_logged_in = standby.logged_in
+            if self.profiler:
+                self.profiler.wrap_driver(self.driver)
+            self.waits = WaitEngine(self.driver, self.wait_profile, self.wait_stats, self.selector_cache)
+            return True
+        
         logger.info("🌐 Connecting to Railway Selenium service...")
         
         max_retries = 3
         
         for attempt in range(max_retries):
             try:
-                # FIXED: Optimized Chrome options for Railway
-                chrome_options = Options()
-                chrome_options.add_argument("--no-sandbox")
-                chrome_options.add_argument("--disable-dev-shm-usage")
-                chrome_options.add_argument("--disable-gpu")
-                chrome_options.add_argument("--headless")  # Essential for Railway
-                chrome_options.add_argument("--disable-web-security")
-                chrome_options.add_argument("--disable-features=VizDisplayCompositor")
-                chrome_options.add_argument("--window-size=1920,1080")
-                
-                # FIXED: Download preferences for remote browser
-                prefs = {
-                    "download.default_directory": self.download_folder,
-                    "download.prompt_for_download": False,
-                    "download.directory_upgrade": True,
-                    "safebrowsing.enabled": True
-                }
-                chrome_options.add_experimental_option("prefs", prefs)
-                
                 # FIXED: Connection timeout and retry logic
                 logger.info(f"🔌 Attempt {attempt + 1}: Connecting to {self.selenium_url}")
                 
-                self.driver = webdriver.Remote(
-                    command_executor=self.selenium_url,
-                    options=chrome_options
-                )
-                
-                # Test connection with a simple command
-                self.driver.set_page_load_timeout(30)
-                self.driver.implicitly_wait(10)
-                
-                # Verify connection
                 logger.info("🧪 Testing Selenium connection...")
-                self.driver.get("https://httpbin.org/ip")
+                self.driver = self.create_browser_session()
+                self.waits = WaitEngine(self.driver, self.wait_profile, self.wait_stats, self.selector_cache)
                 
                 logger.info("✅ Railway Selenium connected successfully!")
                 return True
                 
             except Exception as e:
                 logger.warning(f"⚠️ Connection attempt {attempt + 1} failed: {e}")
-                
-                if self.driver:
-                    try:
-                        self.driver.quit()
-                    except:
-                        pass
-                    self.driver = None
+                self.driver = None
                 
                 if attempt < max_retries - 1:
-                    wait_time = (attempt + 1) * 5
-                    logger.info(f"⏳ Waiting {wait_time}s before retry...")
-                    time.sleep(wait_time)
+                    RETRIES.inc(stage='browser_setup')
+                    # Back off longer while the Grid has no free slot and requests are queued
+                    free_slots, queue_size = grid_queue_signal(self.selenium_url)
+                    wait_time = backoff_delay(attempt, base=2.0, free_slots=free_slots, queue_size=queue_size)
+                    logger.info(f"⏳ Waiting {wait_time:.1f}s before retry (free slots {free_slots}, "
+                                f"queued {queue_size})...")
+                    timed_sleep(wait_time, 'browser_setup_backoff')
                 else:
                     logger.error("❌ All connection attempts failed")
                     return False
         
         return False
     
-    def test_selenium_connection(self):
-        """Test Selenium service availability before main automation"""
-        logger.info("🔍 Testing Railway Selenium service availability...")
+    def prepare_standby_session(self, driver):
+        """Restore the cached login into a standby session; True if it is now logged in"""
+        if not (self.session_pool_prelogin and self.session_cache):
+            return False
+        return self.session_cache.restore(driver)
+    
+    def preflight(self):
+        """Check Grid status, Grid capacity and the upload API in parallel before starting a browser"""
+        logger.info("🔍 Running preflight checks...")
+        self.last_preflight = run_preflight(self.selenium_url, self.api_url)
         
-        try:
-            # Test if Selenium hub is responding
-            test_url = self.selenium_url.replace('/wd/hub', '/status')
-            logger.info(f"📡 Testing Selenium status at: {test_url}")
-            
-            response = requests.get(test_url, timeout=10)
-            
-            if response.status_code == 200:
-                logger.info("✅ Selenium service is responding")
-                return True
-            else:
-                logger.warning(f"⚠️ Selenium service returned HTTP {response.status_code}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"❌ Selenium service test failed: {e}")
+        if not self.last_preflight['grid_status']['ok']:
+            logger.error("❌ Selenium service not available")
             return False
+        if not self.last_preflight['upload_api']['ok']:
+            logger.error("❌ Upload API not reachable")
+            return False
+        
+        status = self.last_preflight['grid_status']
+        if not status.get('ready', True):
+            logger.warning(f"⚠️ Grid reports no free slot ({status.get('message') or 'not ready'}), "
+                           f"session setup will wait for one")
+        capacity = self.last_preflight['grid_capacity']
+        if capacity.get('queue_size'):
+            logger.warning(f"⚠️ Grid has {capacity['queue_size']} queued session requests, setup may be slow")
+        return True
     
     def safe_login(self):
             """FIXED: Enhanced login with click interception fix"""
@@ -167,35 +395,29 @@ class RailwayCSVDownloader:
             try:
                 # Navigate to login page
                 logger.info("📍 Navigating to Roblox login page...")
-                self.driver.get("https://www.roblox.com/login")
+                limiter('navigation').acquire()
+                self.driver.get(f"{self.roblox_url}/login")
                 
                 # Wait for page to fully load
-                WebDriverWait(self.driver, 30).until(
-                    EC.element_to_be_clickable((By.ID, "login-username"))
-                )
+                username_field = self.waits.for_element(By.ID, "login-username", 'login_form', clickable=True, kind='page')
                 
                 # Enter username
                 logger.info("✏️ Entering username...")
-                username_field = self.driver.find_element(By.ID, "login-username")
                 username_field.clear()
-                time.sleep(0.5)
                 username_field.send_keys(self.alt_username)
                 
                 # Enter password  
                 logger.info("✏️ Entering password...")
                 password_field = self.driver.find_element(By.ID, "login-password")
                 password_field.clear()
-                time.sleep(0.5)
                 password_field.send_keys(self.alt_password)
                 
-                # Wait before clicking login
-                time.sleep(random.uniform(1, 3))
+                # Short pacing before clicking login
+                self.waits.pause('login_pause')
                 
                 # FIXED: Better login button click handling
                 logger.info("🖱️ Clicking login button...")
-                login_button = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable((By.ID, "login-button"))
-                )
+                login_button = self.waits.for_element(By.ID, "login-button", 'login_button', clickable=True)
                 
                 # Try multiple click methods
                 try:
@@ -204,6 +426,7 @@ class RailwayCSVDownloader:
                 except:
                     try:
                         # Method 2: JavaScript click (bypasses interception)
+                        limiter('navigation').acquire()
                         self.driver.execute_script("arguments[0].click();", login_button)
                     except:
                         # Method 3: Action chains click
@@ -212,15 +435,13 @@ class RailwayCSVDownloader:
                 
                 # Wait for login completion
                 logger.info("⏳ Waiting for login completion...")
-                WebDriverWait(self.driver, 30).until(
-                    lambda driver: "login" not in driver.current_url.lower()
-                )
+                self.waits.for_url(lambda url: "login" not in url.lower(), 'login_redirect')
                 
                 # Verify success
                 current_url = self.driver.current_url
                 logger.info(f"📍 Post-login URL: {current_url}")
                 
-                success_indicators = ["create.roblox.com", "home", "dashboard"]
+                success_indicators = [urlparse(self.create_url).netloc, "home", "dashboard"]
                 if any(indicator in current_url for indicator in success_indicators):
                     logger.info("✅ Login successful!")
                     return True
@@ -232,19 +453,97 @@ class RailwayCSVDownloader:
                 logger.error(f"❌ Login error: {e}")
                 return False
     
-    def download_csv_files(self):
-        """FIXED: Enhanced CSV download with better navigation"""
+    def restore_session(self):
+        """Reuse a cached authenticated session instead of logging in"""
+        if not self.session_cache:
+            return False
+        
+        logger.info("🔑 Checking cached login session...")
+        try:
+            return self.session_cache.restore(self.driver)
+        except Exception as e:
+            logger.warning(f"⚠️ Session restore failed: {e}")
+            return False
+    
+    def save_session(self):
+        """Cache the current authenticated session for later runs"""
+        if not self.session_cache:
+            return
+        
+        try:
+            self.session_cache.save(self.driver)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not cache session: {e}")
+    
+    def download_csv_files_http(self, on_file=None):
+        """Export CSVs over direct HTTP calls using the browser's authenticated cookies"""
+        if not self.http_export_endpoints:
+            return []
+        
+        try:
+            engine = HttpExportEngine(self.http_export_endpoints, self.download_folder,
+                                      max_workers=self.http_export_workers)
+            engine.load_cookies_from_driver(self.driver)
+            return [str(f) for f in engine.export_all(on_file)]
+        except PipelineCancelled:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ HTTP export engine failed: {e}")
+            return []
+    
+    def download_csv_files(self, on_file=None):
+        """FIXED: Enhanced CSV download with better navigation
+        
+        on_file, if given, is called with each CSV path as soon as it finishes downloading.
+        """
         logger.info("📥 Starting CSV download process...")
         
+        csv_files = self.download_csv_files_http(on_file)
+        if csv_files:
+            return csv_files
+        elif self.http_export_endpoints:
+            logger.warning("⚠️ HTTP exports produced no files, falling back to browser exports")
+        
+        csv_files = self._download_csv_files_browser(on_file)
+        if not csv_files and self.lean_active and self._fall_back_to_full_profile():
+            csv_files = self._download_csv_files_browser(on_file)
+        return csv_files
+    
+    def _fall_back_to_full_profile(self):
+        """Swap the lean session for a logged-in full-profile one for the rest of the run"""
+        logger.warning("🪶 Lean profile exported nothing, retrying with the full browser profile...")
+        LEAN_FALLBACKS.inc()
+        self._measure_lean_savings('fallback')
+        self.lean_active = False
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        self.driver = None
+        try:
+            self.driver = self.create_browser_session()
+        except Exception as e:
+            logger.error(f"❌ Full-profile browser session failed: {e}")
+            return False
+        self.waits = WaitEngine(self.driver, self.wait_profile, self.wait_stats, self.selector_cache)
+        return self.restore_session() or self.safe_login()
+    
+    def _download_csv_files_browser(self, on_file=None):
+        """Export through the dashboard in the browser; list of CSV paths"""
         try:
+            if not self.multi_experience and self.open_cached_analytics('default'):
+                return self._export_current_experience(on_file, deep_linked=True)
+            
             # Navigate to creator dashboard
             logger.info("📍 Navigating to creator dashboard...")
-            self.driver.get("https://create.roblox.com/dashboard/creations")
+            nav_started = time.monotonic()
+            limiter('navigation').acquire()
+            self.driver.get(f"{self.create_url}/dashboard/creations")
             
             # Wait for page load
-            WebDriverWait(self.driver, 30).until(
-                EC.presence_of_element_located((By.XPATH, "//a[contains(@href, 'experiences') or contains(text(), 'experience')]"))
-            )
+            self.waits.for_element(By.XPATH, "//a[contains(@href, 'experiences') or contains(text(), 'experience')]",
+                                   'dashboard', kind='page')
+            self._measure_lean_savings('dashboard')
             
             # Find games with multiple selectors
             game_selectors = [
@@ -254,208 +553,340 @@ class RailwayCSVDownloader:
             ]
             
             game_element = None
-            for selector in game_selectors:
-                try:
-                    elements = self.driver.find_elements(By.XPATH, selector)
-                    if elements:
-                        game_element = elements[0]
-                        logger.info(f"✅ Found game using selector: {selector}")
-                        break
-                except:
-                    continue
+            try:
+                selector, game_element = self.waits.for_any_xpath(game_selectors, 'game_link')
+                logger.info(f"✅ Found game using selector: {selector}")
+            except TimeoutException:
+                pass
             
             if not game_element:
                 logger.error("❌ No games found in dashboard")
                 return []
             
+            if self.multi_experience:
+                return self.download_all_experiences(on_file)
+            
             # Click game
             logger.info("🖱️ Clicking on game...")
+            limiter('navigation').acquire()
             self.driver.execute_script("arguments[0].click();", game_element)
             
             # Wait for game page
-            WebDriverWait(self.driver, 30).until(
-                lambda driver: "experiences" in driver.current_url or "games" in driver.current_url
-            )
+            self.waits.for_url(lambda url: "experiences" in url or "games" in url, 'game_page')
+            STAGE_SECONDS.observe(time.monotonic() - nav_started, stage='navigation_dashboard')
             
-            logger.info("📍 Navigating to Analytics...")
+            return self._export_current_experience(on_file)
             
-            # Multiple selectors for Analytics link
-            analytics_selectors = [
-                "//a[contains(text(), 'Analytics')]",
-                "//a[contains(@href, 'analytics')]",
-                "//button[contains(text(), 'Analytics')]",
-                "//div[contains(text(), 'Analytics')]/parent::a"
-            ]
+        except PipelineCancelled:
+            raise
+        except Exception as e:
+            logger.error(f"❌ CSV download error: {e}")
+            return []
+    
+    def open_cached_analytics(self, experience_key):
+        """Open the cached Analytics URL directly; False (entry dropped) on redirect or 404"""
+        url = self.navigation_cache.get(experience_key) if self.navigation_cache else None
+        if not url:
+            return False
+        
+        logger.info(f"🔗 Opening cached Analytics link for '{experience_key}'...")
+        nav_started = time.monotonic()
+        try:
+            limiter('navigation').acquire()
+            self.driver.get(url)
+            # Client-side redirects (e.g. to login) happen after load; let them play out
+            self.waits.for_network_idle('deep_link_idle')
+            if deep_link_landed(self.driver, url):
+                STAGE_SECONDS.observe(time.monotonic() - nav_started, stage='navigation_deep_link')
+                logger.info("✅ Deep link landed on Analytics")
+                return True
+            logger.warning(f"⚠️ Cached Analytics link no longer valid (now at {self.driver.current_url}), "
+                           f"falling back to navigation")
+        except Exception as e:
+            logger.warning(f"⚠️ Cached Analytics link failed: {e}")
+        self.navigation_cache.drop(experience_key)
+        return False
+    
+    def _measure_lean_savings(self, page):
+        """Drain the session's network log into the lean savings tally"""
+        if self.lean_savings and self.driver:
+            self.lean_savings.measure(self.driver, page)
+    
+    def _export_current_experience(self, on_file=None, experience_key='default', deep_linked=False):
+        """Open Analytics from the current experience page and export its CSVs
+        
+        With deep_linked the driver is already on Analytics and the click chain is skipped.
+        """
+        if not deep_linked and not self._navigate_to_analytics(experience_key):
+            return []
+        
+        # Look for export buttons with multiple strategies once the page has settled
+        if not deep_linked:
+            self.waits.for_network_idle('analytics_idle')
+        self._measure_lean_savings('analytics')
+        
+        export_selectors = [
+            "//button[contains(text(), 'Export')]",
+            "//button[contains(text(), 'Download')]",
+            "//a[contains(text(), 'Export')]",
+            "//div[contains(text(), 'Export')]/following-sibling::button",
+            "//*[@role='button' and contains(text(), 'Export')]"
+        ]
+        
+        try:
+            self.waits.for_any_xpath(export_selectors, 'export_buttons')
+        except TimeoutException:
+            pass
+        
+        # All selectors in one round trip, duplicates removed in the page
+        _, export_buttons = self.waits.find_all_xpath(export_selectors, 'export_buttons')
+        
+        logger.info(f"🎯 Found {len(export_buttons)} potential export buttons")
+        
+        if not export_buttons:
+            logger.warning("⚠️ No export buttons found, trying alternative approach...")
             
-            analytics_element = None
-            for selector in analytics_selectors:
-                try:
-                    element = WebDriverWait(self.driver, 10).until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
-                    analytics_element = element
-                    logger.info(f"✅ Found Analytics using: {selector}")
+            # Try right-click context menu approach
+            try:
+                charts = self.driver.find_elements(By.XPATH, "//canvas | //svg | //*[contains(@class, 'chart')]")
+                if charts:
+                    logger.info("🔍 Trying context menu approach...")
+                    from selenium.webdriver.common.action_chains import ActionChains
+                    ActionChains(self.driver).context_click(charts[0]).perform()
+                    self.waits.pause('context_menu')
+            except:
+                pass
+        
+        # Download available CSVs (limit to 3 per experience by default for safety)
+        download_count = 0
+        max_downloads = self.max_exports_per_experience
+        watcher = self._create_download_watcher()
+        
+        for i, button in enumerate(export_buttons[:max_downloads]):
+            try:
+                if download_count >= max_downloads:
                     break
-                except:
-                    continue
-            
-            if not analytics_element:
-                logger.error("❌ Analytics section not found")
-                return []
-            
-            # Click Analytics
-            self.driver.execute_script("arguments[0].click();", analytics_element)
-            
-            # Wait for Analytics page
-            WebDriverWait(self.driver, 30).until(
-                lambda driver: "analytics" in driver.current_url
-            )
-            
-            logger.info("✅ Successfully navigated to Analytics")
-            
-            # Look for export buttons with multiple strategies
-            time.sleep(5)  # Let page fully load
-            
-            export_selectors = [
-                "//button[contains(text(), 'Export')]",
-                "//button[contains(text(), 'Download')]",
-                "//a[contains(text(), 'Export')]",
-                "//div[contains(text(), 'Export')]/following-sibling::button",
-                "//*[@role='button' and contains(text(), 'Export')]"
-            ]
-            
-            export_buttons = []
-            for selector in export_selectors:
-                try:
-                    buttons = self.driver.find_elements(By.XPATH, selector)
-                    export_buttons.extend(buttons)
-                except:
-                    continue
-            
-            # Remove duplicates
-            export_buttons = list(set(export_buttons))
-            
-            logger.info(f"🎯 Found {len(export_buttons)} potential export buttons")
-            
-            if not export_buttons:
-                logger.warning("⚠️ No export buttons found, trying alternative approach...")
                 
-                # Try right-click context menu approach
-                try:
-                    charts = self.driver.find_elements(By.XPATH, "//canvas | //svg | //*[contains(@class, 'chart')]")
-                    if charts:
-                        logger.info("🔍 Trying context menu approach...")
-                        from selenium.webdriver.common.action_chains import ActionChains
-                        ActionChains(self.driver).context_click(charts[0]).perform()
-                        time.sleep(2)
-                except:
-                    pass
-            
-            # Download available CSVs (limit to 3 for safety)
-            download_count = 0
-            max_downloads = 3
-            
-            for i, button in enumerate(export_buttons[:max_downloads]):
-                try:
-                    if download_count >= max_downloads:
-                        break
-                    
-                    logger.info(f"📊 Attempting download {download_count + 1}")
-                    
-                    # Scroll to button
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", button)
-                    time.sleep(1)
-                    
-                    # Click export button
-                    self.driver.execute_script("arguments[0].click();", button)
-                    
-                    # Wait for download
-                    time.sleep(random.uniform(3, 8))
-                    download_count += 1
-                    
-                    logger.info(f"✅ Export {download_count} triggered")
-                    
-                except Exception as e:
-                    logger.warning(f"⚠️ Export button {i} failed: {e}")
-                    continue
-            
-            # Wait for downloads to complete
-            logger.info("⏳ Waiting for downloads to complete...")
-            time.sleep(15)
-            
-            # Find downloaded files
-            csv_files = list(Path(self.download_folder).glob("*.csv"))
-            
-            logger.info(f"📁 Found {len(csv_files)} CSV files:")
-            for csv_file in csv_files:
-                file_size = csv_file.stat().st_size
-                logger.info(f"  📄 {csv_file.name} ({file_size} bytes)")
-            
-            return [str(f) for f in csv_files]
-            
-        except Exception as e:
-            logger.error(f"❌ CSV download error: {e}")
+                logger.info(f"📊 Attempting download {download_count + 1}")
+                export_started = time.monotonic()
+                
+                # Scroll to button (synchronous, no settle sleep needed)
+                self.driver.execute_script("arguments[0].scrollIntoView(true);", button)
+                
+                # Click export button
+                limiter('export').acquire()
+                self.driver.execute_script("arguments[0].click();", button)
+                
+                # Short pause between clicks; completion is tracked by the watcher
+                self.waits.pause('export_pause')
+                download_count += 1
+                STAGE_SECONDS.observe(time.monotonic() - export_started, stage='export')
+                
+                logger.info(f"✅ Export {download_count} triggered")
+                
+            except Exception as e:
+                logger.warning(f"⚠️ Export button {i} failed: {e}")
+                continue
+        
+        # Wait for downloads to complete
+        logger.info(f"⏳ Waiting for downloads to complete (timeout {self.download_timeout}s)...")
+        csv_files = []
+        with time_stage('download_wait'):
+            for csv_file in watcher.wait_for_files(expected=download_count, timeout=self.download_timeout):
+                csv_files.append(csv_file)
+                if on_file:
+                    on_file(str(csv_file))
+        
+        logger.info(f"📁 Found {len(csv_files)} CSV files:")
+        for csv_file in csv_files:
+            file_size = csv_file.stat().st_size
+            logger.info(f"  📄 {csv_file.name} ({file_size} bytes)")
+        
+        return [str(f) for f in csv_files]
+    
+    def _navigate_to_analytics(self, experience_key):
+        """Click through to Analytics from an experience page and cache the resolved URL"""
+        logger.info("📍 Navigating to Analytics...")
+        nav_started = time.monotonic()
+        
+        # Multiple selectors for Analytics link
+        analytics_selectors = [
+            "//a[contains(text(), 'Analytics')]",
+            "//a[contains(@href, 'analytics')]",
+            "//button[contains(text(), 'Analytics')]",
+            "//div[contains(text(), 'Analytics')]/parent::a"
+        ]
+        
+        analytics_element = None
+        try:
+            # All selectors are polled together under one timeout
+            selector, analytics_element = self.waits.for_any_xpath(analytics_selectors, 'analytics_link', clickable=True)
+            logger.info(f"✅ Found Analytics using: {selector}")
+        except TimeoutException:
+            pass
+        
+        if not analytics_element:
+            logger.error("❌ Analytics section not found")
+            return False
+        
+        # Click Analytics
+        limiter('navigation').acquire()
+        self.driver.execute_script("arguments[0].click();", analytics_element)
+        
+        # Wait for Analytics page
+        self.waits.for_url(lambda url: "analytics" in url, 'analytics_page')
+        
+        logger.info("✅ Successfully navigated to Analytics")
+        STAGE_SECONDS.observe(time.monotonic() - nav_started, stage='navigation_analytics')
+        
+        if self.navigation_cache:
+            self.navigation_cache.set(experience_key, self.driver.current_url)
+        return True
+    
+    def download_all_experiences(self, on_file=None):
+        """Export analytics for every experience on the dashboard in parallel sessions"""
+        experiences = list_experiences(self.driver)
+        logger.info(f"🎮 Found {len(experiences)} experiences on the dashboard")
+        
+        if self.target_experiences:
+            experiences = [e for e in experiences if e['id'] in self.target_experiences]
+            logger.info(f"🎯 {len(experiences)} of them are targeted")
+        
+        if not experiences:
             return []
+        
+        exporter = MultiExperienceExporter(self, max_sessions=self.export_sessions)
+        results = exporter.export_all(experiences, on_file)
+        self.last_export_report = exporter.write_report(results, Path(self.state_dir) / 'export_report.json')
+        
+        return [f for result in results for f in result['files']]
+    
+    def _create_download_watcher(self):
+        """Return a watcher for the local download folder or the remote Grid node"""
+        if self.managed_downloads:
+            logger.info("🛰️ Using Grid managed downloads")
+            fetcher = GridDownloadFetcher(self.selenium_url, self.driver.session_id, self.download_folder)
+            fetcher.snapshot()
+            return fetcher
+        return DownloadWatcher(self.download_folder)
+    
+    def validate_exports(self, csv_files):
+        """Summarize downloaded CSVs and return the ones fit to upload"""
+        if not self.validator:
+            return csv_files
+        return self.validator.validate(csv_files)
+    
+    def record_history(self, csv_files):
+        """Fold full exports into the local history store before they are reduced and deleted"""
+        if not self.history:
+            return
+        for csv_file in csv_files:
+            try:
+                self.history.ingest(csv_file)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not add {Path(csv_file).name} to history: {e}")
+    
+    def extract_deltas(self, csv_files):
+        """Reduce each CSV to rows newer than its report watermark (DELTA_UPLOADS)"""
+        if not self.delta_extractor:
+            return csv_files
+        
+        delta_files = []
+        for csv_file in csv_files:
+            try:
+                delta_file = self.delta_extractor.extract(csv_file)
+            except Exception as e:
+                logger.warning(f"⚠️ Delta extraction failed for {Path(csv_file).name}, sending whole file: {e}")
+                delta_file = csv_file
+            if delta_file:
+                delta_files.append(delta_file)
+        
+        return delta_files
     
     def upload_csv_to_sparkedhosting(self, csv_files):
-        """FIXED: Enhanced upload with better error handling"""
+        """FIXED: Concurrent streaming upload over a shared keep-alive session"""
         logger.info(f"📤 Uploading {len(csv_files)} files to SparkedHosting...")
         
         if not csv_files:
             logger.warning("⚠️ No CSV files to upload")
             return 0
         
-        uploaded_count = 0
+        processed_count, self.last_upload_results = self._upload_batch(csv_files)
+        return processed_count
+    
+    def _upload_batch(self, csv_files):
+        """Upload files not already in the manifest; return (processed count, per-file results)"""
+        skipped = []
+        if self.manifest:
+            csv_files, skipped = self.manifest.partition(csv_files)
+            if skipped:
+                saved = sum(size for _, size in skipped)
+                logger.info(f"⏭️ Skipped {len(skipped)} unchanged files ({saved} bytes saved)")
         
-        for csv_file in csv_files:
-            max_retries = 3
-            
-            for attempt in range(max_retries):
-                try:
-                    # Prepare file with timestamp
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    original_name = Path(csv_file).name
-                    new_name = f"railway_{timestamp}_{original_name}"
-                    
-                    # Read file
-                    with open(csv_file, 'rb') as f:
-                        file_content = f.read()
-                    
-                    if len(file_content) == 0:
-                        logger.warning(f"⚠️ Skipping empty file: {original_name}")
-                        break
-                    
-                    # Prepare upload
-                    files = {'files': (new_name, file_content, 'text/csv')}
-                    
-                    logger.info(f"📤 Uploading: {new_name} (attempt {attempt + 1}, {len(file_content)} bytes)")
-                    
-                    # Upload with timeout
-                    response = requests.post(
-                        f"{self.api_url}/upload-csv",
-                        files=files,
-                        timeout=120
-                    )
-                    
-                    if response.status_code == 200:
-                        logger.info(f"✅ Successfully uploaded: {new_name}")
-                        uploaded_count += 1
-                        break
-                    else:
-                        logger.warning(f"⚠️ Upload failed: HTTP {response.status_code}")
-                        if attempt == max_retries - 1:
-                            logger.error(f"❌ Upload failed after {max_retries} attempts")
-                        else:
-                            time.sleep(5 * (attempt + 1))  # Exponential backoff
-                
-                except Exception as e:
-                    logger.warning(f"⚠️ Upload attempt {attempt + 1} error: {e}")
-                    if attempt == max_retries - 1:
-                        logger.error(f"❌ Upload failed after {max_retries} attempts: {e}")
-                    else:
-                        time.sleep(5 * (attempt + 1))
+        if self.outbox:
+            self.outbox.add(csv_files + [f for f, _ in skipped],
+                            self.delta_extractor.pending if self.delta_extractor else None)
+        
+        results = self.uploader.upload_all(csv_files) if csv_files else []
+        
+        for result in results:
+            if result['attempts'] > 1:
+                RETRIES.inc(result['attempts'] - 1, stage='upload')
+            if result['success']:
+                logger.info(f"  📈 {result['name']}: {result['bytes']} bytes in {result['seconds']:.2f}s "
+                            f"({result['bytes_per_sec'] / 1024:.1f} KiB/s)")
+                STAGE_SECONDS.observe(result['seconds'], stage='upload')
+                BYTES_UPLOADED.inc(result.get('compressed_bytes') or result['bytes'])
+                if self.manifest:
+                    self.manifest.record(result['file'])
+        
+        if self.delta_extractor:
+            delivered = [r['file'] for r in results if r['success']] + [f for f, _ in skipped]
+            for csv_file in delivered:
+                self.delta_extractor.commit(csv_file)
+        
+        if self.manifest:
+            try:
+                self.manifest.save()
+            except Exception as e:
+                logger.warning(f"⚠️ Could not save upload manifest: {e}")
+        
+        if self.outbox:
+            try:
+                watermarks = self.outbox.complete(
+                    [r['file'] for r in results if r['success']] + [f for f, _ in skipped],
+                    {r['file']: r['error'] for r in results if not r['success']}
+                )
+                # Spooled delta files delivered by a later run still move their report's watermark
+                if self.delta_extractor:
+                    for report_key, mark in watermarks:
+                        self.delta_extractor.store.advance(report_key, mark)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not update upload outbox: {e}")
+        
+        # Unchanged files count as processed: their content is already on the server
+        return sum(1 for result in results if result['success']) + len(skipped), results
+    
+    def drain_outbox(self):
+        """Upload files left undelivered by earlier runs; return how many were processed"""
+        if not self.outbox:
+            return 0
+        
+        processed = 0
+        while True:
+            due = self.outbox.due()
+            if not due:
+                break
+            logger.info(f"📮 Retrying {len(due)} undelivered files from the outbox...")
+            count, results = self._upload_batch(due)
+            processed += count
+            if count < len(due):
+                # The API is still refusing some; leave the rest for their next retry time
+                break
         
-        return uploaded_count
+        if processed:
+            logger.info(f"📮 Delivered {processed} files from the outbox")
+        return processed
     
     def cleanup(self):
         """Enhanced cleanup with proper error handling"""
@@ -463,15 +894,34 @@ class RailwayCSVDownloader:
         
         try:
             if self.driver:
+                self._measure_lean_savings('final')
                 self.driver.quit()
                 logger.info("✅ Browser session closed")
         except Exception as e:
             logger.warning(f"⚠️ Browser cleanup warning: {e}")
         
+        try:
+            self.wait_stats.save()
+            self.selector_cache.save()
+            if self.navigation_cache:
+                self.navigation_cache.save()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not save wait stats or navigation caches: {e}")
+        
+        try:
+            # Never delete files the outbox still has to deliver
+            if self.outbox:
+                self.outbox.preserve_pending(self.download_folder)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not preserve pending outbox files: {e}")
+        
         try:
             # Clean download folder
             for file_path in Path(self.download_folder).glob("*"):
-                file_path.unlink()
+                if file_path.is_dir():
+                    shutil.rmtree(file_path)
+                else:
+                    file_path.unlink()
             logger.info("✅ Temporary files cleaned")
         except Exception as e:
             logger.warning(f"⚠️ File cleanup warning: {e}")
@@ -481,32 +931,92 @@ class RailwayCSVDownloader:
         logger.info("🚀 Starting Railway CSV automation...")
         
         start_time = datetime.now()
+        stage = 'preflight'
+        failed_stage = None
+        success = False
+        csv_files, uploaded_count = [], 0
+        
+        if self.profile_commands:
+            self.profiler = CommandProfiler(top_n=int(os.getenv('PROFILE_TOP_N', '10')))
+            self.profiler.install()
+        if self.lean_savings:
+            self.lean_savings.reset()
+        self.lean_active = self.lean_profile
+        if self.validator:
+            self.validator.reset()
         
         try:
-            # Step 1: Test Selenium service
-            if not self.test_selenium_connection():
-                logger.error("❌ Selenium service not available, aborting")
+            # Step 1: Check Selenium and the upload API concurrently
+            with time_stage(stage):
+                preflight_ok = self.preflight()
+            if not preflight_ok:
+                logger.error("❌ Preflight failed, aborting")
+                failed_stage = stage
                 return False
             
+            # Deliver uploads left over from earlier runs before scraping anything new
+            if self.outbox:
+                with time_stage('outbox_drain'):
+                    self.drain_outbox()
+            
             # Step 2: Setup remote browser
-            if not self.setup_remote_browser():
+            stage = 'browser_setup'
+            with time_stage(stage):
+                browser_ok = self.setup_remote_browser()
+            if not browser_ok:
                 logger.error("❌ Remote browser setup failed, aborting")
+                failed_stage = stage
                 return False
             
-            # Step 3: Login with enhanced error handling
-            if not self.safe_login():
+            # Step 3: Reuse cached session, or login with enhanced error handling
+            stage = 'login'
+            with time_stage(stage):
+                logged_in = self.standby_logged_in or self.restore_session()
+                if not logged_in:
+                    logged_in = self.safe_login()
+                    if logged_in:
+                        self.save_session()
+            if not logged_in:
                 logger.error("❌ Login failed, aborting")
+                failed_stage = stage
                 return False
             
-            # Step 4: Download CSVs
-            csv_files = self.download_csv_files()
-            
-            if not csv_files:
-                logger.warning("⚠️ No CSV files downloaded")
-                return False
+            stage = 'export'
+            if self.profiler:
+                self.profiler.set_stage(stage)
+            if self.pipelined:
+                # Steps 4+5: Upload each CSV while the remaining exports run
+                logger.info("🔀 Running exports and uploads as a pipeline")
+                pipeline = PipelinedRun(self, upload_workers=self.uploader.max_workers)
+                csv_files, uploaded_count = asyncio.run(pipeline.run())
+                self.last_upload_results = pipeline.results
+                
+                if not csv_files:
+                    logger.warning("⚠️ No CSV files downloaded")
+                    failed_stage = stage
+                    return False
+            else:
+                # Step 4: Download CSVs
+                csv_files = self.download_csv_files()
+                
+                if not csv_files:
+                    logger.warning("⚠️ No CSV files downloaded")
+                    failed_stage = stage
+                    return False
+                
+                # Step 5: Upload new rows to SparkedHosting
+                stage = 'upload'
+                if self.profiler:
+                    self.profiler.set_stage(stage)
+                valid_files = self.validate_exports(csv_files)
+                self.record_history(valid_files)
+                upload_files = self.extract_deltas(valid_files)
+                unchanged_count = len(valid_files) - len(upload_files)
+                if unchanged_count:
+                    logger.info(f"⏭️ {unchanged_count} reports have no rows past their watermark")
+                uploaded_count = self.upload_csv_to_sparkedhosting(upload_files) + unchanged_count
             
-            # Step 5: Upload to SparkedHosting
-            uploaded_count = self.upload_csv_to_sparkedhosting(csv_files)
+            BYTES_DOWNLOADED.inc(sum(Path(f).stat().st_size for f in csv_files if Path(f).exists()))
             
             # Report results
             end_time = datetime.now()
@@ -519,30 +1029,72 @@ class RailwayCSVDownloader:
                 
                 # Send success notification to Discord (optional)
                 try:
-                    self.send_success_notification(uploaded_count, len(csv_files), duration)
+                    if self.send_notifications:
+                        self.send_success_notification(uploaded_count, len(csv_files), duration)
                 except:
                     pass  # Don't fail automation for notification issues
                 
+                success = True
                 return True
             else:
                 logger.error("❌ No files were uploaded successfully")
+                failed_stage = 'upload'
                 return False
                 
         except Exception as e:
             logger.error(f"❌ Automation failed with error: {e}")
             import traceback
             logger.error(f"Traceback: {traceback.format_exc()}")
+            failed_stage = stage
             return False
         finally:
             self.cleanup()
+            duration_seconds = (datetime.now() - start_time).total_seconds()
+            record_run(success, duration_seconds, failed_stage)
+            self.last_run_summary = {
+                'success': success,
+                'failed_stage': failed_stage,
+                'duration_seconds': round(duration_seconds, 3),
+                'downloaded': len(csv_files),
+                'processed': uploaded_count,
+                'reports': self.validator.summaries if self.validator else [],
+            }
+            if self.lean_savings:
+                saved = self.lean_savings.summary()
+                self.last_run_summary['lean_savings'] = saved
+                logger.info(f"🪶 Lean profile blocked {saved['requests']} requests (~{saved['bytes'] / 1024 / 1024:.1f} MB "
+                            f"at typical sizes), transferred {saved['bytes_transferred'] / 1024 / 1024:.1f} MB")
+                try:
+                    self.lean_savings.save()
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not save lean size table: {e}")
+            if self.profiler:
+                self._finish_profiling()
+    
+    def _finish_profiling(self):
+        """Write this run's trace and log where the time went"""
+        profiler, self.profiler = self.profiler, None
+        profiler.uninstall()
+        try:
+            path = profiler.write_trace(Path(self.state_dir) / 'profiles',
+                                        keep=int(os.getenv('PROFILE_KEEP', '20')))
+            profiler.log_summary()
+            logger.info(f"🔬 WebDriver trace written to {path} (open in ui.perfetto.dev)")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not write WebDriver trace: {e}")
     
     def send_success_notification(self, uploaded_count, total_count, duration):
         """Send success notification to SparkedHosting API"""
         try:
+            reports = self.validator.summaries if self.validator else []
+            flagged = [f"🚩 {r['file']}: {', '.join(r['problems'])}" for r in reports if r['problems']]
             notification_data = {
-                'message': f'🎉 Railway CSV automation successful!\n📊 Uploaded {uploaded_count}/{total_count} files\n⏱️ Duration: {duration}',
+                'message': f'🎉 Railway CSV automation successful!\n📊 Uploaded {uploaded_count}/{total_count} files\n⏱️ Duration: {duration}'
+                           + ''.join(f'\n{line}' for line in flagged),
                 'timestamp': datetime.now().isoformat(),
-                'success': True
+                'success': True,
+                # Per-report row counts, date ranges and metric aggregates, so the API needn't re-parse
+                'reports': reports
             }
             
             requests.post(
@@ -561,7 +1113,10 @@ def main():
     
     # Environment diagnostics
     logger.info("🔍 Environment diagnostics:")
-    env_vars = ['ALT_ROBLOX_USERNAME', 'ALT_ROBLOX_PASSWORD', 'SELENIUM_REMOTE_URL', 'SPARKEDHOSTING_API_URL']
+    env_vars = ['ALT_ROBLOX_USERNAME', 'ALT_ROBLOX_PASSWORD', 'SELENIUM_REMOTE_URL', 'SPARKEDHOSTING_API_URL',
+                'SELENIUM_MANAGED_DOWNLOADS', 'HTTP_EXPORT_ENDPOINTS', 'MULTI_EXPERIENCE',
+                'UPLOAD_MODE', 'PIPELINE', 'SESSION_POOL', 'SCHEDULE_TIMES', 'TRIGGER_TOKEN',
+                'ACCOUNTS_FILE', 'LEAN_PROFILE']
     
     for var in env_vars:
         value = os.getenv(var)
@@ -574,9 +1129,27 @@ def main():
         else:
             logger.warning(f"  {var}: ❌ Missing")
     
-    # Create downloader instance
+    # Serve /metrics and /health for the Railway web process
+    port = os.getenv('PORT')
+    if port:
+        try:
+            start_metrics_server(int(port))
+        except Exception as e:
+            logger.warning(f"⚠️ Metrics server could not start: {e}")
+    
+    # Create downloader instance, or one isolated downloader per account with ACCOUNTS_FILE
+    downloader = None
     try:
-        downloader = RailwayCSVDownloader()
+        accounts_config = os.getenv('ACCOUNTS_FILE')
+        if accounts_config:
+            fan_out = AccountFanOut.from_env(accounts_config)
+            run_job, state_dir = fan_out.run, fan_out.state_dir
+            # These live in the parent of a single-account run; each account process starts cold
+            logger.warning("⚠️ ACCOUNTS_FILE mode: no warm session pool, no /history endpoint and no startup "
+                           "outbox drain (each account drains its own outbox at the start of its run)")
+        else:
+            downloader = RailwayCSVDownloader()
+            run_job, state_dir = downloader.run_automation, downloader.state_dir
     except Exception as e:
         logger.error(f"❌ Failed to create downloader: {e}")
         return
@@ -585,36 +1158,47 @@ def main():
     if os.getenv('RAILWAY_ENVIRONMENT'):
         logger.info("🚂 Running on Railway.app")
         
-        # Schedule daily automation
-        schedule.every().day.at("09:00").do(downloader.run_automation)
-        schedule.every().day.at("21:00").do(downloader.run_automation)
+        # Exact daily timers; runs never overlap and a run missed during a restart is caught up
+        run_times = parse_run_times(os.getenv('SCHEDULE_TIMES', '09:00,21:00'))
+        scheduler = Scheduler(
+            run_job,
+            run_times,
+            state_path=Path(state_dir) / 'scheduler.json',
+            catchup_hours=float(os.getenv('SCHEDULE_CATCHUP_HOURS', '6')),
+            trigger_token=os.getenv('TRIGGER_TOKEN')
+        )
+        scheduler.register_routes()
+        if downloader and downloader.history:
+            downloader.history.register_routes()
         
         logger.info("📅 Scheduled CSV automation:")
-        logger.info("   - Daily at 09:00 UTC")
-        logger.info("   - Daily at 21:00 UTC")
+        for hour, minute in run_times:
+            logger.info(f"   - Daily at {hour:02d}:{minute:02d} UTC")
         
-        # Run test immediately
-        logger.info("🧪 Running initial test automation...")
-        success = downloader.run_automation()
+        # Keep a warm browser session ready shortly before each scheduled run
+        if downloader and downloader.session_pool:
+            downloader.session_pool.start(scheduler.next_run)
         
-        if success:
-            logger.info("✅ Test automation completed successfully!")
-        else:
-            logger.error("❌ Test automation failed - will retry at scheduled times")
+        # Deliver anything earlier runs couldn't upload before waiting for the schedule
+        if downloader and downloader.outbox:
+            try:
+                downloader.drain_outbox()
+            except Exception as e:
+                logger.warning(f"⚠️ Startup outbox drain failed, the next run will retry it: {e}")
         
-        # Keep scheduler running
-        logger.info("🔄 Scheduler active, waiting for scheduled times...")
+        # Initial test run goes through the worker like any other run
+        run_on_start = os.getenv('RUN_ON_START', 'true').lower() == 'true'
+        scheduler.start(run_on_start=run_on_start)
         
-        while True:
-            schedule.run_pending()
-            time.sleep(60)
+        logger.info("🔄 Scheduler active, waiting for scheduled times (POST /trigger for ad-hoc runs)...")
+        scheduler.wait()
     
     else:
         # Local testing
         logger.info("💻 Running in local/test mode")
         logger.info("🧪 Executing single test run...")
         
-        success = downloader.run_automation()
+        success = run_job()
         
         if success:
             logger.info("✅ Test run completed successfully!")
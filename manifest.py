@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Persistent content-hash manifest of uploaded CSVs
+Lets scheduled runs skip re-uploading exports whose content hasn't changed
+"""
+
+import re
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime, timedelta
+
+from multi_export import split_tagged_filename
+
+logger = logging.getLogger(__name__)
+
+# Trailing dates/timestamps in export names, e.g. "Retention_2024-01-01_2024-01-31"
+DATE_SUFFIX_PATTERN = re.compile(r'[\s_\-]*\d{4}[-_]?\d{2}[-_]?\d{2}.*$')
+
+
+def describe_csv(path):
+    """Return (experience_id, report_type) for a downloaded CSV"""
+    experience_id, original = split_tagged_filename(Path(path).name)
+    stem = Path(original).stem
+    report_type = DATE_SUFFIX_PATTERN.sub('', stem) or stem
+    return experience_id or 'default', report_type.lower()
+
+
+def file_sha256(path, chunk_size=64 * 1024):
+    """Hash a file by streaming it in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class UploadManifest:
+    """Record of uploaded file contents keyed by experience, report type and SHA-256"""
+
+    def __init__(self, path, retention_days=30):
+        self.path = Path(path)
+        self.retention = timedelta(days=retention_days)
+        self.lock = threading.Lock()
+        self.entries = self._load()
+        self._fingerprints = {}
+
+    def _load(self):
+        try:
+            return json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"⚠️ Upload manifest unreadable, starting fresh: {e}")
+            return {}
+
+    @staticmethod
+    def _key(experience_id, report_type, sha256):
+        return f"{experience_id}:{report_type}:{sha256}"
+
+    def fingerprint(self, csv_file):
+        """Return (key, experience_id, report_type, sha256) for a file, hashing it once"""
+        stat = Path(csv_file).stat()
+        cache_key = (str(csv_file), stat.st_size, stat.st_mtime_ns)
+        with self.lock:
+            cached = self._fingerprints.get(cache_key)
+        if cached:
+            return cached
+        # Hash outside the lock; save() may clear the cache meanwhile, the local result stays valid
+        experience_id, report_type = describe_csv(csv_file)
+        sha256 = file_sha256(csv_file)
+        fingerprint = (self._key(experience_id, report_type, sha256), experience_id, report_type, sha256)
+        with self.lock:
+            self._fingerprints[cache_key] = fingerprint
+        return fingerprint
+
+    def partition(self, csv_files):
+        """Split files into (to_upload, skipped); skipped items carry their byte size"""
+        to_upload, skipped = [], []
+        for csv_file in csv_files:
+            key = self.fingerprint(csv_file)[0]
+            if key in self.entries:
+                size = Path(csv_file).stat().st_size
+                logger.info(f"⏭️ Unchanged since {self.entries[key]['uploaded_at']}, skipping "
+                            f"{Path(csv_file).name} (saved {size} bytes)")
+                skipped.append((csv_file, size))
+            else:
+                to_upload.append(csv_file)
+        return to_upload, skipped
+
+    def record(self, csv_file):
+        """Mark a file's content as uploaded"""
+        key, experience_id, report_type, sha256 = self.fingerprint(csv_file)
+        with self.lock:
+            self.entries[key] = {
+                'experience_id': experience_id,
+                'report_type': report_type,
+                'sha256': sha256,
+                'bytes': Path(csv_file).stat().st_size,
+                'uploaded_at': datetime.now().isoformat(timespec='seconds'),
+            }
+
+    def save(self):
+        """Drop expired entries and write the manifest atomically"""
+        cutoff = (datetime.now() - self.retention).isoformat(timespec='seconds')
+        with self.lock:
+            self.entries = {k: v for k, v in self.entries.items() if v['uploaded_at'] >= cutoff}
+            self._fingerprints.clear()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(self.entries, indent=1))
+            tmp_path.replace(self.path)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Prometheus-style metrics and health endpoint for Railway CSV automation
+Served from a background thread on $PORT so the scheduler is never blocked
+"""
+
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _format_labels(label_names, label_values, extra=None):
+    pairs = list(zip(label_names, label_values)) + list((extra or {}).items())
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class Metric:
+    """Base class for labelled metrics held in the registry"""
+
+    kind = 'untyped'
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.lock = threading.Lock()
+        self.values = {}
+        if not self.label_names and self.kind in ('counter', 'gauge'):
+            self.values[()] = 0  # Unlabelled series are exported from the start
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    def get(self, **labels):
+        with self.lock:
+            return self.values.get(self._key(labels))
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            counts, total, count = self.values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            counts = [c + (1 if value <= bound else 0) for c, bound in zip(counts, self.buckets)]
+            self.values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - started, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            for key, (counts, total, count) in sorted(self.values.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    labels = _format_labels(self.label_names, key, {'le': bound})
+                    lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+                labels = _format_labels(self.label_names, key, {'le': '+Inf'})
+                lines.append(f"{self.name}_bucket{labels} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+        return lines
+
+
+REGISTRY = []
+
+STAGE_SECONDS = Histogram('railway_stage_duration_seconds', 'Duration of automation stages', ['stage'])
+BYTES_DOWNLOADED = Counter('railway_bytes_downloaded_total', 'Bytes of CSV exports downloaded')
+BYTES_UPLOADED = Counter('railway_bytes_uploaded_total', 'Bytes sent to the SparkedHosting API')
+RETRIES = Counter('railway_retries_total', 'Retries by stage', ['stage'])
+FAILURES = Counter('railway_failures_total', 'Failures by stage', ['stage'])
+RUNS = Counter('railway_runs_total', 'Automation runs by result', ['result'])
+LAST_RUN_SUCCESS = Gauge('railway_last_run_success', '1 if the last run succeeded, 0 otherwise')
+LAST_RUN_TIMESTAMP = Gauge('railway_last_run_timestamp_seconds', 'Unix time the last run finished')
+LAST_RUN_DURATION = Gauge('railway_last_run_duration_seconds', 'Duration of the last run')
+
+# Status shown by /health
+LAST_RUN = {'status': 'never_run', 'finished_at': None, 'duration_seconds': None, 'failed_stage': None}
+
+
+# Callables notified as listener(stage, entering) around every time_stage block
+STAGE_LISTENERS = []
+
+
+@contextmanager
+def time_stage(stage):
+    """Context manager recording the duration of one automation stage"""
+    for listener in STAGE_LISTENERS:
+        listener(stage, True)
+    try:
+        with STAGE_SECONDS.time(stage=stage):
+            yield
+    finally:
+        for listener in STAGE_LISTENERS:
+            listener(stage, False)
+
+
+# Callables notified as listener(name, category, started_perf, **args) after each wait or pause
+WAIT_LISTENERS = []
+
+
+def notify_wait(name, category, started_perf, **args):
+    """Report a finished wait (started at a time.perf_counter() reading) to WAIT_LISTENERS"""
+    for listener in WAIT_LISTENERS:
+        listener(name, category, started_perf, **args)
+
+
+def timed_sleep(seconds, name='sleep'):
+    """time.sleep for the repo's own pauses and backoffs, visible to WAIT_LISTENERS"""
+    started = time.perf_counter()
+    time.sleep(seconds)
+    notify_wait(name, 'sleep', started, requested=round(seconds, 3))
+
+
+def record_run(success, duration_seconds, failed_stage=None):
+    """Update last-run gauges and the /health status"""
+    RUNS.inc(result='success' if success else 'failure')
+    if failed_stage:
+        FAILURES.inc(stage=failed_stage)
+    LAST_RUN_SUCCESS.set(1 if success else 0)
+    LAST_RUN_TIMESTAMP.set(time.time())
+    LAST_RUN_DURATION.set(round(duration_seconds, 3))
+    LAST_RUN.update(status='success' if success else 'failure', failed_stage=failed_stage,
+                    finished_at=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                    duration_seconds=round(duration_seconds, 3))
+
+
+def snapshot(exclude=()):
+    """Counter and histogram samples of this process, for merging into another process's registry"""
+    samples = {}
+    for metric in REGISTRY:
+        if metric.kind not in ('counter', 'histogram') or metric.name in exclude:
+            continue
+        with metric.lock:
+            values = [(key, value) for key, value in metric.values.items() if value]
+        if values:
+            samples[metric.name] = values
+    return samples
+
+
+def merge_snapshot(samples):
+    """Add another process's counter/histogram samples to the matching metrics here"""
+    metrics = {metric.name: metric for metric in REGISTRY}
+    for name, values in samples.items():
+        metric = metrics.get(name)
+        if metric is None:
+            continue
+        with metric.lock:
+            for key, value in values:
+                key = tuple(key)
+                if metric.kind == 'counter':
+                    metric.values[key] = metric.values.get(key, 0) + value
+                elif metric.kind == 'histogram':
+                    counts, total, count = metric.values.get(key, ([0] * len(metric.buckets), 0.0, 0))
+                    other_counts, other_total, other_count = value
+                    metric.values[key] = ([a + b for a, b in zip(counts, other_counts)],
+                                          total + other_total, count + other_count)
+
+
+def render_metrics():
+    """Render every registered metric in the Prometheus text format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    routes = {}
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _dispatch(self, method):
+        route = self.routes.get((method, self.path.split('?')[0]))
+        if not route:
+            return self._send(404, 'text/plain', 'not found\n')
+        try:
+            status, content_type, body = route(self)
+        except Exception as e:
+            logger.warning(f"⚠️ Metrics endpoint error on {self.path}: {e}")
+            status, content_type, body = 500, 'text/plain', 'internal error\n'
+        self._send(status, content_type, body)
+
+    def _send(self, status, content_type, body):
+        data = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+
+def _metrics_route(handler):
+    return 200, 'text/plain; version=0.0.4', render_metrics()
+
+
+def _health_route(handler):
+    return 200, 'application/json', json.dumps({'status': 'ok', 'last_run': LAST_RUN})
+
+
+MetricsHandler.routes = {
+    ('GET', '/metrics'): _metrics_route,
+    ('GET', '/health'): _health_route,
+    ('GET', '/'): _health_route,
+}
+
+
+def add_route(method, path, route):
+    """Register an extra endpoint; route(handler) returns (status, content_type, body)"""
+    MetricsHandler.routes[(method, path)] = route
+
+
+def start_metrics_server(port, host='0.0.0.0'):
+    """Serve /metrics and /health from a daemon thread; return the server"""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    logger.info(f"📈 Metrics server listening on port {port} (/metrics, /health)")
+    return server
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Parallel multi-experience export for Railway CSV automation
+Runs the analytics export of every owned experience across a bounded
+pool of remote WebDriver sessions
+"""
+
+import re
+import copy
+import json
+import shutil
+import logging
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pipeline import PipelineCancelled
+from browser_profile import LEAN_FALLBACKS
+from preflight import check_grid_status
+from rate_limit import limiter
+
+logger = logging.getLogger(__name__)
+
+# Downloaded files are tagged as "<experience_id>__<original name>"
+EXPERIENCE_TAG_SEPARATOR = '__'
+
+EXPERIENCE_ID_PATTERN = re.compile(r'/experiences/(\d+)')
+
+
+def tag_filename(experience_id, filename):
+    """Prefix a downloaded file name with its experience id (once)"""
+    if split_tagged_filename(filename)[0] == str(experience_id):
+        return filename
+    return f"{experience_id}{EXPERIENCE_TAG_SEPARATOR}{filename}"
+
+
+def split_tagged_filename(filename):
+    """Return (experience_id, original name); experience_id is None for untagged files"""
+    experience_id, sep, original = filename.partition(EXPERIENCE_TAG_SEPARATOR)
+    if sep and experience_id.isdigit():
+        return experience_id, original
+    return None, filename
+
+
+def list_experiences(driver):
+    """Collect every experience linked from the creations dashboard"""
+    links = driver.execute_script(
+        "return Array.from(document.querySelectorAll(\"a[href*='experiences']\"))"
+        ".map(function (a) { return [a.href, (a.innerText || '').trim()]; });"
+    ) or []
+
+    experiences = {}
+    for href, text in links:
+        match = EXPERIENCE_ID_PATTERN.search(href)
+        if not match or match.group(1) in experiences:
+            continue
+        experiences[match.group(1)] = {
+            'id': match.group(1),
+            'name': text.split('\n')[0] or match.group(1),
+            'url': href,
+        }
+    return list(experiences.values())
+
+
+def grid_free_slots(selenium_url):
+    """Return the number of free Grid slots, or None if the status can't be read"""
+    try:
+        return check_grid_status(selenium_url, timeout=10)['free_slots']
+    except Exception as e:
+        logger.warning(f"⚠️ Could not read Grid slot count: {e}")
+        return None
+
+
+class MultiExperienceExporter:
+    """Export analytics for many experiences concurrently, one WebDriver session per worker"""
+
+    def __init__(self, downloader, max_sessions=2):
+        self.downloader = downloader
+        self.max_sessions = max_sessions
+
+    def _session_count(self, experience_count):
+        """Limit concurrency by configuration, Grid capacity and the amount of work"""
+        sessions = min(self.max_sessions, experience_count)
+        free_slots = grid_free_slots(self.downloader.selenium_url)
+        if free_slots is not None:
+            sessions = min(sessions, free_slots)
+        return max(sessions, 1)
+
+    def _export_one(self, experience, cookies, on_file=None, lean=True):
+        """Export one experience in its own browser session and tag its files"""
+        worker = copy.copy(self.downloader)
+        worker.driver = None
+        worker.lean_active = self.downloader.lean_active and lean
+        # Always a fresh session: a pooled standby downloads into the main folder, not the worker's
+        worker.session_pool = None
+        worker.standby_logged_in = False
+        # Bound now so the worker keeps this run's profiler even if the main downloader rebinds it;
+        # the selector/navigation caches are lock-protected and shared on purpose (learned per experience)
+        worker.profiler = self.downloader.profiler
+        worker.waits = None
+        worker.download_folder = str(Path(self.downloader.download_folder) / experience['id'])
+        Path(worker.download_folder).mkdir(parents=True, exist_ok=True)
+
+        result = {'experience_id': experience['id'], 'name': experience['name'],
+                  'success': False, 'files': [], 'error': None}
+        # Don't open another Grid session once the pipeline's upload stage has failed
+        cancelled = self.downloader.export_cancelled
+        if cancelled is not None and cancelled.is_set():
+            raise PipelineCancelled("upload stage failed, stopping exports")
+        try:
+            if not worker.setup_remote_browser():
+                raise RuntimeError("browser session could not be created")
+
+            # Reuse the main session's login instead of logging in again
+            limiter('navigation').acquire()
+            worker.driver.get(experience['url'])
+            for cookie in cookies:
+                try:
+                    worker.driver.add_cookie(cookie)
+                except Exception:
+                    continue
+
+            deep_linked = worker.open_cached_analytics(experience['id'])
+            if not deep_linked:
+                limiter('navigation').acquire()
+                worker.driver.get(experience['url'])
+                worker.waits.for_url(lambda url: "experiences" in url, 'game_page')
+
+            for csv_file in worker._export_current_experience(experience_key=experience['id'],
+                                                              deep_linked=deep_linked):
+                tagged = Path(self.downloader.download_folder) / tag_filename(experience['id'], Path(csv_file).name)
+                shutil.move(csv_file, tagged)
+                result['files'].append(str(tagged))
+                if on_file:
+                    on_file(str(tagged))
+
+            result['success'] = bool(result['files'])
+            if not result['success']:
+                result['error'] = "no CSV files downloaded"
+        except PipelineCancelled:
+            raise
+        except Exception as e:
+            result['error'] = str(e)
+        finally:
+            if worker.driver:
+                try:
+                    worker._measure_lean_savings('final')
+                    worker.driver.quit()
+                except Exception:
+                    pass
+            shutil.rmtree(worker.download_folder, ignore_errors=True)
+
+        return result
+
+    def export_all(self, experiences, on_file=None):
+        """Run all experience exports and return per-experience results"""
+        cookies = [
+            {k: v for k, v in c.items() if k in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'expiry')}
+            for c in self.downloader.driver.get_cookies()
+        ]
+        results = self._export_batch(experiences, cookies, on_file)
+
+        # Pages the lean profile broke get one more try with the full profile
+        failed_ids = {r['experience_id'] for r in results if not r['success']}
+        if failed_ids and self.downloader.lean_active:
+            logger.warning(f"🪶 Retrying {len(failed_ids)} experiences with the full browser profile...")
+            LEAN_FALLBACKS.inc(len(failed_ids))
+            retried = self._export_batch([e for e in experiences if e['id'] in failed_ids], cookies, on_file,
+                                         lean=False)
+            results = [r for r in results if r['experience_id'] not in failed_ids] + retried
+        return results
+
+    def _export_batch(self, experiences, cookies, on_file=None, lean=True):
+        sessions = self._session_count(len(experiences))
+        logger.info(f"🧵 Exporting {len(experiences)} experiences across {sessions} browser sessions")
+
+        results = []
+        with ThreadPoolExecutor(max_workers=sessions) as pool:
+            futures = {pool.submit(self._export_one, exp, cookies, on_file, lean): exp for exp in experiences}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except PipelineCancelled:
+                    # Drop experiences that haven't started; running ones stop at their next check
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise
+                results.append(result)
+                if result['success']:
+                    logger.info(f"✅ {result['name']} ({result['experience_id']}): {len(result['files'])} files")
+                else:
+                    logger.warning(f"⚠️ {result['name']} ({result['experience_id']}) failed: {result['error']}")
+        return results
+
+    def write_report(self, results, path):
+        """Save which experiences succeeded to a JSON report"""
+        report = {
+            'timestamp': datetime.now().isoformat(),
+            'succeeded': sum(1 for r in results if r['success']),
+            'failed': sum(1 for r in results if not r['success']),
+            'experiences': results,
+        }
+        Path(path).write_text(json.dumps(report, indent=2))
+        logger.info(f"📋 Export report: {report['succeeded']} succeeded, {report['failed']} failed -> {path}")
+        return report
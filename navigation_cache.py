@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Deep-link cache of resolved analytics URLs per experience
+Lets runs open Analytics directly instead of clicking through the dashboard
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# HTTP status of the current document (0 where the browser doesn't expose it)
+RESPONSE_STATUS_SCRIPT = (
+    "var nav = performance.getEntriesByType('navigation')[0];"
+    "return (nav && nav.responseStatus) || 0;"
+)
+
+
+class NavigationCache:
+    """Persistent map of experience key -> analytics URL"""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self.lock = threading.Lock()
+        self.entries = {}
+        if self.path and self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text())
+            except Exception as e:
+                logger.warning(f"⚠️ Navigation cache unreadable, starting fresh: {e}")
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry['url'] if entry else None
+
+    def set(self, key, url):
+        with self.lock:
+            self.entries[key] = {'url': url, 'resolved_at': datetime.now().isoformat(timespec='seconds')}
+
+    def drop(self, key):
+        with self.lock:
+            if self.entries.pop(key, None):
+                logger.info(f"🗑️ Dropped cached analytics link for '{key}'")
+
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(self.entries, indent=1))
+            tmp_path.replace(self.path)
+
+
+def deep_link_landed(driver, expected_url):
+    """True if the driver is on the analytics page it was sent to (no redirect, no 404)"""
+    current_url = driver.current_url
+    if "analytics" not in current_url or "login" in current_url.lower():
+        return False
+    if current_url.split('?')[0].rstrip('/') != expected_url.split('?')[0].rstrip('/'):
+        return False
+    try:
+        status = driver.execute_script(RESPONSE_STATUS_SCRIPT)
+    except Exception:
+        status = 0
+    return status < 400
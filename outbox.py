@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Durable SQLite upload outbox for Railway CSV automation
+Every file handed to the uploader is recorded; files that fail are moved to
+a spool directory on the state volume and retried by later runs instead of
+being deleted with the download folder
+"""
+
+import time
+import shutil
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from datetime import date
+
+from metrics import Gauge
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_DEPTH = Gauge('railway_outbox_pending', 'Files waiting in the upload outbox')
+OUTBOX_OLDEST = Gauge('railway_outbox_oldest_pending_timestamp_seconds',
+                      'Unix time the oldest pending file entered the outbox (0 if empty)')
+OUTBOX_DEAD = Gauge('railway_outbox_dead', 'Files that exhausted their outbox attempts')
+
+# Uploader error for zero-byte files (see uploads.SparkedUploader.upload_file)
+EMPTY_FILE_ERROR = 'empty file'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    watermark_key TEXT,
+    watermark_date TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+"""
+
+
+class UploadOutbox:
+    """Persistent record of files to upload: pending -> delivered, or dead after max_attempts"""
+
+    def __init__(self, path, spool_dir, max_attempts=10, max_backoff_hours=12, retention_days=7):
+        self.path = Path(path)
+        self.spool_dir = Path(spool_dir)
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff_hours * 3600
+        self.retention = retention_days * 86400
+        self.lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        # One connection shared by the pipeline's upload threads, serialized by the lock
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.refresh_gauges()
+
+    def add(self, files, watermarks=None):
+        """Record files about to be uploaded, in one transaction
+
+        A path seen before is reset to pending unless it is already pending.
+        Empty files are never queued: the uploader skips them, retrying can't help.
+        watermarks maps a delta file to the (report key, date) its delivery commits,
+        so the watermark still advances when a later run delivers it from the spool.
+        """
+        now = time.time()
+        watermarks = watermarks or {}
+        rows = []
+        for f in files:
+            if not Path(f).exists() or Path(f).stat().st_size == 0:
+                continue
+            report_key, mark = watermarks.get(str(f), (None, None))
+            rows.append((str(f), Path(f).name, Path(f).stat().st_size, now, now, now,
+                         report_key, mark.isoformat() if mark else None))
+        with self.lock, self.db:
+            self.db.execute("BEGIN")
+            self.db.executemany(
+                "INSERT INTO outbox (path, name, size, created_at, updated_at, next_attempt_at, "
+                "watermark_key, watermark_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET status = 'pending', attempts = 0, last_error = NULL, "
+                "size = excluded.size, created_at = excluded.created_at, updated_at = excluded.updated_at, "
+                "next_attempt_at = excluded.next_attempt_at, watermark_key = excluded.watermark_key, "
+                "watermark_date = excluded.watermark_date WHERE outbox.status != 'pending'",
+                rows
+            )
+        self.refresh_gauges()
+
+    def _spool_path(self, row_id, name):
+        return self.spool_dir / str(row_id) / name
+
+    def _spool(self, row_id, path, name):
+        """Move a file out of the download folder onto the state volume; return its new path"""
+        source = Path(path)
+        if source.is_relative_to(self.spool_dir):
+            return source
+        target = self._spool_path(row_id, name)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(source), target)
+        return target
+
+    def complete(self, delivered, failed):
+        """Mark delivered paths and retry-schedule failed {path: error} in one transaction
+
+        Returns the (report key, date) watermarks carried by the delivered files.
+        """
+        now = time.time()
+        watermarks = []
+        with self.lock:
+            with self.db:
+                self.db.execute("BEGIN")
+                for path in delivered:
+                    row = self.db.execute("SELECT id, watermark_key, watermark_date FROM outbox WHERE path = ?",
+                                          (str(path),)).fetchone()
+                    if not row:
+                        continue
+                    if row[1] and row[2]:
+                        watermarks.append((row[1], date.fromisoformat(row[2])))
+                    self.db.execute("UPDATE outbox SET status = 'delivered', last_error = NULL, updated_at = ? "
+                                    "WHERE id = ?", (now, row[0]))
+                    if Path(path).is_relative_to(self.spool_dir):
+                        shutil.rmtree(Path(path).parent, ignore_errors=True)
+
+                for path, error in failed.items():
+                    if error == EMPTY_FILE_ERROR:
+                        # Terminal, not transient: nothing to deliver
+                        self.db.execute("DELETE FROM outbox WHERE path = ?", (str(path),))
+                        continue
+                    row = self.db.execute("SELECT id, name, attempts FROM outbox WHERE path = ?",
+                                          (str(path),)).fetchone()
+                    if not row or not Path(path).exists():
+                        continue
+                    row_id, name, attempts = row
+                    attempts += 1
+                    status = 'dead' if attempts >= self.max_attempts else 'pending'
+                    delay = min(self.max_backoff, 60 * 2 ** attempts)
+                    spooled = self._spool(row_id, path, name)
+                    self.db.execute(
+                        "UPDATE outbox SET path = ?, status = ?, attempts = ?, last_error = ?, updated_at = ?, "
+                        "next_attempt_at = ? WHERE id = ?",
+                        (str(spooled), status, attempts, str(error)[:500], now, now + delay, row_id)
+                    )
+                    if status == 'dead':
+                        logger.error(f"☠️ {name} failed {attempts} outbox attempts, giving up (kept at {spooled})")
+
+                self.db.execute("DELETE FROM outbox WHERE status = 'delivered' AND updated_at < ?",
+                                (now - self.retention,))
+        self.refresh_gauges()
+        return watermarks
+
+    def due(self, limit=50):
+        """Pending spooled files whose retry time has come, oldest first"""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT id, path FROM outbox WHERE status = 'pending' AND next_attempt_at <= ? "
+                "ORDER BY created_at LIMIT ?", (time.time(), limit)
+            ).fetchall()
+            # Files left in an ephemeral download folder by a crashed container are gone for good
+            lost = [(row_id,) for row_id, path in rows if not Path(path).exists()]
+            if lost:
+                with self.db:
+                    self.db.execute("BEGIN")
+                    self.db.executemany("UPDATE outbox SET status = 'lost' WHERE id = ?", lost)
+        if lost:
+            logger.warning(f"⚠️ {len(lost)} outbox files no longer exist, marked lost")
+            self.refresh_gauges()
+        return [path for _, path in rows if Path(path).exists()]
+
+    def preserve_pending(self, folder):
+        """Spool pending files still inside `folder` so cleaning it can't lose them"""
+        folder = Path(folder)
+        with self.lock:
+            rows = self.db.execute("SELECT id, path, name FROM outbox WHERE status = 'pending'").fetchall()
+            moved = 0
+            with self.db:
+                self.db.execute("BEGIN")
+                for row_id, path, name in rows:
+                    if not Path(path).is_relative_to(folder) or not Path(path).exists():
+                        continue
+                    spooled = self._spool(row_id, path, name)
+                    self.db.execute("UPDATE outbox SET path = ? WHERE id = ?", (str(spooled), row_id))
+                    moved += 1
+        if moved:
+            logger.info(f"📮 Kept {moved} undelivered files in the outbox")
+        return moved
+
+    def refresh_gauges(self):
+        with self.lock:
+            pending, oldest = self.db.execute(
+                "SELECT COUNT(*), MIN(created_at) FROM outbox WHERE status = 'pending'").fetchone()
+            dead = self.db.execute("SELECT COUNT(*) FROM outbox WHERE status = 'dead'").fetchone()[0]
+        OUTBOX_DEPTH.set(pending)
+        OUTBOX_OLDEST.set(round(oldest or 0, 3))
+        OUTBOX_DEAD.set(dead)
+        return pending
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Pipelined export/upload orchestrator for Railway CSV automation
+Each CSV enters an upload queue the moment its download completes, so
+uploads overlap with the exports still running in the browser
+"""
+
+import asyncio
+import logging
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineCancelled(Exception):
+    """Raised inside the download thread once the pipeline has been cancelled"""
+
+
+class PipelinedRun:
+    """Run download_csv_files and uploads concurrently with an asyncio queue between them"""
+
+    def __init__(self, downloader, upload_workers=3):
+        self.downloader = downloader
+        self.upload_workers = upload_workers
+        self.cancelled = threading.Event()
+        self.processed_count = 0
+        self.results = []
+
+    async def _upload_worker(self, queue):
+        """Drain the queue, uploading one file at a time in a worker thread"""
+        while True:
+            csv_file = await queue.get()
+            try:
+                if csv_file is None:
+                    return
+                valid_files = await asyncio.to_thread(self.downloader.validate_exports, [csv_file])
+                if not valid_files:
+                    continue
+                await asyncio.to_thread(self.downloader.record_history, valid_files)
+                upload_files = await asyncio.to_thread(self.downloader.extract_deltas, valid_files)
+                if not upload_files:
+                    # No rows past the watermark: nothing to send, still processed
+                    self.processed_count += 1
+                    continue
+                processed, results = await asyncio.to_thread(self.downloader._upload_batch, upload_files)
+                self.processed_count += processed
+                self.results.extend(results)
+            finally:
+                queue.task_done()
+
+    async def run(self):
+        """Return (downloaded CSV paths, number of files processed)"""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        def on_file(csv_file):
+            # Called from the download thread as each file completes
+            if self.cancelled.is_set():
+                raise PipelineCancelled("upload stage failed, stopping exports")
+            logger.info(f"➡️ Queued for upload: {Path(csv_file).name}")
+            loop.call_soon_threadsafe(queue.put_nowait, csv_file)
+
+        # Multi-experience export workers check this before opening each session
+        self.downloader.export_cancelled = self.cancelled
+        workers = [asyncio.create_task(self._upload_worker(queue)) for _ in range(self.upload_workers)]
+        producer = asyncio.create_task(asyncio.to_thread(self.downloader.download_csv_files, on_file))
+
+        try:
+            # Workers only finish early by failing; stop exporting if one does
+            done, _ = await asyncio.wait([producer, *workers], return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task is not producer:
+                    task.result()
+                    raise RuntimeError("upload worker exited before the export stage finished")
+
+            csv_files = await producer
+            for _ in workers:
+                queue.put_nowait(None)
+            await asyncio.gather(*workers)
+            return csv_files, self.processed_count
+
+        except BaseException:
+            self.cancelled.set()
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            # The browser thread can't be interrupted; wait so cleanup doesn't quit a driver in use
+            await asyncio.gather(producer, return_exceptions=True)
+            raise
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Concurrent preflight checks for Railway CSV automation
+Grid status, Grid session capacity and upload API reachability are probed in
+parallel so a dead dependency fails the run before a browser is started
+"""
+
+import time
+import random
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Selenium Grid 4 (hub and standalone) answers GraphQL on /graphql
+GRID_CAPACITY_QUERY = {'query': '{ grid { maxSession sessionCount sessionQueueSize } }'}
+
+# Loaded in the browser to prove a new session works without leaving the node
+HEALTHCHECK_PAGE = "data:text/html,<title>railway-ok</title>"
+HEALTHCHECK_TITLE = "railway-ok"
+
+
+def grid_base_url(selenium_url):
+    return selenium_url.rstrip('/').removesuffix('/wd/hub')
+
+
+def check_grid_status(selenium_url, timeout=5):
+    """Read Grid /status; return {ok, ready, message, free_slots}
+
+    Reachable with HTTP 200 is ok: Grid 4 reports ready=false whenever no
+    node has a free slot, which setup_remote_browser waits out instead.
+    """
+    response = requests.get(f"{grid_base_url(selenium_url)}/status", timeout=timeout)
+    response.raise_for_status()
+    value = response.json().get('value', {})
+    nodes = value.get('nodes')
+    free_slots = None
+    if nodes is not None:
+        free_slots = sum(1 for node in nodes for slot in node.get('slots', []) if not slot.get('session'))
+    return {'ok': True, 'ready': bool(value.get('ready', True)), 'message': value.get('message', ''),
+            'free_slots': free_slots}
+
+
+def check_grid_capacity(selenium_url, timeout=5):
+    """Read session counts and the new-session queue length from the Grid GraphQL endpoint"""
+    response = requests.post(f"{grid_base_url(selenium_url)}/graphql", json=GRID_CAPACITY_QUERY, timeout=timeout)
+    response.raise_for_status()
+    grid = response.json()['data']['grid']
+    return {
+        'ok': grid['sessionCount'] < grid['maxSession'],
+        'max_sessions': grid['maxSession'],
+        'sessions': grid['sessionCount'],
+        'queue_size': grid['sessionQueueSize'],
+    }
+
+
+def check_upload_api(api_url, timeout=5):
+    """The upload API is reachable if it answers at all without a server error"""
+    response = requests.get(api_url, timeout=timeout)
+    return {'ok': response.status_code < 500, 'status': response.status_code}
+
+
+def _probe(check, *args):
+    started = time.monotonic()
+    try:
+        result = check(*args)
+    except Exception as e:
+        result = {'ok': False, 'error': str(e)}
+    result['seconds'] = round(time.monotonic() - started, 3)
+    return result
+
+
+def run_preflight(selenium_url, api_url, timeout=5):
+    """Run all checks concurrently; return {check: result} with an 'ok' flag per check
+
+    Capacity and Grid readiness are informational: a busy or GraphQL-less
+    Grid still passes preflight, only an unreachable one fails it.
+    """
+    checks = {
+        'grid_status': (check_grid_status, selenium_url, timeout),
+        'grid_capacity': (check_grid_capacity, selenium_url, timeout),
+        'upload_api': (check_upload_api, api_url, timeout),
+    }
+    with ThreadPoolExecutor(max_workers=len(checks)) as pool:
+        futures = {name: pool.submit(_probe, *check) for name, check in checks.items()}
+        results = {name: future.result() for name, future in futures.items()}
+
+    for name, result in results.items():
+        icon = "✅" if result['ok'] else "⚠️"
+        details = {k: v for k, v in result.items() if k not in ('ok', 'seconds')}
+        logger.info(f"{icon} Preflight {name} ({result['seconds']}s): {details}")
+    return results
+
+
+def grid_queue_signal(selenium_url, timeout=3):
+    """Return (free_slots, queue_size) with None for anything the Grid doesn't report"""
+    capacity = _probe(check_grid_capacity, selenium_url, timeout)
+    if 'queue_size' in capacity:
+        return capacity['max_sessions'] - capacity['sessions'], capacity['queue_size']
+    return _probe(check_grid_status, selenium_url, timeout).get('free_slots'), None
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0, free_slots=None, queue_size=None):
+    """Full-jitter exponential backoff, stretched while the Grid is saturated
+
+    A Grid with no free slot and queued session requests won't have room
+    sooner than the queue drains, so the delay then grows with the queue
+    length and keeps its upper half instead of jittering down to zero.
+    """
+    ceiling = min(cap, base * 2 ** attempt)
+    if free_slots == 0 or queue_size:
+        ceiling = min(cap, ceiling * (1 + (queue_size or 0)))
+        return random.uniform(ceiling / 2, ceiling)
+    return random.uniform(0, ceiling)
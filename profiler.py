@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Opt-in WebDriver command profiler for Railway CSV automation
+Times every remote WebDriver command and every wait or backoff the automation
+makes, tags each with the current automation stage and writes a Chrome trace (Perfetto-compatible)
+JSON file per run
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class CommandProfiler:
+    """Collect trace events for one run
+
+    Commands are timed by replacing the driver instance's execute(), which
+    every WebDriver and WebElement call goes through; waits, pauses and
+    backoffs are reported by their call sites through metrics.WAIT_LISTENERS.
+    The stdlib is never patched, so other threads and libraries are unaffected.
+    """
+
+    def __init__(self, top_n=10):
+        self.top_n = top_n
+        self.lock = threading.Lock()
+        self.events = []
+        self.local = threading.local()
+        self.base_stage = 'run'
+        self.started = time.perf_counter()
+        self.started_at = datetime.now()
+        self.installed = False
+
+    def _now_us(self):
+        return (time.perf_counter() - self.started) * 1_000_000
+
+    def _stack(self):
+        if not hasattr(self.local, 'stages'):
+            self.local.stages = []
+        return self.local.stages
+
+    def current_stage(self):
+        stack = self._stack()
+        return stack[-1][0] if stack else self.base_stage
+
+    def set_stage(self, stage):
+        """Stage for commands outside any time_stage block"""
+        self.base_stage = stage
+
+    def _record(self, name, category, start_us, duration_us, **args):
+        event = {
+            'name': name, 'cat': category, 'ph': 'X', 'ts': round(start_us, 1), 'dur': round(duration_us, 1),
+            'pid': os.getpid(), 'tid': threading.get_ident(),
+            'args': dict(args, stage=self.current_stage(), thread=threading.current_thread().name),
+        }
+        with self.lock:
+            self.events.append(event)
+
+    def record_span(self, name, category, started_perf, **args):
+        """Record something timed by the caller from a time.perf_counter() start"""
+        start_us = (started_perf - self.started) * 1_000_000
+        self._record(name, category, start_us, self._now_us() - start_us, **args)
+
+    def _on_stage(self, stage, entering):
+        stack = self._stack()
+        if entering:
+            stack.append((stage, self._now_us()))
+        elif stack and stack[-1][0] == stage:
+            _, start_us = stack.pop()
+            self._record(stage, 'stage', start_us, self._now_us() - start_us)
+
+    def install(self):
+        """Start receiving stage blocks and waits"""
+        if self.installed:
+            return
+        metrics.STAGE_LISTENERS.append(self._on_stage)
+        metrics.WAIT_LISTENERS.append(self.record_span)
+        self.installed = True
+
+    def uninstall(self):
+        if not self.installed:
+            return
+        if self._on_stage in metrics.STAGE_LISTENERS:
+            metrics.STAGE_LISTENERS.remove(self._on_stage)
+        if self.record_span in metrics.WAIT_LISTENERS:
+            metrics.WAIT_LISTENERS.remove(self.record_span)
+        self.installed = False
+
+    def wrap_driver(self, driver):
+        """Time every command the driver sends to the remote end
+
+        A driver already wrapped by another run's profiler is re-wrapped from
+        its original execute(), so each command is recorded once, by this profiler.
+        """
+        if getattr(driver, '_profiler', None) is self:
+            return driver
+        execute = getattr(driver, '_unprofiled_execute', None) or driver.execute
+
+        def timed_execute(driver_command, params=None):
+            start_us = self._now_us()
+            outcome = 'ok'
+            try:
+                return execute(driver_command, params)
+            except Exception as e:
+                outcome = type(e).__name__
+                raise
+            finally:
+                detail = {}
+                if params and driver_command == 'get':
+                    detail['url'] = params.get('url', '')[:200]
+                elif params and 'script' in params:
+                    detail['script'] = params['script'][:80]
+                elif params and 'value' in params and isinstance(params['value'], str):
+                    detail['selector'] = params['value'][:120]
+                self._record(driver_command, 'webdriver', start_us, self._now_us() - start_us,
+                             outcome=outcome, session=(driver.session_id or '')[:8], **detail)
+
+        driver.execute = timed_execute
+        driver._unprofiled_execute = execute
+        driver._profiler = self
+        return driver
+
+    def summary(self):
+        """Per (stage, name) totals for commands, waits and sleeps, slowest total first"""
+        totals = {}
+        with self.lock:
+            events = [e for e in self.events if e['cat'] in ('webdriver', 'wait', 'sleep')]
+        for event in events:
+            key = (event['args']['stage'], event['name'])
+            count, total, slowest = totals.get(key, (0, 0.0, 0.0))
+            totals[key] = (count + 1, total + event['dur'], max(slowest, event['dur']))
+        return sorted(
+            ({'stage': stage, 'name': name, 'count': count, 'total_ms': round(total / 1000, 1),
+              'max_ms': round(slowest / 1000, 1)} for (stage, name), (count, total, slowest) in totals.items()),
+            key=lambda row: -row['total_ms']
+        )
+
+    def log_summary(self):
+        with self.lock:
+            slowest = sorted((e for e in self.events if e['cat'] == 'webdriver'), key=lambda e: -e['dur'])
+        logger.info(f"🔬 Top {self.top_n} WebDriver commands/sleeps by total time:")
+        for row in self.summary()[:self.top_n]:
+            logger.info(f"   {row['stage']:>14} {row['name']:<28} {row['total_ms']:>9.1f} ms "
+                        f"(n={row['count']}, max {row['max_ms']} ms)")
+        logger.info(f"🔬 Top {self.top_n} slowest single commands:")
+        for event in slowest[:self.top_n]:
+            detail = event['args'].get('url') or event['args'].get('selector') or event['args'].get('script') or ''
+            logger.info(f"   {event['args']['stage']:>14} {event['name']:<28} {event['dur'] / 1000:>9.1f} ms {detail}")
+
+    def write_trace(self, folder, keep=20):
+        """Write chrome://tracing / Perfetto JSON and prune old traces; return the path"""
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            events = list(self.events)
+        threads = {(e['pid'], e['tid']): e['args']['thread'] for e in events}
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                    for (pid, tid), name in threads.items()]
+
+        path = folder / f"trace_{self.started_at:%Y%m%d_%H%M%S}.json"
+        path.write_text(json.dumps({
+            'traceEvents': metadata + events,
+            'displayTimeUnit': 'ms',
+            'otherData': {'started_at': self.started_at.isoformat(timespec='seconds'),
+                          'summary': self.summary()[:self.top_n]},
+        }))
+        for old in sorted(folder.glob('trace_*.json'))[:-keep]:
+            old.unlink(missing_ok=True)
+        return path
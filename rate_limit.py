@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Shared token-bucket rate limits for Railway CSV automation
+Separate budgets for browser navigation, export triggers and uploads, shared
+by every thread and coroutine in the process; a 429/503 halves the bucket's
+rate and honours Retry-After, successes restore it gradually
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+from requests.adapters import HTTPAdapter
+
+from metrics import Counter, Gauge, Histogram, timed_sleep
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_WAIT_SECONDS = Histogram('railway_rate_limit_wait_seconds', 'Time spent waiting for a rate limit token',
+                                    ['bucket'], buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30))
+RATE_LIMIT_THROTTLES = Counter('railway_rate_limit_throttles_total', '429/503 responses that slowed a bucket',
+                               ['bucket'])
+RATE_LIMIT_RATE = Gauge('railway_rate_limit_rate', 'Current allowed requests per second', ['bucket'])
+
+# Default (requests per second, burst) per bucket; RATE_LIMIT_<NAME>=0 disables a bucket
+DEFAULT_LIMITS = {
+    'navigation': (1.0, 3),
+    'export': (1.0, 3),
+    'upload': (10.0, 10),
+}
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header (delta seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Thread- and asyncio-safe token bucket with multiplicative slow-down on throttling
+
+    Callers reserve a token under a short lock (the balance may go negative)
+    and then sleep outside it, so waiters are served in arrival order.
+    """
+
+    def __init__(self, name, rate, burst, min_rate=None, max_delay=60):
+        self.name = name
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate or rate / 8
+        self.max_delay = max_delay
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+        if rate > 0:
+            RATE_LIMIT_RATE.set(rate, bucket=name)
+
+    def _reserve(self, tokens):
+        """Take tokens and return how long the caller must wait before using them"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= tokens
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    def acquire(self, tokens=1):
+        """Block the calling thread until `tokens` are available; return seconds waited"""
+        if self.base_rate <= 0:
+            return 0.0
+        wait = self._reserve(tokens)
+        if wait > 0:
+            timed_sleep(wait, f'rate_limit_{self.name}')
+        RATE_LIMIT_WAIT_SECONDS.observe(wait, bucket=self.name)
+        return wait
+
+    async def acquire_async(self, tokens=1):
+        """Coroutine version of acquire; sleeps without blocking the event loop"""
+        if self.base_rate <= 0:
+            return 0.0
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        RATE_LIMIT_WAIT_SECONDS.observe(wait, bucket=self.name)
+        return wait
+
+    def throttled(self, retry_after=None):
+        """Halve the rate and hold all callers for Retry-After (or one token interval)"""
+        if self.base_rate <= 0:
+            return
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            delay = min(self.max_delay, retry_after if retry_after is not None else 1 / self.rate)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            rate = self.rate
+        RATE_LIMIT_THROTTLES.inc(bucket=self.name)
+        RATE_LIMIT_RATE.set(rate, bucket=self.name)
+        logger.warning(f"🐢 Throttled on '{self.name}': slowing to {rate:.2f}/s, pausing {delay:.1f}s")
+
+    def succeeded(self):
+        """Recover 10% of the configured rate per successful request"""
+        if self.rate >= self.base_rate:
+            return
+        with self.lock:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * 0.1)
+            rate = self.rate
+        RATE_LIMIT_RATE.set(rate, bucket=self.name)
+
+    def observe(self, status_code, retry_after=None):
+        """Feed a response status back into the bucket"""
+        if status_code in THROTTLE_STATUSES:
+            self.throttled(parse_retry_after(retry_after))
+        elif status_code < 400:
+            self.succeeded()
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def limiter(name):
+    """Process-wide bucket for `name`, configured from RATE_LIMIT_<NAME>[_BURST]"""
+    with _buckets_lock:
+        if name not in _buckets:
+            default_rate, default_burst = DEFAULT_LIMITS[name]
+            rate = float(os.getenv(f'RATE_LIMIT_{name.upper()}', str(default_rate)))
+            burst = float(os.getenv(f'RATE_LIMIT_{name.upper()}_BURST', str(default_burst)))
+            _buckets[name] = TokenBucket(name, rate, max(1.0, burst))
+        return _buckets[name]
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """requests adapter that takes a token per request and reacts to 429/503"""
+
+    def __init__(self, bucket, **kwargs):
+        self.bucket = bucket
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        limiter(self.bucket).acquire()
+        response = super().send(request, **kwargs)
+        limiter(self.bucket).observe(response.status_code, response.headers.get('Retry-After'))
+        return response
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Reference SparkedHosting upload server for local testing
+Speaks the gzip chunked upload protocol used by ChunkedUploader as well as
+the legacy single-shot /upload-csv endpoint
+
+Usage: python reference_upload_server.py --port 5000 --storage /tmp/uploads
+       (then SPARKEDHOSTING_API_URL=http://localhost:5000/api UPLOAD_MODE=chunked)
+"""
+
+import re
+import gzip
+import json
+import uuid
+import email
+import time
+import random
+import shutil
+import hashlib
+import logging
+import argparse
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SESSION_PATH = re.compile(r'^/api/upload-sessions/([0-9a-f]+)(/complete)?$')
+
+
+class UploadStore:
+    """In-progress upload sessions and finished files on disk"""
+
+    def __init__(self, storage):
+        self.storage = Path(storage)
+        self.partial_dir = self.storage / '.partial'
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def create(self, filename, encoding):
+        upload_id = uuid.uuid4().hex
+        path = self.partial_dir / upload_id
+        path.touch()
+        with self.lock:
+            self.sessions[upload_id] = {'filename': Path(filename).name, 'encoding': encoding,
+                                        'path': path, 'offset': 0}
+        return upload_id
+
+    def append(self, upload_id, offset, data):
+        """Append a chunk at `offset`; return (accepted, current offset)"""
+        with self.lock:
+            session = self.sessions[upload_id]
+            if offset != session['offset']:
+                return False, session['offset']
+            with open(session['path'], 'ab') as f:
+                f.write(data)
+            session['offset'] += len(data)
+            return True, session['offset']
+
+    def complete(self, upload_id, size, sha256):
+        """Verify and decompress a finished upload into storage"""
+        with self.lock:
+            session = self.sessions.pop(upload_id)
+
+        digest = hashlib.sha256()
+        with open(session['path'], 'rb') as f:
+            for block in iter(lambda: f.read(64 * 1024), b''):
+                digest.update(block)
+        if session['offset'] != size or digest.hexdigest() != sha256:
+            session['path'].unlink()
+            raise ValueError("size or checksum mismatch")
+
+        target = self.storage / session['filename']
+        opener = gzip.open if session['encoding'] == 'gzip' else open
+        with opener(session['path'], 'rb') as src, open(target, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        session['path'].unlink()
+        return target
+
+
+class UploadHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    store = None
+    chunked = True
+    fail_rate = 0.0
+    latency = 0.0
+
+    def log_message(self, format, *args):
+        logger.info(format % args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        if self.latency:
+            time.sleep(self.latency)  # Simulated network/server latency
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        match = SESSION_PATH.match(self.path)
+        if not self.chunked or not match or match.group(1) not in self.store.sessions:
+            return self._send_json(404, {'error': 'not found'})
+        self._send_json(200, {'offset': self.store.sessions[match.group(1)]['offset']})
+
+    def do_PUT(self):
+        match = SESSION_PATH.match(self.path)
+        data = self._read_body()
+        if not self.chunked or not match or match.group(2) or match.group(1) not in self.store.sessions:
+            return self._send_json(404, {'error': 'not found'})
+
+        if random.random() < self.fail_rate:
+            # Simulate a transfer that dies mid-chunk
+            return self._send_json(503, {'error': 'injected failure'})
+
+        accepted, offset = self.store.append(match.group(1), int(self.headers.get('Upload-Offset', -1)), data)
+        self._send_json(200 if accepted else 409, {'offset': offset})
+
+    def do_POST(self):
+        body = self._read_body()
+
+        if self.path == '/api/upload-csv':
+            message = email.message_from_bytes(
+                b'Content-Type: ' + self.headers['Content-Type'].encode() + b'\r\n\r\n' + body)
+            saved = []
+            for part in message.get_payload():
+                target = self.store.storage / Path(part.get_filename()).name
+                target.write_bytes(part.get_payload(decode=True))
+                saved.append(target.name)
+            return self._send_json(200, {'saved': saved})
+
+        if self.path == '/api/automation-notification':
+            logger.info(f"🔔 Notification: {body.decode(errors='replace')}")
+            return self._send_json(200, {'ok': True})
+
+        if not self.chunked:
+            return self._send_json(404, {'error': 'not found'})
+
+        if self.path == '/api/upload-sessions':
+            request = json.loads(body)
+            upload_id = self.store.create(request['filename'], request.get('encoding', 'identity'))
+            return self._send_json(201, {'upload_id': upload_id, 'offset': 0})
+
+        match = SESSION_PATH.match(self.path)
+        if match and match.group(2) and match.group(1) in self.store.sessions:
+            request = json.loads(body)
+            try:
+                target = self.store.complete(match.group(1), request['size'], request['sha256'])
+            except ValueError as e:
+                return self._send_json(422, {'error': str(e)})
+            return self._send_json(200, {'saved': target.name})
+
+        self._send_json(404, {'error': 'not found'})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reference SparkedHosting upload server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--storage', default='/tmp/reference_uploads')
+    parser.add_argument('--legacy', action='store_true', help="only serve single-shot /upload-csv")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="fraction of chunk PUTs to fail")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="delay added to every request")
+    args = parser.parse_args()
+
+    UploadHandler.store = UploadStore(args.storage)
+    UploadHandler.chunked = not args.legacy
+    UploadHandler.fail_rate = args.fail_rate
+    UploadHandler.latency = args.latency_ms / 1000
+
+    server = ThreadingHTTPServer((args.host, args.port), UploadHandler)
+    logger.info(f"📦 Reference upload server on http://{args.host}:{args.port}/api "
+                f"(storage {args.storage}, chunked={'off' if args.legacy else 'on'})")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
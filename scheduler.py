@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Precise single-flight scheduler for Railway CSV automation
+Sleeps until the exact next run time, runs jobs on one worker thread so they
+never overlap, catches up on a run missed during a restart and accepts
+on-demand triggers over HTTP
+"""
+
+import json
+import hmac
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime, timedelta
+
+from metrics import Counter, Gauge, add_route
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_RUNS = Counter('railway_scheduler_runs_total', 'Runs started by the scheduler', ['reason'])
+SCHEDULER_COALESCED = Counter('railway_scheduler_coalesced_total', 'Run requests merged into an already queued run',
+                              ['reason'])
+SCHEDULER_QUEUED = Gauge('railway_scheduler_queued', 'Runs waiting for the worker')
+SCHEDULER_RUNNING = Gauge('railway_scheduler_running', '1 while a run is in progress')
+
+# Longest single timer; the next slot is recomputed after it, which absorbs clock changes
+MAX_TIMER_SECONDS = 3600
+
+
+def parse_run_times(value):
+    """Parse "09:00,21:00" into sorted (hour, minute) tuples"""
+    times = set()
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        hour, minute = (int(part) for part in item.split(':'))
+        if not (0 <= hour < 24 and 0 <= minute < 60):
+            raise ValueError(f"Invalid run time '{item}'")
+        times.add((hour, minute))
+    if not times:
+        raise ValueError("No run times configured")
+    return sorted(times)
+
+
+class Scheduler:
+    """Run `job()` at fixed daily times and on demand, at most one run at a time
+
+    Requests that arrive while a run is queued are merged into it, so a
+    trigger during a long run produces one follow-up run, not a backlog.
+    """
+
+    def __init__(self, job, run_times, state_path=None, catchup_hours=6, trigger_token=None):
+        self.job = job
+        self.run_times = run_times
+        self.state_path = Path(state_path) if state_path else None
+        self.catchup = timedelta(hours=catchup_hours)
+        self.trigger_token = trigger_token
+        self.cond = threading.Condition()
+        self.queued = None
+        self.running = None
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.state = self._load_state()
+
+    def _load_state(self):
+        if self.state_path and self.state_path.exists():
+            try:
+                return json.loads(self.state_path.read_text())
+            except Exception as e:
+                logger.warning(f"⚠️ Scheduler state unreadable, starting fresh: {e}")
+        return {}
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self.state, indent=1))
+        tmp_path.replace(self.state_path)
+
+    def _slot(self, day, hour, minute):
+        return datetime.combine(day, datetime.min.time()).replace(hour=hour, minute=minute)
+
+    def next_run(self, after=None):
+        """Next scheduled slot strictly after `after` (default now)"""
+        after = after or datetime.now()
+        for days in (0, 1):
+            day = after.date() + timedelta(days=days)
+            for hour, minute in self.run_times:
+                slot = self._slot(day, hour, minute)
+                if slot > after:
+                    return slot
+
+    def previous_run(self, before=None):
+        """Latest scheduled slot at or before `before` (default now)"""
+        before = before or datetime.now()
+        for days in (0, 1):
+            day = before.date() - timedelta(days=days)
+            for hour, minute in reversed(self.run_times):
+                slot = self._slot(day, hour, minute)
+                if slot <= before:
+                    return slot
+
+    def request_run(self, reason, slot=None):
+        """Queue a run; returns False if it was merged into an already queued run"""
+        with self.cond:
+            if self.queued:
+                if slot and (not self.queued['slot'] or slot > self.queued['slot']):
+                    self.queued['slot'] = slot
+                SCHEDULER_COALESCED.inc(reason=reason)
+                logger.info(f"🔗 Run request '{reason}' merged into queued '{self.queued['reason']}' run")
+                return False
+            self.queued = {'reason': reason, 'slot': slot, 'queued_at': datetime.now()}
+            SCHEDULER_QUEUED.set(1)
+            self.cond.notify_all()
+        logger.info(f"📥 Queued run ({reason})")
+        return True
+
+    def _missed_slot(self):
+        """The latest slot within the catch-up window that never ran, if any"""
+        slot = self.previous_run()
+        last_slot = self.state.get('last_slot')
+        if not last_slot or slot is None:
+            return None
+        if datetime.fromisoformat(last_slot) < slot and datetime.now() - slot <= self.catchup:
+            return slot
+        return None
+
+    def _timer_loop(self):
+        fired = self.previous_run()
+        while not self.stop_event.is_set():
+            slot = self.next_run(fired)
+            seconds = (slot - datetime.now()).total_seconds()
+            if seconds > 0:
+                self.stop_event.wait(min(seconds, MAX_TIMER_SECONDS))
+                continue
+            fired = slot
+            self.request_run('scheduled', slot)
+
+    def _worker_loop(self):
+        while True:
+            with self.cond:
+                while not self.queued and not self.stop_event.is_set():
+                    self.cond.wait()
+                if self.stop_event.is_set():
+                    return
+                request, self.queued = self.queued, None
+                self.running = dict(request, started_at=datetime.now())
+                SCHEDULER_QUEUED.set(0)
+                SCHEDULER_RUNNING.set(1)
+
+            SCHEDULER_RUNS.inc(reason=request['reason'])
+            self.state['last_started'] = datetime.now().isoformat(timespec='seconds')
+            self._save_state()
+            logger.info(f"▶️ Starting run ({request['reason']})")
+
+            success = False
+            try:
+                success = bool(self.job())
+            except Exception as e:
+                logger.error(f"❌ Run ({request['reason']}) raised: {e}")
+
+            icon = "✅" if success else "❌"
+            logger.info(f"{icon} Run ({request['reason']}) finished, success: {success}")
+            self.state.update(last_finished=datetime.now().isoformat(timespec='seconds'),
+                              last_success=success, last_reason=request['reason'])
+            # A slot counts as done once attempted; only runs lost to a restart are caught up
+            if request['slot'] and request['slot'].isoformat() > self.state.get('last_slot', ''):
+                self.state['last_slot'] = request['slot'].isoformat()
+            self._save_state()
+
+            with self.cond:
+                self.running = None
+                SCHEDULER_RUNNING.set(0)
+
+    def start(self, run_on_start=True):
+        """Start the timer and worker threads, queueing a startup or catch-up run if needed"""
+        missed = self._missed_slot()
+        if missed:
+            logger.info(f"⏰ Missed scheduled run at {missed:%Y-%m-%d %H:%M}, catching up")
+            self.request_run('catch-up', missed)
+        elif run_on_start:
+            self.request_run('startup')
+        if not self.state.get('last_slot'):
+            # First start: earlier slots predate this deployment, don't catch them up later
+            self.state['last_slot'] = self.previous_run().isoformat()
+            self._save_state()
+
+        for target, name in ((self._worker_loop, 'scheduler-worker'), (self._timer_loop, 'scheduler-timer')):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        logger.info(f"📅 Scheduler active, next run at {self.next_run():%Y-%m-%d %H:%M}")
+
+    def stop(self):
+        self.stop_event.set()
+        with self.cond:
+            self.cond.notify_all()
+
+    def wait(self):
+        """Block the calling thread until the scheduler is stopped"""
+        self.stop_event.wait()
+
+    def status(self):
+        def describe(request):
+            if not request:
+                return None
+            return {key: value.isoformat(timespec='seconds') if isinstance(value, datetime) else value
+                    for key, value in request.items()}
+
+        with self.cond:
+            return {
+                'running': describe(self.running),
+                'queued': [describe(self.queued)] if self.queued else [],
+                'next_run': self.next_run().isoformat(timespec='seconds'),
+                'last_run': {key: self.state.get(key) for key in
+                             ('last_started', 'last_finished', 'last_success', 'last_reason', 'last_slot')},
+            }
+
+    def _authorized(self, handler):
+        if not self.trigger_token:
+            return False
+        header = handler.headers.get('Authorization', '')
+        return hmac.compare_digest(header.removeprefix('Bearer ').strip(), self.trigger_token)
+
+    def _trigger_route(self, handler):
+        if not self._authorized(handler):
+            body = {'error': 'unauthorized' if self.trigger_token else 'set TRIGGER_TOKEN to enable triggers'}
+            return 403, 'application/json', json.dumps(body)
+        queued = self.request_run('http')
+        return 202, 'application/json', json.dumps({'accepted': queued, **self.status()})
+
+    def _status_route(self, handler):
+        return 200, 'application/json', json.dumps(self.status())
+
+    def register_routes(self):
+        """Expose POST /trigger and GET /jobs on the metrics server"""
+        add_route('POST', '/trigger', self._trigger_route)
+        add_route('GET', '/jobs', self._status_route)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Learned selector cache with batched DOM discovery
+All candidate XPaths for a step are evaluated in one execute_script round
+trip, and the selector that worked last time is tried first on later runs
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# arguments: [selectors, clickable, find_all] -> [winning index or -1, elements]
+BATCH_XPATH_SCRIPT = """
+var selectors = arguments[0], clickable = arguments[1], findAll = arguments[2];
+function usable(el) {
+    return !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length) && !el.disabled;
+}
+var winner = -1, found = [], seen = new Set();
+for (var i = 0; i < selectors.length; i++) {
+    var result;
+    try {
+        result = document.evaluate(selectors[i], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    } catch (e) {
+        continue;
+    }
+    for (var j = 0; j < result.snapshotLength; j++) {
+        var el = result.snapshotItem(j);
+        if (el.nodeType !== 1 || (clickable && !usable(el))) continue;
+        if (winner < 0) winner = i;
+        if (!findAll) return [i, [el]];
+        if (!seen.has(el)) { seen.add(el); found.push(el); }
+    }
+}
+return [winner, found];
+"""
+
+
+def find_candidates(driver, selectors, clickable=False, find_all=False):
+    """Evaluate all selectors in one round trip; return (winning selector or None, elements)"""
+    index, elements = driver.execute_script(BATCH_XPATH_SCRIPT, list(selectors), clickable, find_all)
+    return (selectors[index] if index >= 0 else None), elements or []
+
+
+class SelectorCache:
+    """Persistent record of the selector that last matched for each navigation step"""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self.lock = threading.Lock()
+        self.entries = {}
+        if self.path and self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text())
+            except Exception as e:
+                logger.warning(f"⚠️ Selector cache unreadable, starting fresh: {e}")
+
+    def order(self, step, selectors):
+        """Return the candidates with the learned winner first
+
+        Entries whose selector is no longer a candidate are dropped.
+        """
+        with self.lock:
+            entry = self.entries.get(step)
+            if not entry:
+                return list(selectors)
+            if entry['selector'] not in selectors:
+                del self.entries[step]
+                return list(selectors)
+        return [entry['selector']] + [s for s in selectors if s != entry['selector']]
+
+    def cached(self, step):
+        with self.lock:
+            entry = self.entries.get(step)
+            return entry['selector'] if entry else None
+
+    def record(self, step, selector):
+        """Remember the selector that matched; a different winner replaces a stale entry"""
+        with self.lock:
+            entry = self.entries.get(step)
+            if entry and entry['selector'] != selector:
+                logger.info(f"🔁 Page layout changed for '{step}': {entry['selector']} -> {selector}")
+                entry = None
+            entry = entry or {'selector': selector, 'hits': 0}
+            entry['hits'] += 1
+            entry['last_used'] = datetime.now().isoformat(timespec='seconds')
+            self.entries[step] = entry
+
+    def invalidate(self, step):
+        """Drop a step's entry after its selector stopped matching"""
+        with self.lock:
+            if self.entries.pop(step, None):
+                logger.info(f"🗑️ Dropped stale selector cache entry for '{step}'")
+
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(self.entries, indent=1))
+            tmp_path.replace(self.path)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Encrypted on-disk cache of an authenticated Roblox browser session
+Lets warm runs skip safe_login while the cached cookies are still valid
+"""
+
+import json
+import base64
+import logging
+from pathlib import Path
+
+import requests
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+logger = logging.getLogger(__name__)
+
+# Cheap authenticated endpoint on the users API: 200 with a valid .ROBLOSECURITY cookie, 401 otherwise
+USERS_API_URL = "https://users.roblox.com"
+AUTH_CHECK_PATH = "/v1/users/authenticated"
+
+COOKIE_FIELDS = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'expiry', 'sameSite')
+
+
+def derive_key(secret, salt):
+    """Derive a Fernet key from a secret when no SESSION_CACHE_KEY is configured"""
+    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt.encode(), iterations=200_000)
+    return base64.urlsafe_b64encode(kdf.derive(secret.encode()))
+
+
+class SessionCache:
+    """Save and restore cookies and local storage from a successful login
+
+    Cached cookies are checked against `users_url` (ROBLOX_USERS_URL) before
+    they are restored.
+    """
+
+    def __init__(self, path, key, max_age_hours=24, users_url=USERS_API_URL):
+        self.path = Path(path)
+        self.fernet = Fernet(key)
+        self.max_age_seconds = int(max_age_hours * 3600)
+        self.auth_check_url = users_url.rstrip('/') + AUTH_CHECK_PATH
+
+    def save(self, driver):
+        """Encrypt the driver's current cookies and local storage to disk"""
+        state = {
+            'cookies': driver.get_cookies(),
+            'origin': driver.execute_script("return window.location.origin;"),
+            'local_storage': driver.execute_script(
+                "var items = {};"
+                "for (var i = 0; i < localStorage.length; i++) {"
+                "  var k = localStorage.key(i); items[k] = localStorage.getItem(k);"
+                "}"
+                "return items;"
+            ) or {},
+        }
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_bytes(self.fernet.encrypt(json.dumps(state).encode()))
+        tmp_path.chmod(0o600)
+        tmp_path.replace(self.path)
+        logger.info(f"💾 Session cached ({len(state['cookies'])} cookies, "
+                    f"{len(state['local_storage'])} local storage keys)")
+
+    def load(self):
+        """Return the cached state, or None if missing, expired or unreadable"""
+        if not self.path.exists():
+            logger.info("📭 No cached session found")
+            return None
+
+        try:
+            token = self.path.read_bytes()
+            return json.loads(self.fernet.decrypt(token, ttl=self.max_age_seconds))
+        except InvalidToken:
+            # Raised for both a wrong key and an expired token
+            logger.info("⌛ Cached session expired or unreadable, discarding")
+            self.clear()
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read session cache: {e}")
+            return None
+
+    def is_valid(self, state):
+        """Confirm the cached cookies are still authenticated with one cheap request"""
+        cookies = {c['name']: c['value'] for c in state['cookies']}
+        try:
+            response = requests.get(self.auth_check_url, cookies=cookies, timeout=10)
+            return response.status_code == 200
+        except Exception as e:
+            logger.warning(f"⚠️ Session validation request failed: {e}")
+            return False
+
+    def restore(self, driver):
+        """Load cached state into the driver; return True if the session is usable"""
+        state = self.load()
+        if not state:
+            return False
+
+        if not self.is_valid(state):
+            logger.info("🔒 Cached session no longer authenticated, discarding")
+            self.clear()
+            return False
+
+        # Cookies and local storage can only be set on a page of their origin
+        driver.get(state['origin'])
+        for cookie in state['cookies']:
+            cookie = {k: v for k, v in cookie.items() if k in COOKIE_FIELDS}
+            if cookie.get('sameSite') not in (None, 'Strict', 'Lax', 'None'):
+                del cookie['sameSite']
+            try:
+                driver.add_cookie(cookie)
+            except Exception as e:
+                logger.debug(f"Skipping cookie {cookie.get('name')}: {e}")
+
+        driver.execute_script(
+            "var items = arguments[0];"
+            "for (var k in items) { localStorage.setItem(k, items[k]); }",
+            state['local_storage']
+        )
+        logger.info("♻️ Restored cached session")
+        return True
+
+    def clear(self):
+        """Remove the cached session from disk"""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Warm standby WebDriver session for scheduled runs
+Opens a remote browser session shortly before each scheduled run, keeps it
+alive with cheap pings and hands it over ready to use
+"""
+
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+POOL_HANDOFFS = Counter('railway_session_pool_handoffs_total', 'Standby session requests by outcome', ['outcome'])
+POOL_STANDBY = Gauge('railway_session_pool_standby', 'Warm standby sessions currently held')
+
+
+class StandbySession:
+    def __init__(self, driver, slot=None, logged_in=False):
+        self.driver = driver
+        self.slot = slot  # the scheduled run it was opened for
+        self.logged_in = logged_in
+        self.opened_at = time.monotonic()
+
+    def ping(self):
+        """Cheap round trip that also resets the Grid's session idle timer"""
+        self.driver.execute_script("return 1;")
+
+    def close(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.debug(f"Standby session quit failed: {e}")
+
+
+class WarmSessionPool:
+    """Open one prepared session `lead` before the next run and hold it until it is used or goes stale
+
+    create_session() returns a configured driver; prepare(driver), if given,
+    returns True once it has logged the session in. next_run_at() returns the
+    next scheduled run as a naive local datetime, or None. Once opened, a
+    standby is kept for the slot it was opened for until a run takes it,
+    it has been held for max_idle or a ping fails, so preflight and outbox
+    work at the start of that run can't outlast it.
+    """
+
+    def __init__(self, create_session, prepare=None, lead_minutes=5, max_idle_minutes=15, ping_seconds=60):
+        self.create_session = create_session
+        self.prepare = prepare
+        self.lead = timedelta(minutes=lead_minutes)
+        self.max_idle = max_idle_minutes * 60
+        self.ping_seconds = ping_seconds
+        self.next_run_at = lambda: None
+        self.lock = threading.Lock()
+        self.standby = None
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self, next_run_at):
+        self.next_run_at = next_run_at
+        self.thread = threading.Thread(target=self._loop, name='session-pool', daemon=True)
+        self.thread.start()
+        logger.info(f"🔥 Warm session pool active (lead {self.lead}, max idle {self.max_idle / 60:g} min)")
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        self._discard("pool stopped")
+
+    def acquire(self):
+        """Take the standby session if it is still alive; returns a StandbySession or None"""
+        with self.lock:
+            standby, self.standby = self.standby, None
+            POOL_STANDBY.set(0)
+        if not standby:
+            POOL_HANDOFFS.inc(outcome='miss')
+            return None
+        try:
+            standby.ping()
+        except Exception as e:
+            logger.warning(f"⚠️ Standby session died before handoff, recycling: {e}")
+            standby.close()
+            POOL_HANDOFFS.inc(outcome='dead')
+            return None
+        POOL_HANDOFFS.inc(outcome='hit')
+        logger.info(f"🔥 Handing over warm session for {standby.slot:%H:%M} "
+                    f"(held {time.monotonic() - standby.opened_at:.0f}s, logged in: {standby.logged_in})")
+        return standby
+
+    def _discard(self, reason):
+        with self.lock:
+            standby, self.standby = self.standby, None
+            POOL_STANDBY.set(0)
+        if standby:
+            logger.info(f"🧊 Closing standby session: {reason}")
+            standby.close()
+
+    def _due_slot(self):
+        """The next scheduled run if it starts within `lead`, else None"""
+        next_run = self.next_run_at()
+        if next_run is not None and next_run - self.lead <= datetime.now():
+            return next_run
+        return None
+
+    def _open(self, slot):
+        driver = self.create_session()
+        standby = StandbySession(driver, slot)
+        if self.prepare:
+            try:
+                standby.logged_in = bool(self.prepare(driver))
+            except Exception as e:
+                logger.warning(f"⚠️ Standby session preparation failed: {e}")
+        with self.lock:
+            self.standby = standby
+            POOL_STANDBY.set(1)
+        logger.info(f"🔥 Warm standby session ready for {slot:%H:%M} (logged in: {standby.logged_in})")
+
+    def _tick(self):
+        with self.lock:
+            standby = self.standby
+
+        if standby is None:
+            slot = self._due_slot()
+            if slot:
+                try:
+                    self._open(slot)
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not open standby session: {e}")
+            return
+
+        # Not measured against next_run_at(): that moves on as soon as the slot's time passes,
+        # while the run it was opened for may still be in preflight
+        if time.monotonic() - standby.opened_at > self.max_idle:
+            self._discard("max idle time reached")
+            return
+        try:
+            standby.ping()
+        except Exception as e:
+            # Replaced on the next tick if the next run is still within `lead`
+            self._discard(f"ping failed ({e})")
+
+    def _loop(self):
+        while not self.stop_event.is_set():
+            try:
+                self._tick()
+            except Exception as e:
+                logger.warning(f"⚠️ Session pool error: {e}")
+            self.stop_event.wait(self.ping_seconds)
@@ -0,0 +1,34 @@
+"""Shared fixtures for the offline test suite (python -m pytest -q from the repository root)"""
+
+import sys
+import threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+# The automation modules live flat at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from reference_upload_server import UploadHandler, UploadStore  # noqa: E402
+
+
+@pytest.fixture
+def upload_api(tmp_path):
+    """Start the reference upload server; call with handler/store overrides, get (api_url, store)"""
+    servers = []
+
+    def start(handler=UploadHandler, store=None, **attributes):
+        store = store or UploadStore(tmp_path / 'received')
+        handler = type('TestUploadHandler', (handler,), dict(
+            attributes, store=store, log_message=lambda *args: None))
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}/api", store
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
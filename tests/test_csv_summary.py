@@ -0,0 +1,80 @@
+"""Streaming CSV validation and summaries"""
+
+import pytest
+
+from csv_summary import ExportValidator, load_schemas, parse_number, summarize_csv
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+    return path
+
+
+@pytest.mark.parametrize('cell, expected', [
+    ("1,234", 1234.0), ("12.5%", 12.5), ("$3", 3.0), (" 7 ", 7.0), ("", None), ("n/a", None), ("inf", None),
+])
+def test_parse_number(cell, expected):
+    assert parse_number(cell) == expected
+
+
+def test_clean_export_summary(tmp_path):
+    path = write(tmp_path, "123__Retention_2024-03-05.csv",
+                 "Date,D1 Retention,Visits,Segment\n"
+                 "2024-03-03,40%,1000,All\n"
+                 "2024-03-05,50%,\"1,500\",All\n"
+                 "2024-03-04,45%,,All\n")
+
+    summary = summarize_csv(path)
+
+    assert summary['problems'] == []
+    assert (summary['experience'], summary['report']) == ('123', 'retention')
+    assert (summary['rows'], summary['columns']) == (3, 4)
+    assert (summary['date_from'], summary['date_to']) == ('2024-03-03', '2024-03-05')
+    assert summary['metrics']['D1 Retention'] == {'count': 3, 'sum': 135.0, 'min': 40.0, 'max': 50.0,
+                                                  'mean': 45.0, 'missing': 0}
+    assert summary['metrics']['Visits']['count'] == 2
+    assert summary['metrics']['Visits']['missing'] == 1
+    assert 'Segment' not in summary['metrics']
+
+
+@pytest.mark.parametrize('text, problem', [
+    ("", 'empty'),
+    ("Date,Visits\n", 'empty'),
+    ("Date,Visits\n2024-03-03,10\n2024-03-04", 'truncated'),
+    ("Date,Visits\n2024-03-03,10\n2024-03-04,\"1", 'truncated'),
+    ("Date,Visits\n2024-03-03,10\n2024-03-04,1,2\n2024-03-05,3\n", 'ragged'),
+])
+def test_problems(tmp_path, text, problem):
+    assert problem in summarize_csv(write(tmp_path, "Engagement.csv", text))['problems']
+
+
+def test_cut_off_last_row_is_not_counted(tmp_path):
+    summary = summarize_csv(write(tmp_path, "Engagement.csv", "Date,Visits,Plays\n2024-03-03,10,1\n2024-03-04,20"))
+    assert summary['problems'] == ['truncated']
+    assert summary['rows'] == 1
+
+
+def test_schema_hints(tmp_path):
+    summary = summarize_csv(write(tmp_path, "Retention.csv", "Date,Visits\n2024-03-03,10\n"))
+    assert summary['problems'] == ['schema']
+    assert summary['missing_columns'] == ['retention']
+
+    schemas = load_schemas('{"Retention": ["Visits"]}')
+    assert summarize_csv(tmp_path / "Retention.csv", schemas)['problems'] == []
+
+
+def test_strict_mode_holds_back_blocking_problems(tmp_path):
+    good = write(tmp_path, "Engagement.csv", "Date,Visits\n2024-03-03,10\n")
+    empty = write(tmp_path, "Monetization.csv", "")
+    ragged = write(tmp_path, "Acquisition.csv", "Date,Visits\n2024-03-03,10,1\n2024-03-04,20\n")
+
+    strict = ExportValidator('strict')
+    assert strict.validate([good, empty, ragged]) == [good, ragged]
+    assert [s['file'] for s in strict.flagged()] == ["Monetization.csv", "Acquisition.csv"]
+    assert ExportValidator('warn').validate([good, empty, ragged]) == [good, empty, ragged]
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError, match="Unknown CSV_VALIDATION mode"):
+        ExportValidator('stirct')
@@ -0,0 +1,85 @@
+"""Per-report date watermarks and delta extraction"""
+
+import csv
+from datetime import date
+
+from deltas import DeltaExtractor, WatermarkStore, find_date_column, parse_date
+
+
+def write_rows(path, rows):
+    with open(path, 'w', newline='') as f:
+        csv.writer(f).writerows(rows)
+    return path
+
+
+def read_back(path):
+    with open(path, newline='') as f:
+        return list(csv.reader(f))
+
+
+def test_parse_date_formats():
+    assert parse_date("2024-03-05") == date(2024, 3, 5)
+    assert parse_date("2024-03-05T10:00:00Z") == date(2024, 3, 5)
+    assert parse_date("03/05/2024") == date(2024, 3, 5)
+    assert parse_date("Mar 05, 2024") == date(2024, 3, 5)
+    assert parse_date("Total") is None
+
+
+def test_find_date_column_needs_a_parsable_value():
+    assert find_date_column(["Visits", "Date"], ["10", "2024-03-05"]) == 1
+    assert find_date_column(["Update time", "Day"], ["n/a", "2024-03-05"]) == 1
+    assert find_date_column(["Visits", "Revenue"], ["10", "2"]) is None
+
+
+def test_first_run_keeps_everything_and_commits_the_newest_date(tmp_path):
+    export = write_rows(tmp_path / "Retention.csv",
+                        [["Date", "Retention"], ["2024-03-01", "0.4"], ["2024-03-05", "0.5"]])
+    store = WatermarkStore(tmp_path / 'watermarks.json')
+    extractor = DeltaExtractor(store, tmp_path / 'deltas')
+
+    delta = extractor.extract(export)
+
+    assert read_back(delta) == read_back(export)
+    assert store.get('default:retention') is None  # only after delivery
+    extractor.commit(delta)
+    assert WatermarkStore(tmp_path / 'watermarks.json').get('default:retention') == date(2024, 3, 5)
+
+
+def test_later_run_sends_rows_inside_the_overlap_and_undated_rows(tmp_path):
+    store = WatermarkStore(tmp_path / 'watermarks.json')
+    store.advance('default:retention', date(2024, 3, 10))
+    export = write_rows(tmp_path / "Retention.csv", [
+        ["Date", "Retention"], ["2024-03-01", "0.1"], ["2024-03-07", "0.2"],
+        ["2024-03-11", "0.3"], ["Total", "0.6"],
+    ])
+    extractor = DeltaExtractor(store, tmp_path / 'deltas', overlap_days=3)
+
+    delta = extractor.extract(export)
+
+    assert read_back(delta) == [["Date", "Retention"], ["2024-03-07", "0.2"], ["2024-03-11", "0.3"], ["Total", "0.6"]]
+    assert extractor.pending[delta] == ('default:retention', date(2024, 3, 11))
+
+
+def test_nothing_new_returns_none(tmp_path):
+    store = WatermarkStore(tmp_path / 'watermarks.json')
+    store.advance('default:retention', date(2024, 3, 10))
+    export = write_rows(tmp_path / "Retention.csv", [["Date", "Retention"], ["2024-03-01", "0.1"]])
+    extractor = DeltaExtractor(store, tmp_path / 'deltas', overlap_days=3)
+
+    assert extractor.extract(export) is None
+    assert not list((tmp_path / 'deltas').iterdir())
+    assert extractor.pending == {}
+    assert store.get('default:retention') == date(2024, 3, 10)
+
+
+def test_file_without_date_column_is_sent_whole(tmp_path):
+    export = write_rows(tmp_path / "Acquisition.csv", [["Source", "Visits"], ["search", "10"]])
+    extractor = DeltaExtractor(WatermarkStore(tmp_path / 'watermarks.json'), tmp_path / 'deltas')
+    assert extractor.extract(export) == export
+
+
+def test_watermark_never_moves_backwards(tmp_path):
+    store = WatermarkStore(tmp_path / 'watermarks.json')
+    store.advance('default:retention', date(2024, 3, 10))
+    store.advance('default:retention', date(2024, 3, 1))
+    assert WatermarkStore(tmp_path / 'watermarks.json').get('default:retention') == date(2024, 3, 10)
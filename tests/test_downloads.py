@@ -0,0 +1,93 @@
+"""Download completion detection in the local folder and on a Grid node"""
+
+import time
+import threading
+
+from downloads import DownloadWatcher, GridDownloadFetcher
+
+
+def later(seconds, action):
+    timer = threading.Timer(seconds, action)
+    timer.start()
+    return timer
+
+
+def make_watcher(folder, **kwargs):
+    return DownloadWatcher(folder, **dict(dict(stable_seconds=0.2, poll_interval=0.05, idle_timeout=0.5), **kwargs))
+
+
+def test_late_file_is_waited_for_when_expected(tmp_path):
+    watcher = make_watcher(tmp_path)
+    later(1.0, lambda: (tmp_path / "Retention.csv").write_text("Date,Retention\n"))
+
+    started = time.monotonic()
+    files = list(watcher.wait_for_files(expected=1, timeout=5))
+
+    assert [f.name for f in files] == ["Retention.csv"]
+    assert time.monotonic() - started < 3
+
+
+def test_partial_download_is_reported_after_rename(tmp_path):
+    partial = tmp_path / "Engagement.csv.crdownload"
+    partial.write_text("Date,Visits\n")
+    watcher = make_watcher(tmp_path)
+
+    def finish():
+        partial.write_text("Date,Visits\n2024-03-05,10\n")
+        partial.rename(tmp_path / "Engagement.csv")
+
+    later(0.8, finish)
+    files = list(watcher.wait_for_files(expected=1, timeout=5))
+
+    assert [f.name for f in files] == ["Engagement.csv"]
+    assert files[0].read_text() == "Date,Visits\n2024-03-05,10\n"
+
+
+def test_stops_once_the_expected_count_is_reached(tmp_path):
+    (tmp_path / "Old.csv").write_text("already here\n")
+    watcher = make_watcher(tmp_path, idle_timeout=60)
+    (tmp_path / "A.csv").write_text("a\n")
+    (tmp_path / "B.csv").write_text("b\n")
+
+    started = time.monotonic()
+    files = list(watcher.wait_for_files(expected=2, timeout=30))
+
+    assert sorted(f.name for f in files) == ["A.csv", "B.csv"]
+    assert time.monotonic() - started < 2
+
+
+def test_idle_stop_only_without_an_expected_count(tmp_path):
+    watcher = make_watcher(tmp_path)
+    started = time.monotonic()
+    assert list(watcher.wait_for_files(timeout=5)) == []
+    assert time.monotonic() - started < 1.5
+
+    started = time.monotonic()
+    assert list(watcher.wait_for_files(expected=1, timeout=1.5)) == []
+    assert time.monotonic() - started >= 1.5
+
+
+class FakeNodeFetcher(GridDownloadFetcher):
+    """Node file listing driven by the test instead of a Grid"""
+
+    def __init__(self, download_folder):
+        super().__init__('http://grid', 'session', download_folder, poll_interval=0.05, idle_timeout=0.5)
+        self.names = []
+
+    def list_files(self):
+        return list(self.names)
+
+    def fetch(self, name):
+        path = self.download_folder / name
+        path.write_text("fetched\n")
+        return path
+
+
+def test_grid_fetcher_waits_for_a_late_file_when_expected(tmp_path):
+    fetcher = FakeNodeFetcher(tmp_path)
+    later(1.0, lambda: fetcher.names.append("Retention.csv.crdownload"))
+    later(1.3, lambda: fetcher.names.__setitem__(0, "Retention.csv"))
+
+    files = list(fetcher.wait_for_files(expected=1, timeout=5))
+
+    assert [f.name for f in files] == ["Retention.csv"]
@@ -0,0 +1,94 @@
+"""Columnar history store"""
+
+import json
+import math
+from datetime import date
+
+from history_store import HistoryStore
+
+
+def write(folder, name, text):
+    path = folder / name
+    path.write_text(text)
+    return path
+
+
+class Request:
+    def __init__(self, path):
+        self.path = path
+
+
+def test_ingest_and_query(tmp_path):
+    store = HistoryStore(tmp_path / 'history')
+    export = write(tmp_path, "123__Engagement_2024-03-05.csv",
+                   "Date,Visits,Playtime\n2024-03-01,10,1.5\n2024-03-03,30,n/a\nTotal,40,\n")
+
+    assert store.ingest(export) == 2
+
+    assert store.series('123', 'Engagement', 'visits') == [(date(2024, 3, 1), 10.0), (date(2024, 3, 3), 30.0)]
+    assert store.series('123', 'engagement', 'Playtime') == [(date(2024, 3, 1), 1.5)]
+    assert store.series('123', 'engagement', 'Visits', start=date(2024, 3, 2)) == [(date(2024, 3, 3), 30.0)]
+    assert store.series('999', 'engagement', 'Visits') == []
+    assert store.aggregate('engagement', 'Visits') == {'123': {
+        'count': 2, 'sum': 40.0, 'min': 10.0, 'max': 30.0, 'mean': 20.0,
+        'first': '2024-03-01', 'last': '2024-03-03'}}
+
+
+def test_reingest_overwrites_days_and_backfills(tmp_path):
+    store = HistoryStore(tmp_path / 'history')
+    store.ingest(write(tmp_path, "123__Engagement.csv", "Date,Visits\n2024-03-05,50\n2024-03-06,60\n"))
+    # Overlapping re-export with a corrected day, an earlier day and a new metric
+    store.ingest(write(tmp_path, "123__Engagement.csv",
+                       "Date,Visits,Plays\n2024-03-02,20,2\n2024-03-06,66,6\n"))
+
+    assert store.series('123', 'engagement', 'Visits') == [
+        (date(2024, 3, 2), 20.0), (date(2024, 3, 5), 50.0), (date(2024, 3, 6), 66.0)]
+    assert store.series('123', 'engagement', 'Plays') == [(date(2024, 3, 2), 2.0), (date(2024, 3, 6), 6.0)]
+    (series,) = store.catalog()
+    assert (series['from'], series['to']) == ('2024-03-02', '2024-03-06')
+
+
+def test_persists_across_reopen(tmp_path):
+    store = HistoryStore(tmp_path / 'history')
+    store.ingest(write(tmp_path, "123__Engagement.csv", "Date,Visits\n2024-03-05,50\n"))
+    store.ingest(write(tmp_path, "456__Engagement.csv", "Date,Visits\n2024-03-05,7\n"))
+    store.close()
+
+    reopened = HistoryStore(tmp_path / 'history')
+    assert reopened.series('123', 'engagement', 'Visits') == [(date(2024, 3, 5), 50.0)]
+    assert set(reopened.aggregate('engagement', 'Visits')) == {'123', '456'}
+    assert set(reopened.aggregate('engagement', 'Visits', experiences=['456'])) == {'456'}
+
+
+def test_files_without_dates_are_not_kept(tmp_path):
+    store = HistoryStore(tmp_path / 'history')
+    assert store.ingest(write(tmp_path, "Acquisition.csv", "Source,Visits\nsearch,10\n")) == 0
+    assert store.ingest(write(tmp_path, "Empty.csv", "")) == 0
+    assert store.catalog() == []
+
+
+def test_missing_days_are_nan_cells(tmp_path):
+    store = HistoryStore(tmp_path / 'history')
+    store.ingest(write(tmp_path, "123__Engagement.csv", "Date,Visits\n2024-03-01,1\n2024-03-04,4\n"))
+    (series,) = store.index['series'].values()
+    _, values = store._values(series, 'Visits')
+    assert [v for v in values if not math.isnan(v)] == [1.0, 4.0]
+    assert len(values) == 4
+
+
+def test_history_route(tmp_path):
+    store = HistoryStore(tmp_path / 'history')
+    store.ingest(write(tmp_path, "123__Engagement.csv", "Date,Visits\n2024-03-05,50\n2024-03-06,60\n"))
+
+    status, _, body = store._history_route(Request('/history'))
+    assert status == 200 and json.loads(body)['series'][0]['metrics'] == ['Visits']
+
+    status, _, body = store._history_route(
+        Request('/history?report=engagement&metric=visits&experience=123&from=2024-03-06'))
+    assert json.loads(body) == {'points': [['2024-03-06', 60.0]]}
+
+    status, _, body = store._history_route(Request('/history?report=engagement&metric=visits'))
+    assert json.loads(body)['experiences']['123']['sum'] == 110.0
+
+    status, _, _ = store._history_route(Request('/history?report=engagement&metric=visits&from=March'))
+    assert status == 400
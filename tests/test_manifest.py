@@ -0,0 +1,66 @@
+"""Content-hash upload manifest"""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+from manifest import UploadManifest, describe_csv
+
+
+def test_describe_csv_strips_tag_and_date_suffix():
+    assert describe_csv("12345__Retention_2024-01-01_2024-01-31.csv") == ('12345', 'retention')
+    assert describe_csv("Engagement 20240101.csv") == ('default', 'engagement')
+    assert describe_csv("Monetization.csv") == ('default', 'monetization')
+
+
+def test_unchanged_content_is_skipped_after_reload(tmp_path):
+    export = tmp_path / "12345__Retention_2024-01-31.csv"
+    export.write_text("Date,Retention\n2024-01-31,0.4\n")
+    manifest = UploadManifest(tmp_path / 'manifest.json')
+    manifest.record(export)
+    manifest.save()
+
+    # Same report re-exported under a new date suffix with the same bytes
+    again = tmp_path / "12345__Retention_2024-02-01.csv"
+    again.write_text(export.read_text())
+    changed = tmp_path / "12345__Retention_2024-02-02.csv"
+    changed.write_text("Date,Retention\n2024-02-01,0.5\n")
+    other_experience = tmp_path / "999__Retention_2024-01-31.csv"
+    other_experience.write_text(export.read_text())
+
+    to_upload, skipped = UploadManifest(tmp_path / 'manifest.json').partition([again, changed, other_experience])
+
+    assert skipped == [(again, again.stat().st_size)]
+    assert to_upload == [changed, other_experience]
+
+
+def test_fingerprint_follows_file_changes(tmp_path):
+    export = tmp_path / "Retention.csv"
+    export.write_text("Date,Retention\n2024-01-31,0.4\n")
+    manifest = UploadManifest(tmp_path / 'manifest.json')
+    before = manifest.fingerprint(export)
+    assert manifest.fingerprint(export) is before
+
+    export.write_text("Date,Retention\n2024-01-31,0.45\n")
+    os.utime(export, ns=(0, export.stat().st_mtime_ns + 1))
+    assert manifest.fingerprint(export)[3] != before[3]
+
+
+def test_save_drops_expired_entries(tmp_path):
+    path = tmp_path / 'manifest.json'
+    old = (datetime.now() - timedelta(days=31)).isoformat(timespec='seconds')
+    path.write_text(json.dumps({'default:retention:abc': {'uploaded_at': old}}))
+    manifest = UploadManifest(path, retention_days=30)
+    export = tmp_path / "Retention.csv"
+    export.write_text("Date,Retention\n2024-01-31,0.4\n")
+    manifest.record(export)
+
+    manifest.save()
+
+    assert list(json.loads(path.read_text())) == [manifest.fingerprint(export)[0]]
+
+
+def test_unreadable_manifest_starts_fresh(tmp_path):
+    path = tmp_path / 'manifest.json'
+    path.write_text("{not json")
+    assert UploadManifest(path).entries == {}
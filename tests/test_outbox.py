@@ -0,0 +1,91 @@
+"""Durable upload outbox"""
+
+from datetime import date
+
+from outbox import EMPTY_FILE_ERROR, UploadOutbox
+
+
+def make_outbox(tmp_path, **kwargs):
+    return UploadOutbox(tmp_path / 'state' / 'outbox.db', tmp_path / 'state' / 'spool', **kwargs)
+
+
+def export(folder, name, text="Date,Visits\n2024-03-05,10\n"):
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / name
+    path.write_text(text)
+    return path
+
+
+def statuses(outbox):
+    return dict(outbox.db.execute("SELECT name, status FROM outbox"))
+
+
+def test_empty_files_are_never_queued(tmp_path):
+    outbox = make_outbox(tmp_path)
+    empty = export(tmp_path / 'downloads', "Empty.csv", "")
+    outbox.add([empty, tmp_path / 'downloads' / "Missing.csv"])
+    assert statuses(outbox) == {}
+
+
+def test_empty_file_failure_is_terminal(tmp_path):
+    outbox = make_outbox(tmp_path)
+    path = export(tmp_path / 'downloads', "Retention.csv")
+    outbox.add([path])
+    path.write_text("")
+
+    outbox.complete([], {str(path): EMPTY_FILE_ERROR})
+
+    assert statuses(outbox) == {}
+    assert outbox.refresh_gauges() == 0
+
+
+def test_failed_file_is_spooled_and_its_watermark_survives(tmp_path):
+    outbox = make_outbox(tmp_path)
+    path = export(tmp_path / 'downloads', "Retention.csv")
+    outbox.add([path], {str(path): ('default:retention', date(2024, 3, 5))})
+
+    outbox.complete([], {str(path): "HTTP 503"})
+
+    assert not path.exists()
+    (spooled,) = (tmp_path / 'state' / 'spool').rglob('*.csv')
+    assert outbox.due() == []  # backing off
+    outbox.db.execute("UPDATE outbox SET next_attempt_at = 0")
+
+    # A later run (fresh outbox object) delivers it from the spool
+    later = make_outbox(tmp_path)
+    assert later.due() == [str(spooled)]
+    assert later.complete([str(spooled)], {}) == [('default:retention', date(2024, 3, 5))]
+    assert statuses(later) == {"Retention.csv": 'delivered'}
+    assert not spooled.exists()
+
+
+def test_gives_up_after_max_attempts(tmp_path):
+    outbox = make_outbox(tmp_path, max_attempts=2)
+    path = export(tmp_path / 'downloads', "Retention.csv")
+    outbox.add([path])
+    outbox.complete([], {str(path): "HTTP 500"})
+    (spooled,) = outbox.db.execute("SELECT path FROM outbox").fetchone()
+    outbox.complete([], {spooled: "HTTP 500"})
+    assert statuses(outbox) == {"Retention.csv": 'dead'}
+
+
+def test_preserve_pending_moves_files_out_of_the_download_folder(tmp_path):
+    outbox = make_outbox(tmp_path)
+    downloads = tmp_path / 'downloads'
+    pending = export(downloads, "Retention.csv")
+    delivered = export(downloads, "Engagement.csv")
+    outbox.add([pending, delivered])
+    outbox.complete([str(delivered)], {})
+
+    assert outbox.preserve_pending(downloads) == 1
+    assert not pending.exists()
+    assert outbox.due() == [str(tmp_path / 'state' / 'spool' / '1' / "Retention.csv")]
+
+
+def test_lost_files_are_marked(tmp_path):
+    outbox = make_outbox(tmp_path)
+    path = export(tmp_path / 'downloads', "Retention.csv")
+    outbox.add([path])
+    path.unlink()
+    assert outbox.due() == []
+    assert statuses(outbox) == {"Retention.csv": 'lost'}
@@ -0,0 +1,105 @@
+"""Pipelined run cancellation with the direct-HTTP export engine"""
+
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from main import RailwayCSVDownloader
+from pipeline import PipelinedRun, PipelineCancelled
+
+EXPORTS = 5
+
+
+class ExportSite(BaseHTTPRequestHandler):
+    """Serves /export/<n> as a small CSV after a short delay, counting requests"""
+
+    requests = 0
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        with self.lock:
+            type(self).requests += 1
+        time.sleep(0.2)
+        body = b"Date,Visits\n2024-03-05,10\n"
+        self.send_response(200)
+        self.send_header('Content-Disposition', f'attachment; filename="Report{self.path.rsplit("/", 1)[-1]}.csv"')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class CookieDriver:
+    def get_cookies(self):
+        return [{'name': '.ROBLOSECURITY', 'value': 'cookie', 'domain': '127.0.0.1', 'path': '/'}]
+
+    def execute_script(self, script):
+        return "test-agent"
+
+
+@pytest.fixture
+def site():
+    handler = type('TestExportSite', (ExportSite,), {'requests': 0})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield handler, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def downloader(tmp_path, monkeypatch, site):
+    _, url = site
+    endpoints = [{'name': f'report{n}', 'url': f"{url}/export/{n}"} for n in range(EXPORTS)]
+    for name, value in {
+        'ALT_ROBLOX_USERNAME': 'user', 'ALT_ROBLOX_PASSWORD': 'password',
+        'DOWNLOAD_FOLDER': str(tmp_path / 'downloads'), 'STATE_DIR': str(tmp_path / 'state'),
+        'HTTP_EXPORT_ENDPOINTS': json.dumps(endpoints), 'HTTP_EXPORT_WORKERS': '1',
+        'SESSION_CACHE': 'false', 'UPLOAD_OUTBOX': 'false', 'UPLOAD_MANIFEST': 'false', 'HISTORY_STORE': 'false',
+    }.items():
+        monkeypatch.setenv(name, value)
+    downloader = RailwayCSVDownloader()
+    downloader.driver = CookieDriver()
+    downloader.browser_exports = 0
+
+    def browser_exports(on_file=None):
+        downloader.browser_exports += 1
+        return []
+
+    downloader._download_csv_files_browser = browser_exports
+    return downloader
+
+
+def test_cancelled_http_exports_do_not_fall_back_to_the_browser(downloader, site):
+    handler, _ = site
+
+    def on_file(csv_file):
+        raise PipelineCancelled("upload stage failed, stopping exports")
+
+    with pytest.raises(PipelineCancelled):
+        downloader.download_csv_files(on_file)
+
+    assert downloader.browser_exports == 0
+    assert handler.requests < EXPORTS
+
+
+def test_upload_failure_stops_the_pipeline(downloader, site):
+    handler, _ = site
+
+    def failing_upload(csv_files):
+        raise RuntimeError("upload API down")
+
+    downloader._upload_batch = failing_upload
+
+    with pytest.raises(RuntimeError, match="upload API down"):
+        asyncio.run(PipelinedRun(downloader, upload_workers=1).run())
+
+    assert downloader.browser_exports == 0
+    assert handler.requests < EXPORTS
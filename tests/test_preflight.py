@@ -0,0 +1,69 @@
+"""Preflight checks against a fake Grid"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from preflight import backoff_delay, check_grid_status, run_preflight
+
+BUSY_STATUS = {'value': {'ready': False, 'message': 'Selenium Grid not ready.',
+                         'nodes': [{'slots': [{'session': {'sessionId': 'abc'}}]}]}}
+
+
+@pytest.fixture
+def grid():
+    """Serve a /status answer and a 404 for everything else; returns the base URL"""
+    servers = []
+
+    def start(status_code=200, status=BUSY_STATUS):
+        class GridHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, code, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(code)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == '/status':
+                    return self._send(status_code, status)
+                self._send(404, {})
+
+            def do_POST(self):
+                self._send(404, {})
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), GridHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_busy_grid_passes_with_readiness_as_information(grid):
+    url = grid()
+    status = check_grid_status(f"{url}/wd/hub")
+    assert status == {'ok': True, 'ready': False, 'message': 'Selenium Grid not ready.', 'free_slots': 0}
+
+    results = run_preflight(url, f"{url}/api")
+    assert results['grid_status']['ok']
+    assert not results['grid_capacity']['ok']  # no GraphQL here, still not fatal
+    assert results['upload_api']['ok']
+
+
+def test_grid_error_status_fails(grid):
+    assert not run_preflight(grid(status_code=500), 'http://127.0.0.1:9')['grid_status']['ok']
+
+
+def test_backoff_stretches_while_the_grid_is_saturated():
+    for attempt in range(4):
+        assert 0 <= backoff_delay(attempt) <= 2 ** attempt
+        assert 2 ** attempt <= backoff_delay(attempt, free_slots=0, queue_size=1) <= 2 ** (attempt + 1)
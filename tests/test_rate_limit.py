@@ -0,0 +1,94 @@
+"""Token bucket rate limiter"""
+
+import asyncio
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import rate_limit
+from rate_limit import TokenBucket, limiter, parse_retry_after
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("2.5") == 2.5
+    assert parse_retry_after("-3") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 < parse_retry_after(later) <= 30
+
+
+def test_burst_is_free_then_callers_wait_for_refill():
+    bucket = TokenBucket('test', rate=20, burst=3)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(1 / 20, abs=0.02)
+
+
+def test_waiters_queue_in_arrival_order():
+    bucket = TokenBucket('test', rate=10, burst=1)
+    bucket._reserve(1)
+    waits = [bucket._reserve(1) for _ in range(3)]
+    assert waits == sorted(waits)
+    assert waits[-1] == pytest.approx(0.3, abs=0.02)
+
+
+def test_async_acquire():
+    bucket = TokenBucket('test', rate=50, burst=1)
+
+    async def take_two():
+        return [await bucket.acquire_async(), await bucket.acquire_async()]
+
+    first, second = asyncio.run(take_two())
+    assert first == 0.0
+    assert second == pytest.approx(1 / 50, abs=0.01)
+
+
+def test_throttling_halves_the_rate_down_to_the_floor():
+    bucket = TokenBucket('test', rate=8, burst=8, min_rate=2)
+    bucket.observe(429, "0")
+    assert bucket.rate == 4
+    for _ in range(3):
+        bucket.throttled(0)
+    assert bucket.rate == 2
+
+
+def test_retry_after_holds_every_caller():
+    bucket = TokenBucket('test', rate=100, burst=100)
+    bucket.observe(503, "0.2")
+    assert bucket._reserve(1) == pytest.approx(0.2, abs=0.02)
+
+
+def test_retry_after_is_capped():
+    bucket = TokenBucket('test', rate=100, burst=100, max_delay=1)
+    bucket.throttled(3600)
+    assert bucket._reserve(1) <= 1
+
+
+def test_successes_restore_the_rate_gradually():
+    bucket = TokenBucket('test', rate=10, burst=10)
+    bucket.throttled(0)
+    bucket.observe(200)
+    assert bucket.rate == pytest.approx(6)
+    for _ in range(10):
+        bucket.succeeded()
+    assert bucket.rate == 10
+    bucket.observe(404)
+    assert bucket.rate == 10
+
+
+def test_zero_rate_disables_the_bucket():
+    bucket = TokenBucket('test', rate=0, burst=1)
+    assert [bucket.acquire() for _ in range(5)] == [0.0] * 5
+    bucket.throttled(10)
+    assert bucket.acquire() == 0.0
+
+
+def test_limiter_reads_env_once(monkeypatch):
+    monkeypatch.setattr(rate_limit, '_buckets', {})
+    monkeypatch.setenv('RATE_LIMIT_EXPORT', '4')
+    monkeypatch.setenv('RATE_LIMIT_EXPORT_BURST', '0')
+    bucket = limiter('export')
+    assert (bucket.rate, bucket.burst) == (4.0, 1.0)
+    monkeypatch.setenv('RATE_LIMIT_EXPORT', '1')
+    assert limiter('export') is bucket
@@ -0,0 +1,88 @@
+"""Scheduler slot math, catch-up and run coalescing"""
+
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from scheduler import Scheduler, parse_run_times
+
+
+def make_scheduler(run_times="09:00,21:00", **kwargs):
+    return Scheduler(lambda: True, parse_run_times(run_times), **kwargs)
+
+
+def test_parse_run_times_sorts_and_dedupes():
+    assert parse_run_times(" 21:00, 09:30,,09:30 ") == [(9, 30), (21, 0)]
+
+
+@pytest.mark.parametrize('value', ["24:00", "09:60", "", " , "])
+def test_parse_run_times_rejects_invalid(value):
+    with pytest.raises(ValueError):
+        parse_run_times(value)
+
+
+@pytest.mark.parametrize('after, expected', [
+    (datetime(2024, 3, 5, 8, 0), datetime(2024, 3, 5, 9, 0)),
+    (datetime(2024, 3, 5, 9, 0), datetime(2024, 3, 5, 21, 0)),  # strictly after
+    (datetime(2024, 3, 5, 21, 0, 1), datetime(2024, 3, 6, 9, 0)),
+    (datetime(2024, 12, 31, 22, 0), datetime(2025, 1, 1, 9, 0)),
+])
+def test_next_run(after, expected):
+    assert make_scheduler().next_run(after) == expected
+
+
+@pytest.mark.parametrize('before, expected', [
+    (datetime(2024, 3, 5, 9, 0), datetime(2024, 3, 5, 9, 0)),  # at or before
+    (datetime(2024, 3, 5, 20, 59), datetime(2024, 3, 5, 9, 0)),
+    (datetime(2024, 3, 5, 8, 59), datetime(2024, 3, 4, 21, 0)),
+    (datetime(2024, 3, 1, 0, 0), datetime(2024, 2, 29, 21, 0)),
+])
+def test_previous_run(before, expected):
+    assert make_scheduler().previous_run(before) == expected
+
+
+def hourly(**kwargs):
+    return make_scheduler(",".join(f"{hour:02d}:00" for hour in range(24)), **kwargs)
+
+
+def test_missed_slot_inside_catchup_window(tmp_path):
+    scheduler = hourly(state_path=tmp_path / 'state.json', catchup_hours=6)
+    slot = scheduler.previous_run()
+    scheduler.state['last_slot'] = (slot - timedelta(hours=1)).isoformat()
+    assert scheduler._missed_slot() == slot
+
+    scheduler.state['last_slot'] = slot.isoformat()
+    assert scheduler._missed_slot() is None
+
+
+def test_missed_slot_outside_catchup_window_or_first_start():
+    scheduler = hourly(catchup_hours=0)
+    scheduler.state['last_slot'] = (scheduler.previous_run() - timedelta(hours=1)).isoformat()
+    assert scheduler._missed_slot() is None
+    assert hourly()._missed_slot() is None
+
+
+def test_requests_coalesce_into_the_queued_run():
+    scheduler = make_scheduler()
+    assert scheduler.request_run('scheduled', datetime(2024, 3, 5, 9, 0))
+    assert not scheduler.request_run('http')
+    assert not scheduler.request_run('scheduled', datetime(2024, 3, 5, 21, 0))
+    assert scheduler.queued['reason'] == 'scheduled'
+    assert scheduler.queued['slot'] == datetime(2024, 3, 5, 21, 0)
+
+
+def test_worker_records_the_attempted_slot(tmp_path):
+    finished = threading.Event()
+    scheduler = Scheduler(lambda: finished.set() or True, parse_run_times("09:00"), state_path=tmp_path / 'state.json')
+    scheduler.request_run('catch-up', datetime(2024, 3, 5, 9, 0))
+    worker = threading.Thread(target=scheduler._worker_loop, daemon=True)
+    worker.start()
+    assert finished.wait(5)
+    scheduler.stop()
+    worker.join(5)
+
+    assert not worker.is_alive()
+    assert scheduler.state['last_slot'] == '2024-03-05T09:00:00'
+    assert scheduler.state['last_success'] is True
+    assert make_scheduler(state_path=tmp_path / 'state.json').state['last_reason'] == 'catch-up'
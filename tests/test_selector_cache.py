@@ -0,0 +1,61 @@
+"""Learned selector cache and batched candidate lookup"""
+
+from selector_cache import SelectorCache, find_candidates
+
+
+class ScriptDriver:
+    """Answers execute_script with a fixed [index, elements] pair and records the call"""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = []
+
+    def execute_script(self, script, *args):
+        self.calls.append(args)
+        return self.answer
+
+
+def test_find_candidates_is_one_round_trip():
+    driver = ScriptDriver([1, ['element']])
+    assert find_candidates(driver, ('//a', '//b'), clickable=True) == ('//b', ['element'])
+    assert driver.calls == [(['//a', '//b'], True, False)]
+
+
+def test_find_candidates_without_match():
+    assert find_candidates(ScriptDriver([-1, None]), ['//a']) == (None, [])
+
+
+def test_learned_selector_is_tried_first_and_persisted(tmp_path):
+    cache = SelectorCache(tmp_path / 'selectors.json')
+    cache.record('analytics', '//c')
+    cache.record('analytics', '//c')
+    cache.save()
+
+    reloaded = SelectorCache(tmp_path / 'selectors.json')
+    assert reloaded.order('analytics', ['//a', '//b', '//c']) == ['//c', '//a', '//b']
+    assert reloaded.entries['analytics']['hits'] == 2
+
+
+def test_layout_change_replaces_the_entry():
+    cache = SelectorCache()
+    cache.record('analytics', '//a')
+    cache.record('analytics', '//b')
+    assert cache.cached('analytics') == '//b'
+    assert cache.entries['analytics']['hits'] == 1
+
+
+def test_stale_entries_are_dropped():
+    cache = SelectorCache()
+    cache.record('analytics', '//old')
+    assert cache.order('analytics', ['//a', '//b']) == ['//a', '//b']
+    assert cache.cached('analytics') is None
+
+    cache.record('analytics', '//a')
+    cache.invalidate('analytics')
+    assert cache.order('analytics', ['//b', '//a']) == ['//b', '//a']
+
+
+def test_unreadable_cache_starts_fresh(tmp_path):
+    path = tmp_path / 'selectors.json'
+    path.write_text("[")
+    assert SelectorCache(path).entries == {}
@@ -0,0 +1,79 @@
+"""Encrypted login cache validated against the fake site's users API"""
+
+import pytest
+from cryptography.fernet import Fernet
+
+from benchmarks.fake_roblox import SESSION_COOKIE, start_fake_roblox
+from session_cache import SessionCache
+
+KEY = Fernet.generate_key()
+
+
+class BrowserStub:
+    """Just enough WebDriver for save() and restore()"""
+
+    def __init__(self, cookies=()):
+        self.cookies = list(cookies)
+        self.local_storage = {'theme': 'dark'}
+        self.visited = []
+
+    def get_cookies(self):
+        return list(self.cookies)
+
+    def add_cookie(self, cookie):
+        self.cookies.append(cookie)
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def execute_script(self, script, *args):
+        if 'location.origin' in script:
+            return "http://site.test"
+        if args:
+            self.local_storage.update(args[0])
+            return None
+        return dict(self.local_storage)
+
+
+@pytest.fixture
+def users_url():
+    site = start_fake_roblox(host='127.0.0.1')
+    yield f"http://127.0.0.1:{site.server_port}"
+    site.shutdown()
+    site.server_close()
+
+
+def cache_for(tmp_path, users_url, key=None, **kwargs):
+    return SessionCache(tmp_path / 'session.bin', key or KEY, users_url=users_url, **kwargs)
+
+
+
+def test_valid_session_is_restored(tmp_path, users_url):
+    cache = cache_for(tmp_path, users_url)
+    cache.save(BrowserStub([{'name': SESSION_COOKIE, 'value': 'fake-session', 'domain': 'site.test',
+                             'sameSite': 'Unspecified'}]))
+
+    browser = BrowserStub()
+    assert cache.restore(browser)
+    assert browser.visited == ["http://site.test"]
+    assert browser.cookies == [{'name': SESSION_COOKIE, 'value': 'fake-session', 'domain': 'site.test'}]
+
+
+def test_unauthenticated_session_is_discarded(tmp_path, users_url):
+    cache = cache_for(tmp_path, users_url)
+    cache.save(BrowserStub([{'name': 'other', 'value': 'x'}]))
+
+    assert not cache.restore(BrowserStub())
+    assert not cache.path.exists()
+
+
+def test_unreadable_cache_is_discarded(tmp_path, users_url):
+    cache_for(tmp_path, users_url).save(BrowserStub())
+    other_key = cache_for(tmp_path, users_url, key=Fernet.generate_key())
+    assert other_key.load() is None
+    assert not other_key.path.exists()
+
+
+def test_default_validation_url_is_the_roblox_users_api(tmp_path):
+    assert SessionCache(tmp_path / 'session.bin', KEY).auth_check_url == \
+        "https://users.roblox.com/v1/users/authenticated"
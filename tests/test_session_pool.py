@@ -0,0 +1,112 @@
+"""Warm standby session window and handoff"""
+
+import time
+from datetime import datetime, timedelta
+
+from session_pool import WarmSessionPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.pings = 0
+        self.alive = True
+        self.quit_called = False
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise ConnectionError("session gone")
+        self.pings += 1
+        return 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+class NextRun:
+    """next_run_at() stand-in the test moves forward"""
+
+    def __init__(self, slot):
+        self.slot = slot
+
+    def __call__(self):
+        return self.slot
+
+
+def make_pool(next_run_at, **kwargs):
+    drivers = []
+
+    def create_session():
+        drivers.append(FakeDriver())
+        return drivers[-1]
+
+    pool = WarmSessionPool(create_session, lead_minutes=5, **kwargs)
+    pool.next_run_at = next_run_at
+    return pool, drivers
+
+
+def test_opens_only_within_lead_of_the_next_run():
+    next_run = NextRun(datetime.now() + timedelta(minutes=30))
+    pool, drivers = make_pool(next_run)
+    pool._tick()
+    assert pool.standby is None
+
+    next_run.slot = datetime.now() + timedelta(minutes=4)
+    pool._tick()
+    assert pool.standby.slot == next_run.slot
+    assert len(drivers) == 1
+
+
+def test_standby_survives_its_slot_passing_until_acquired():
+    slot = datetime.now() + timedelta(minutes=1)
+    next_run = NextRun(slot)
+    pool, drivers = make_pool(next_run)
+    pool._tick()
+
+    # The scheduled time has passed; next_run_at() already points at tomorrow while the run is in preflight
+    next_run.slot = slot + timedelta(days=1)
+    pool._tick()
+    assert pool.standby is not None and not drivers[0].quit_called
+
+    standby = pool.acquire()
+    assert standby.driver is drivers[0] and standby.slot == slot
+    assert pool.standby is None
+    pool._tick()
+    assert pool.standby is None and len(drivers) == 1
+
+
+def test_max_idle_closes_the_standby():
+    pool, drivers = make_pool(NextRun(datetime.now() + timedelta(minutes=1)), max_idle_minutes=1)
+    pool._tick()
+    pool.standby.opened_at = time.monotonic() - 61
+    pool._tick()
+    assert pool.standby is None and drivers[0].quit_called
+
+
+def test_failed_ping_is_replaced_inside_the_lead():
+    pool, drivers = make_pool(NextRun(datetime.now() + timedelta(minutes=3)))
+    pool._tick()
+    drivers[0].alive = False
+    pool._tick()
+    assert pool.standby is None and drivers[0].quit_called
+    pool._tick()
+    assert pool.standby.driver is drivers[1]
+
+
+def test_dead_standby_is_not_handed_over():
+    pool, drivers = make_pool(NextRun(datetime.now() + timedelta(minutes=3)))
+    assert pool.acquire() is None
+    pool._tick()
+    drivers[0].alive = False
+    assert pool.acquire() is None
+    assert drivers[0].quit_called
+
+
+def test_prepare_marks_the_standby_logged_in():
+    pool, drivers = make_pool(NextRun(datetime.now() + timedelta(minutes=3)))
+    pool.prepare = lambda driver: driver is drivers[0]
+    pool._tick()
+    assert pool.acquire().logged_in
+
+    pool.prepare = lambda driver: 1 / 0
+    pool._tick()
+    assert pool.acquire().logged_in is False
@@ -0,0 +1,131 @@
+"""ChunkedUploader against the reference upload server"""
+
+import gzip
+import socket
+import threading
+
+from reference_upload_server import UploadHandler, UploadStore
+from uploads import ChunkedUploader, gzip_chunks
+
+CHUNK_SIZE = 4096
+
+
+def write_export(path, rows=3000):
+    # Varied rows so the gzip stream spans several chunks
+    lines = ["Date,Visits,Revenue"] + [f"2024-{1 + i % 12:02d}-{1 + i % 28:02d},{i * 7919 % 100003},{i * 31 % 997}.5"
+                                       for i in range(rows)]
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def received(store):
+    files = [p for p in store.storage.iterdir() if p.is_file()]
+    assert len(files) == 1
+    return files[0]
+
+
+def closed_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def test_gzip_chunks_are_deterministic_and_decompress(tmp_path):
+    export = write_export(tmp_path / "Retention.csv")
+    first = list(gzip_chunks(export, CHUNK_SIZE))
+    assert len(first) > 2
+    assert all(len(chunk) == CHUNK_SIZE for chunk in first[:-1])
+    assert first == list(gzip_chunks(export, CHUNK_SIZE))
+    assert gzip.decompress(b''.join(first)) == export.read_bytes()
+
+
+def test_chunked_upload_round_trip(tmp_path, upload_api):
+    api_url, store = upload_api()
+    export = write_export(tmp_path / "Retention.csv")
+
+    result = ChunkedUploader(api_url, chunk_size=CHUNK_SIZE, max_backoff=0).upload_file(export)
+
+    assert result['success'], result
+    assert result['attempts'] == 1
+    assert result['compressed_bytes'] == len(b''.join(gzip_chunks(export, CHUNK_SIZE)))
+    target = received(store)
+    assert target.name.endswith("_Retention.csv")
+    assert target.read_bytes() == export.read_bytes()
+
+
+class LostAckHandler(UploadHandler):
+    """Stores the third chunk but answers 503, as if the response was lost on the way back"""
+
+    puts = 0
+    lock = threading.Lock()
+
+    def _send_json(self, status, payload):
+        if self.command == 'PUT' and status == 200:
+            with self.lock:
+                type(self).puts += 1
+                if self.puts == 3:
+                    status, payload = 503, {'error': 'response lost'}
+        super()._send_json(status, payload)
+
+
+def test_chunked_upload_resumes_from_server_offset(tmp_path, upload_api):
+    api_url, store = upload_api(LostAckHandler, puts=0)
+    export = write_export(tmp_path / "Retention.csv")
+
+    result = ChunkedUploader(api_url, chunk_size=CHUNK_SIZE, max_backoff=0).upload_file(export)
+
+    # The resumed pass must skip the chunk the server already has, or the checksum would not match
+    assert result['success'], result
+    assert result['attempts'] == 2
+    assert received(store).read_bytes() == export.read_bytes()
+
+
+def test_falls_back_to_single_shot_on_legacy_api(tmp_path, upload_api):
+    api_url, store = upload_api(chunked=False)
+    export = write_export(tmp_path / "Retention.csv", rows=10)
+    uploader = ChunkedUploader(api_url, chunk_size=CHUNK_SIZE, max_backoff=0)
+
+    result = uploader.upload_file(export)
+
+    assert result['success'], result
+    assert uploader.chunked_supported is False
+    assert received(store).read_bytes() == export.read_bytes()
+
+
+class RejectingStore(UploadStore):
+    def complete(self, upload_id, size, sha256):
+        with self.lock:
+            self.sessions.pop(upload_id)
+        raise ValueError("size or checksum mismatch")
+
+
+def test_rejected_complete_is_a_failed_result(tmp_path, upload_api):
+    api_url, _ = upload_api(store=RejectingStore(tmp_path / 'received'))
+    export = write_export(tmp_path / "Retention.csv", rows=10)
+
+    result = ChunkedUploader(api_url, chunk_size=CHUNK_SIZE, max_backoff=0).upload_file(export)
+
+    assert not result['success']
+    assert result['error'] == "HTTP 422 on complete"
+
+
+def test_unreachable_api_is_a_failed_result(tmp_path):
+    export = write_export(tmp_path / "Retention.csv", rows=10)
+    uploader = ChunkedUploader(f"http://127.0.0.1:{closed_port()}/api", max_retries=2, max_backoff=0)
+
+    result = uploader.upload_file(export)
+
+    assert not result['success']
+    assert result['error'].startswith("could not create upload session")
+    assert uploader.chunked_supported is True
+
+
+def test_empty_file_is_not_sent(tmp_path, upload_api):
+    api_url, store = upload_api()
+    export = tmp_path / "Retention.csv"
+    export.touch()
+
+    result = ChunkedUploader(api_url, max_backoff=0).upload_file(export)
+
+    assert result['error'] == 'empty file'
+    assert not any(p.is_file() for p in store.storage.iterdir())
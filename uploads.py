@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Concurrent streaming uploader for the SparkedHosting API
+Shares one keep-alive session and streams multipart bodies from disk,
+optionally as gzip-compressed resumable chunks
+"""
+
+import os
+import time
+import uuid
+import zlib
+import random
+import hashlib
+import logging
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from metrics import timed_sleep
+from rate_limit import RateLimitedAdapter
+
+logger = logging.getLogger(__name__)
+
+# Statuses meaning the API predates the chunked upload protocol
+UNSUPPORTED_STATUSES = (404, 405, 501)
+
+
+class ChunkedUploadUnsupported(Exception):
+    """Raised when the API does not speak the chunked upload protocol"""
+
+
+def gzip_chunks(path, chunk_size, level=6, read_size=64 * 1024):
+    """Gzip a file while reading it and yield fixed-size compressed chunks
+
+    The output is deterministic for the same input, so a transfer can be
+    resumed by regenerating the stream and skipping acknowledged bytes.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 -> gzip container, mtime 0
+    pending = b''
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(read_size)
+            pending += compressor.compress(data) if data else compressor.flush()
+            while len(pending) >= chunk_size:
+                yield pending[:chunk_size]
+                pending = pending[chunk_size:]
+            if not data:
+                break
+    if pending:
+        yield pending
+
+
+class MultipartFileStream:
+    """File-like multipart/form-data body that reads the file from disk as it is sent"""
+
+    def __init__(self, path, field_name, filename, content_type='text/csv', chunk_size=64 * 1024):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f'multipart/form-data; boundary={self.boundary}'
+        self._head = (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{field_name}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        ).encode()
+        self._tail = f'\r\n--{self.boundary}--\r\n'.encode()
+        self._file_size = self.path.stat().st_size
+        self._parts = None
+        self._buffer = b''
+
+    def __len__(self):
+        return len(self._head) + self._file_size + len(self._tail)
+
+    def _generate(self):
+        yield self._head
+        with open(self.path, 'rb') as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        yield self._tail
+
+    def __iter__(self):
+        return self._generate()
+
+    def read(self, size=-1):
+        """Return up to `size` bytes of the body (http.client reads in blocks)"""
+        if self._parts is None:
+            self._parts = self._generate()
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._parts)
+            except StopIteration:
+                break
+        if size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class SparkedUploader:
+    """Upload CSVs concurrently over a shared connection pool with per-file retries"""
+
+    def __init__(self, api_url, max_workers=3, max_retries=3, max_backoff=15):
+        self.api_url = api_url
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+
+        self.http = requests.Session()
+        # Shared 'upload' budget; 429/503 from the API slow every uploader down
+        adapter = RateLimitedAdapter('upload', pool_connections=1, pool_maxsize=max_workers)
+        self.http.mount('https://', adapter)
+        self.http.mount('http://', adapter)
+
+    def upload_file(self, csv_file):
+        """Upload one file with its own retry/backoff; return a result dict"""
+        original_name = Path(csv_file).name
+        size = os.path.getsize(csv_file)
+        result = {'file': str(csv_file), 'name': original_name, 'success': False,
+                  'bytes': size, 'seconds': 0.0, 'bytes_per_sec': 0.0, 'attempts': 0, 'error': None}
+
+        if size == 0:
+            logger.warning(f"⚠️ Skipping empty file: {original_name}")
+            result['error'] = 'empty file'
+            return result
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        new_name = f"railway_{timestamp}_{original_name}"
+
+        for attempt in range(self.max_retries):
+            result['attempts'] = attempt + 1
+            try:
+                body = MultipartFileStream(csv_file, 'files', new_name)
+                logger.info(f"📤 Uploading: {new_name} (attempt {attempt + 1}, {size} bytes)")
+
+                started = time.monotonic()
+                response = self.http.post(
+                    f"{self.api_url}/upload-csv",
+                    data=body,
+                    headers={'Content-Type': body.content_type},
+                    timeout=120
+                )
+                elapsed = time.monotonic() - started
+
+                if response.status_code == 200:
+                    result.update(success=True, seconds=elapsed, bytes_per_sec=size / elapsed if elapsed else 0.0)
+                    logger.info(f"✅ Successfully uploaded: {new_name} "
+                                f"({result['bytes_per_sec'] / 1024:.1f} KiB/s)")
+                    return result
+
+                result['error'] = f"HTTP {response.status_code}"
+                logger.warning(f"⚠️ Upload failed: HTTP {response.status_code}")
+
+            except Exception as e:
+                result['error'] = str(e)
+                logger.warning(f"⚠️ Upload attempt {attempt + 1} error: {e}")
+
+            if attempt < self.max_retries - 1:
+                # Exponential backoff with jitter; only this file's worker waits
+                timed_sleep(min(2 ** attempt + random.uniform(0, 1), self.max_backoff), 'upload_backoff')
+
+        logger.error(f"❌ Upload of {original_name} failed after {self.max_retries} attempts: {result['error']}")
+        return result
+
+    def upload_all(self, csv_files):
+        """Upload files concurrently; return results in completion order"""
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(self.upload_file, f) for f in csv_files]
+            for future in as_completed(futures):
+                results.append(future.result())
+        return results
+
+
+class ChunkedUploader(SparkedUploader):
+    """Gzip-compressed, resumable chunked uploads with a single-shot fallback
+
+    Protocol (relative to the API URL):
+      POST /upload-sessions                 {"filename", "encoding", "chunk_size"} -> {"upload_id", "offset"}
+      PUT  /upload-sessions/<id>            body=chunk, Upload-Offset header       -> {"offset"} (409 on mismatch)
+      GET  /upload-sessions/<id>                                                   -> {"offset"}
+      POST /upload-sessions/<id>/complete   {"size", "sha256"} of the gzip stream
+    """
+
+    def __init__(self, api_url, chunk_size=1024 * 1024, **kwargs):
+        super().__init__(api_url, **kwargs)
+        self.chunk_size = chunk_size
+        self.chunked_supported = True
+
+    def upload_file(self, csv_file):
+        """Upload one file in resumable chunks, falling back to a multipart POST"""
+        if not self.chunked_supported:
+            return super().upload_file(csv_file)
+
+        try:
+            return self._upload_chunked(csv_file)
+        except ChunkedUploadUnsupported:
+            logger.info("↩️ API does not support chunked uploads, using single-shot upload")
+            self.chunked_supported = False
+            return super().upload_file(csv_file)
+
+    def _protocol_request(self, method, url, result, **kwargs):
+        """Send a session create/complete request with the chunk retry/backoff
+
+        Connection errors and 5xx responses are retried; returns the last response,
+        or None (with result['error'] set) if the API never answered.
+        """
+        response = None
+        for attempt in range(self.max_retries):
+            try:
+                response = self.http.request(method, url, **kwargs)
+                if response.status_code < 500:
+                    return response
+                result['error'] = f"HTTP {response.status_code}"
+            except requests.RequestException as e:
+                response = None
+                result['error'] = str(e)
+            if attempt < self.max_retries - 1:
+                logger.warning(f"⚠️ {method} {url} failed ({result['error']}), retrying...")
+                timed_sleep(min(2 ** attempt + random.uniform(0, 1), self.max_backoff), 'upload_backoff')
+        return response
+
+    def _resume_offset(self, session_url):
+        """Ask the server how many bytes it has acknowledged"""
+        response = self.http.get(session_url, timeout=30)
+        response.raise_for_status()
+        return response.json()['offset']
+
+    def _upload_chunked(self, csv_file):
+        original_name = Path(csv_file).name
+        size = os.path.getsize(csv_file)
+        result = {'file': str(csv_file), 'name': original_name, 'success': False,
+                  'bytes': size, 'compressed_bytes': 0, 'seconds': 0.0, 'bytes_per_sec': 0.0,
+                  'attempts': 0, 'error': None}
+
+        if size == 0:
+            logger.warning(f"⚠️ Skipping empty file: {original_name}")
+            result['error'] = 'empty file'
+            return result
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        new_name = f"railway_{timestamp}_{original_name}"
+        started = time.monotonic()
+
+        response = self._protocol_request(
+            'POST', f"{self.api_url}/upload-sessions", result,
+            json={'filename': new_name, 'encoding': 'gzip', 'chunk_size': self.chunk_size},
+            timeout=30
+        )
+        if response is not None and response.status_code in UNSUPPORTED_STATUSES:
+            raise ChunkedUploadUnsupported()
+        try:
+            if response is None:
+                raise requests.ConnectionError(result['error'])
+            response.raise_for_status()
+            session_url = f"{self.api_url}/upload-sessions/{response.json()['upload_id']}"
+        except (requests.RequestException, ValueError, KeyError) as e:
+            result['error'] = f"could not create upload session: {e}"
+            logger.error(f"❌ Chunked upload of {original_name} failed: {result['error']}")
+            return result
+
+        offset = 0
+        failures = 0
+        while True:
+            result['attempts'] += 1
+            try:
+                # Regenerate the deterministic gzip stream and skip what the server already has
+                position = 0
+                digest = hashlib.sha256()
+                for chunk in gzip_chunks(csv_file, self.chunk_size):
+                    if position < offset:
+                        skip = min(offset - position, len(chunk))
+                        digest.update(chunk[:skip])
+                        chunk = chunk[skip:]
+                        position += skip
+                        if not chunk:
+                            continue
+
+                    response = self.http.put(session_url, data=chunk,
+                                             headers={'Upload-Offset': str(position)}, timeout=120)
+                    if response.status_code == 409:
+                        raise ValueError(f"offset mismatch at {position}")
+                    response.raise_for_status()
+
+                    digest.update(chunk)
+                    position = offset = response.json()['offset']
+                    failures = 0
+                break
+
+            except Exception as e:
+                failures += 1
+                result['error'] = str(e)
+                if failures >= self.max_retries:
+                    logger.error(f"❌ Chunked upload of {original_name} failed at byte {offset}: {e}")
+                    return result
+                logger.warning(f"⚠️ Chunk upload error at byte {offset} ({e}), resuming...")
+                timed_sleep(min(2 ** (failures - 1) + random.uniform(0, 1), self.max_backoff), 'upload_backoff')
+                try:
+                    offset = self._resume_offset(session_url)
+                except Exception as resume_error:
+                    logger.warning(f"⚠️ Could not query resume offset: {resume_error}")
+
+        response = self._protocol_request('POST', f"{session_url}/complete", result,
+                                          json={'size': offset, 'sha256': digest.hexdigest()}, timeout=120)
+        if response is None or response.status_code != 200:
+            if response is not None:
+                result['error'] = f"HTTP {response.status_code} on complete"
+            logger.error(f"❌ Chunked upload of {original_name} was not accepted: {result['error']}")
+            return result
+
+        elapsed = time.monotonic() - started
+        result.update(success=True, error=None, compressed_bytes=offset, seconds=elapsed,
+                      bytes_per_sec=size / elapsed if elapsed else 0.0)
+        logger.info(f"✅ Successfully uploaded: {new_name} ({size} -> {offset} bytes gzip, "
+                    f"{result['bytes_per_sec'] / 1024:.1f} KiB/s)")
+        return result
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Condition-based wait engine for Railway CSV automation
+Replaces fixed sleeps and implicit waits with short-interval polling on
+DOM, URL and network-idle conditions, recording how long each wait took
+"""
+
+import json
+import time
+import random
+import logging
+import threading
+from pathlib import Path
+
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
+
+from metrics import Histogram, notify_wait, timed_sleep
+from selector_cache import find_candidates
+
+logger = logging.getLogger(__name__)
+
+WAIT_SECONDS = Histogram('railway_wait_seconds', 'Time spent in condition waits', ['wait', 'outcome'],
+                         buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60))
+
+# Timeouts in seconds per kind of wait; poll is the condition polling interval
+WAIT_PROFILES = {
+    'fast': {'page': 15, 'element': 5, 'url': 15, 'idle': 5, 'idle_window': 0.3, 'poll': 0.1,
+             'pause': (0.05, 0.2)},
+    'normal': {'page': 30, 'element': 10, 'url': 30, 'idle': 10, 'idle_window': 0.5, 'poll': 0.2,
+               'pause': (0.3, 0.8)},
+    'cautious': {'page': 60, 'element': 20, 'url': 60, 'idle': 20, 'idle_window': 1.0, 'poll': 0.5,
+                 'pause': (1.0, 2.0)},
+}
+
+# Resource count and load state; the page is idle once the count stops growing
+NETWORK_STATE_SCRIPT = (
+    "return [document.readyState, performance.getEntriesByType('resource').length];"
+)
+
+
+class WaitStats:
+    """Thread-safe record of actual wait durations, persisted to tune profiles"""
+
+    def __init__(self, path=None, max_samples=200):
+        self.path = Path(path) if path else None
+        self.max_samples = max_samples
+        self.lock = threading.Lock()
+        self.samples = {}
+        if self.path and self.path.exists():
+            try:
+                self.samples = json.loads(self.path.read_text())
+            except Exception as e:
+                logger.warning(f"⚠️ Wait stats unreadable, starting fresh: {e}")
+
+    def record(self, name, seconds, outcome):
+        WAIT_SECONDS.observe(seconds, wait=name, outcome=outcome)
+        with self.lock:
+            samples = self.samples.setdefault(name, [])
+            samples.append(round(seconds, 3))
+            del samples[:-self.max_samples]
+
+    def summary(self):
+        """Return {wait: {count, p50, p95, max}} over the stored samples"""
+        with self.lock:
+            result = {}
+            for name, samples in self.samples.items():
+                ordered = sorted(samples)
+                result[name] = {
+                    'count': len(ordered),
+                    'p50': ordered[len(ordered) // 2],
+                    'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                    'max': ordered[-1],
+                }
+            return result
+
+    def save(self):
+        """Persist samples and log the slowest waits with a suggested timeout"""
+        summary = self.summary()
+        for name, stats in sorted(summary.items(), key=lambda item: -item[1]['p95'])[:5]:
+            logger.info(f"⏱️ Wait {name}: p50 {stats['p50']}s, p95 {stats['p95']}s, max {stats['max']}s "
+                        f"(n={stats['count']}, suggested timeout {max(1.0, round(stats['p95'] * 1.5, 1))}s)")
+        if not self.path:
+            return
+        with self.lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(self.samples))
+            tmp_path.replace(self.path)
+
+
+class WaitEngine:
+    """Wait on real page conditions with profile-driven timeouts"""
+
+    def __init__(self, driver, profile='normal', stats=None, selector_cache=None):
+        if profile not in WAIT_PROFILES:
+            raise ValueError(f"Unknown wait profile '{profile}', expected one of {sorted(WAIT_PROFILES)}")
+        self.driver = driver
+        self.profile_name = profile
+        self.profile = WAIT_PROFILES[profile]
+        self.stats = stats or WaitStats()
+        self.selector_cache = selector_cache
+
+    def until(self, condition, name, kind='element', timeout=None):
+        """Poll `condition(driver)` until truthy; record the duration under `name`"""
+        timeout = timeout or self.profile[kind]
+        started = time.monotonic()
+        started_perf = time.perf_counter()
+        try:
+            result = WebDriverWait(self.driver, timeout, poll_frequency=self.profile['poll'],
+                                   ignored_exceptions=(StaleElementReferenceException,)).until(condition)
+        except TimeoutException:
+            self.stats.record(name, time.monotonic() - started, 'timeout')
+            notify_wait(name, 'wait', started_perf, outcome='timeout')
+            raise
+        self.stats.record(name, time.monotonic() - started, 'ok')
+        notify_wait(name, 'wait', started_perf, outcome='ok')
+        return result
+
+    def for_element(self, by, value, name, clickable=False, kind='element'):
+        """Wait for an element to be present (or clickable) and return it"""
+        condition = EC.element_to_be_clickable if clickable else EC.presence_of_element_located
+        return self.until(condition((by, value)), name, kind)
+
+    def _ordered(self, name, selectors):
+        return self.selector_cache.order(name, selectors) if self.selector_cache else list(selectors)
+
+    def _learn(self, name, selector):
+        if self.selector_cache and selector:
+            self.selector_cache.record(name, selector)
+
+    def for_any_xpath(self, selectors, name, clickable=False, kind='element'):
+        """Wait until any selector matches; return (selector, element)
+
+        All candidates are checked in one execute_script round trip per poll,
+        learned winner first, so a page that matches the third selector no
+        longer waits out the first two.
+        """
+        ordered = self._ordered(name, selectors)
+
+        def condition(driver):
+            selector, elements = find_candidates(driver, ordered, clickable)
+            return (selector, elements[0]) if selector else False
+
+        try:
+            selector, element = self.until(condition, name, kind)
+        except TimeoutException:
+            if self.selector_cache:
+                self.selector_cache.invalidate(name)
+            raise
+        self._learn(name, selector)
+        return selector, element
+
+    def find_all_xpath(self, selectors, name):
+        """Return every element matched by any selector, deduplicated, in one round trip"""
+        selector, elements = find_candidates(self.driver, self._ordered(name, selectors), find_all=True)
+        self._learn(name, selector)
+        return selector, elements
+
+    def for_url(self, predicate, name, kind='url'):
+        """Wait until `predicate(current_url)` is true"""
+        return self.until(lambda driver: predicate(driver.current_url), name, kind)
+
+    def for_network_idle(self, name, kind='idle'):
+        """Wait for document load and no new resource requests for the idle window"""
+        window = self.profile['idle_window']
+        state = {'count': -1, 'since': time.monotonic()}
+
+        def condition(driver):
+            ready_state, count = driver.execute_script(NETWORK_STATE_SCRIPT)
+            now = time.monotonic()
+            if ready_state != 'complete' or count != state['count']:
+                state.update(count=count, since=now)
+                return False
+            return now - state['since'] >= window
+
+        try:
+            return self.until(condition, name, kind)
+        except TimeoutException:
+            # A page with constant polling never goes idle; carry on rather than fail
+            logger.info(f"⌛ Network not idle after {self.profile[kind]}s for {name}, continuing")
+            return False
+
+    def pause(self, name='pause'):
+        """Short randomized pacing between user actions, sized by the profile"""
+        low, high = self.profile['pause']
+        seconds = random.uniform(low, high)
+        timed_sleep(seconds, name)
+        self.stats.record(name, seconds, 'ok')